@@ -1,3 +1,35 @@
-from .aes_cipher import aes_cipher_menu
+from .aes_cipher import (
+    aes_cipher_menu,
+    AESCipher,
+)
+from .aes_async import (
+    encrypt_file_async,
+    decrypt_file_async,
+)
+from .aes_gcm import (
+    AESGCMCipher,
+    IntegrityError,
+    verify_file,
+)
+from .aes_tree import (
+    encrypt_tree,
+    sync_tree,
+)
+from .rekey import (
+    rekey_file,
+    rekey_stream,
+)
 
-__all__ = ["aes_cipher_menu"]
+__all__ = [
+    "aes_cipher_menu",
+    "AESCipher",
+    "encrypt_tree",
+    "sync_tree",
+    "rekey_file",
+    "rekey_stream",
+    "encrypt_file_async",
+    "decrypt_file_async",
+    "AESGCMCipher",
+    "IntegrityError",
+    "verify_file",
+]
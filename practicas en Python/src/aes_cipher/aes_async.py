@@ -0,0 +1,108 @@
+"""Cifrado de archivos con AES desde `asyncio`."""
+
+import asyncio
+from pathlib import Path
+
+from ciphers import transform_file_async
+from config import BASE_DIR
+from key_cache import KEY_CACHE
+from key_ring import (
+    is_reference,
+    load_key,
+)
+
+from .aes_cipher import (
+    _CTRDecryptor,
+    _CTREncryptor,
+    _decode_key,
+)
+
+__all__ = [
+    "encrypt_file_async",
+    "decrypt_file_async",
+]
+
+
+def _load_key(key_filename: str) -> bytes:
+    """
+    Lee y decodifica la llave de `key_filename` (relativo a `BASE_DIR`)
+    usando `KEY_CACHE`, o la toma del llavero si es `ring:<id>`. Lanza
+    `ValueError` si la llave no es válida.
+    """
+    if is_reference(key_filename):
+        key = load_key(key_filename, "aes")
+    else:
+        path = BASE_DIR / key_filename
+        stat = path.stat()
+        key = KEY_CACHE.get(path, stat)
+        if key is None:
+            try:
+                key = KEY_CACHE.put(path, stat, _decode_key(path.read_bytes()))
+            except ValueError:
+                raise ValueError(f"La llave {key_filename} no es valida") from None
+
+    if len(key) not in (16, 24, 32):
+        raise ValueError(f"La llave {key_filename} no es valida")
+    return key
+
+
+async def encrypt_file_async(
+        key_filename: str,
+        plaintext_filename: str,
+        ciphertext_filename: str,
+        compression: str | None = None,
+    ) -> str:
+    """
+    Versión para `asyncio` de `_encrypt_file`: mismo formato (también
+    con compresión) y mismo nombre de salida, pero sin impresiones y
+    lanzando excepciones en lugar de devolver `None`.
+
+    :param key_filename: Archivo con la llave en base 64.
+    :type key_filename: str
+    :param plaintext_filename: Archivo a cifrar.
+    :type plaintext_filename: str
+    :param ciphertext_filename: Nombre base del archivo cifrado.
+    :type ciphertext_filename: str
+    :param compression: Codec de compresión o `None` para no comprimir.
+    :type compression: str | None
+    :return: Nombre del archivo cifrado.
+    :rtype: str
+    """
+    key = await asyncio.to_thread(_load_key, key_filename)
+    suffix = Path(plaintext_filename).suffix
+    cipher_filename = f"{ciphertext_filename}{suffix}.enc"
+
+    await transform_file_async(
+        lambda: _CTREncryptor(key),
+        BASE_DIR / plaintext_filename,
+        BASE_DIR / cipher_filename,
+        compression=compression,
+    )
+    return cipher_filename
+
+
+async def decrypt_file_async(
+        key_filename: str,
+        ciphertext_filename: str,
+    ) -> str:
+    """
+    Versión para `asyncio` de `_decrypt_file`; si el archivo está
+    comprimido, descomprime al mismo tiempo.
+
+    :param key_filename: Archivo con la llave en base 64.
+    :type key_filename: str
+    :param ciphertext_filename: Archivo cifrado (`.enc`).
+    :type ciphertext_filename: str
+    :return: Nombre del archivo recuperado.
+    :rtype: str
+    """
+    key = await asyncio.to_thread(_load_key, key_filename)
+    recover_filename = ciphertext_filename.removesuffix(".enc")
+
+    await transform_file_async(
+        lambda: _CTRDecryptor(key),
+        BASE_DIR / ciphertext_filename,
+        BASE_DIR / recover_filename,
+        decompress=True,
+    )
+    return recover_filename
@@ -1,17 +1,47 @@
 """Cifrado usando AES."""
 
 import base64
+import os
 from pathlib import Path
 import time
-from tqdm import tqdm
+from typing import (
+    BinaryIO,
+    Callable,
+)
 
 from Crypto.Random import get_random_bytes
 from Crypto.Cipher import AES
 
+from ciphers import (
+    Cipher,
+    CipherStream,
+    Compressor,
+    Decompressor,
+    chain,
+    choose_level,
+    feed,
+    pack_header,
+    read_header,
+)
 from config import BASE_DIR
 from decorators import (
+    ValidationContext,
+    instrumented,
     validate_file,
-    validate_key,
+    validate_key_file,
+)
+from key_cache import KEY_CACHE
+from key_derivation import (
+    KDFS,
+    calibrate,
+    is_params,
+    key_from_params,
+    password_key,
+)
+from key_ring import store_key
+from progress import (
+    adaptive_chunk_size,
+    make_progress,
 )
 from utils import (
     clean_console,
@@ -21,22 +51,26 @@ from utils import (
     yellow,
 )
 
-__all__ = ["aes_cipher_menu"]
+from .pipeline import ctr_pipeline
 
-CHUNK_SIZE = 1024 * 1024  # 1 MB
+__all__ = [
+    "aes_cipher_menu",
+    "AESCipher",
+]
 
-def _is_valid_key(key_filename: str) -> bool:
-    with open(BASE_DIR / key_filename, "r", encoding="utf-8") as f:
-        data = f.read()
-    
-    try:
-        base64.b64decode(data, validate=True)
-        return True
-    except Exception:
-        return False
+def _decode_key(data: bytes) -> bytes:
+    """
+    Decodifica el contenido de un archivo de llave en base 64. Si el
+    archivo tiene parámetros de derivación (`.kdf`), deriva la llave de
+    la contraseña. Lanza una excepción si no es válido.
+    """
+    if is_params(data):
+        return key_from_params(data)
+    return base64.b64decode(data, validate=True)
 
 
-def _random_key_generator(key_size: int, key_file: str) -> None:
+@instrumented("aes.keygen")
+def _random_key_generator(key_size: int, key_file: str) -> str | None:
     if key_size not in (16, 24, 32):
         print(
             f"\n{yellow('>>')} "
@@ -49,53 +83,327 @@ def _random_key_generator(key_size: int, key_file: str) -> None:
 
     with open(BASE_DIR / key_filename, "w", encoding="utf-8") as f:
         f.write(base64.b64encode(key).decode())
+    KEY_CACHE.evict(BASE_DIR / key_filename)
 
     print(
         f"\n{yellow('>>')} "
         f"{success(f'Llave generada correctamente y guardada como {key_filename}')}"
     )
 
+    key_id = Path(key_filename).name.removesuffix(".key")
+    if store_key(key_id, "aes", key):
+        print(f"{yellow('>>')} {success(f'Llave agregada al llavero como {key_id}')}")
+    return key_filename
+
+
+@instrumented("aes.password_keygen")
+def _password_key_generator(
+        key_size: int,
+        key_file: str,
+        password: str,
+        kdf: str = "scrypt",
+        target: float = 0.25,
+    ) -> str | None:
+    """
+    Crea un archivo `{key_file}_{key_size}.kdf` con los parámetros para
+    derivar la llave de `password`; la llave no se guarda. El costo se
+    calibra para que derivarla tarde unos `target` segundos en esta
+    máquina. El archivo se usa igual que un `.key`: al cifrar o
+    descifrar se pide la contraseña.
+
+    :param key_size: Tamaño de la llave (16, 24 o 32 bytes).
+    :type key_size: int
+    :param key_file: Nombre del archivo sin extensión.
+    :type key_file: str
+    :param password: Contraseña.
+    :type password: str
+    :param kdf: `scrypt` o `pbkdf2`.
+    :type kdf: str
+    :param target: Tiempo objetivo de la derivación en segundos.
+    :type target: float
+    :return: Nombre del archivo o `None` si hubo un error.
+    :rtype: str | None
+    """
+    if key_size not in (16, 24, 32):
+        print(
+            f"\n{yellow('>>')} "
+            f"{error('ERROR')}: AES solo acepta llaves de 16, 24 o 32 bytes"
+        )
+        return None
+    if kdf not in KDFS:
+        print(f"\n{yellow('>>')} {error('ERROR')}: Función de derivación no válida")
+        return None
+    if not password:
+        print(f"\n{yellow('>>')} {error('ERROR')}: La contraseña no puede estar vacía")
+        return None
+
+    params = calibrate(kdf, target, key_size)
+    # La llave queda en caché para usarla enseguida sin volver a derivarla
+    params = params.with_check(password_key(password, params))
+    key_filename = f"{key_file}_{key_size}.kdf"
+
+    with open(BASE_DIR / key_filename, "w", encoding="utf-8") as f:
+        f.write(params.dumps())
+    KEY_CACHE.evict(BASE_DIR / key_filename)
+
+    cost = f"n={params.cost}" if kdf == "scrypt" else f"{params.cost} iteraciones"
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'Parámetros ({kdf}, {cost}) guardados como {key_filename}')}"
+    )
+    return key_filename
+
+
+class _CTREncryptor(CipherStream):
+    """Cifra con AES-CTR; la primera salida lleva la cabecera del nonce."""
+
+    def __init__(self, key: bytes) -> None:
+        self._cipher = AES.new(key, AES.MODE_CTR)
+        nonce = self._cipher.nonce
+        self._header = len(nonce).to_bytes(1, 'big') + nonce
+
+    def update(self, data: bytes) -> bytes:
+        out = self._header + self._cipher.encrypt(data)
+        self._header = b""
+        return out
+
+    def finalize(self) -> bytes:
+        out = self._header
+        self._header = b""
+        return out
+
+    def pipeline_transform(self) -> Callable[..., object]:
+        """
+        `encrypt` del AES-CTR del flujo, que acepta `output=`, para
+        cifrar con `ctr_pipeline` en los mismos buffers. La cabecera
+        del nonce se sigue obteniendo con `update` o `finalize`.
+        """
+        return self._cipher.encrypt
+
+
+class _CTRDecryptor(CipherStream):
+    """Lee la cabecera del nonce y descifra el resto con AES-CTR."""
+
+    def __init__(self, key: bytes) -> None:
+        self._key = key
+        self._cipher = None
+        self._header = b""
+
+    def update(self, data: bytes) -> bytes:
+        if self._cipher is not None:
+            return self._cipher.decrypt(data)
+
+        self._header += data
+        if not self._header or len(self._header) < 1 + self._header[0]:
+            return b""
+
+        nonce_len = self._header[0]
+        nonce, rest = self._header[1:1 + nonce_len], self._header[1 + nonce_len:]
+        self._cipher = AES.new(self._key, AES.MODE_CTR, nonce=nonce)
+        self._header = b""
+        return self._cipher.decrypt(rest)
+
+    def finalize(self) -> bytes:
+        if self._cipher is None:
+            raise ValueError("Falta la cabecera con el nonce")
+        return b""
+
+    def pipeline_transform(self) -> Callable[..., object]:
+        """
+        `decrypt` del AES-CTR del flujo para `ctr_pipeline`. Lanza
+        `ValueError` si todavía no se leyó la cabecera con el nonce.
+        """
+        if self._cipher is None:
+            raise ValueError("Falta la cabecera con el nonce")
+        return self._cipher.decrypt
+
+
+# A partir de este tamaño el cifrado de archivos usa `ctr_pipeline`; en
+# archivos más chicos el costo de los hilos no compensa
+PIPELINE_MIN_SIZE = 16 * 1024 * 1024
+
+
+class AESCipher(Cipher):
+    """
+    AES-CTR con nonce aleatorio, sin archivos ni impresiones. El texto
+    cifrado es la longitud del nonce (1 byte), el nonce y los datos
+    cifrados, el mismo formato que `_encrypt_file`.
+    """
+
+    name = "aes"
+
+    def __init__(self, key: bytes) -> None:
+        key = bytes(key)
+        if len(key) not in (16, 24, 32):
+            raise ValueError("AES solo acepta llaves de 16, 24 o 32 bytes")
+        self.key = key
+
+    def encryptor(self) -> CipherStream:
+        return _CTREncryptor(self.key)
+
+    def decryptor(self) -> CipherStream:
+        return _CTRDecryptor(self.key)
+
+
+def _copy_stream(
+        stream: CipherStream,
+        fin: BinaryIO,
+        fout: BinaryIO,
+        on_chunk: Callable[[int], object] | None,
+        chunk_size: int,
+    ) -> None:
+    """
+    Pasa `fin` por `stream` bloque por bloque y escribe en `fout`. La
+    salida de cada bloque se escribe por partes con `feed`, así que una
+    etapa de descompresión no la junta completa en memoria.
+    """
+    while chunk := fin.read(chunk_size):
+        for part in feed(stream, chunk):
+            fout.write(part)
+        if on_chunk is not None:
+            on_chunk(len(chunk))
+
+    fout.write(stream.finalize())
+
+
+def _encrypt_stream(
+        key: bytes,
+        fin: BinaryIO,
+        fout: BinaryIO,
+        on_chunk: Callable[[int], object] | None = None,
+        chunk_size: int | None = None,
+        compression: str | None = None,
+    ) -> None:
+    """
+    Cifra `fin` en `fout` con AES-CTR por bloques. La salida empieza
+    con la longitud del nonce (1 byte) y el nonce.
+
+    Con `compression` (`zlib` o `lzma`) los datos se comprimen antes de
+    cifrarse, con el nivel que elige `choose_level` sobre el inicio del
+    archivo, y la salida lleva antes la cabecera del codec. Si el
+    inicio casi no se comprime, se cifra sin comprimir.
+
+    :param key: Llave de AES.
+    :type key: bytes
+    :param fin: Archivo de entrada abierto en modo binario.
+    :type fin: BinaryIO
+    :param fout: Archivo de salida abierto en modo binario.
+    :type fout: BinaryIO
+    :param on_chunk: Función que recibe los bytes leídos de cada bloque.
+    :type on_chunk: Callable[[int], object] | None
+    :param chunk_size: Tamaño de bloque; por defecto se elige según el
+                       archivo con `adaptive_chunk_size`.
+    :type chunk_size: int | None
+    :param compression: Codec de compresión o `None` para no comprimir.
+    :type compression: str | None
+    """
+    stat = os.fstat(fin.fileno())
+    if chunk_size is None:
+        chunk_size = adaptive_chunk_size(stat)
+
+    encryptor = _CTREncryptor(key)
+
+    if compression is not None:
+        start = fin.tell()
+        level = choose_level(compression, fin.read(chunk_size))
+        fin.seek(start)
+
+        if level is not None:
+            fout.write(pack_header(compression, level))
+            stream = chain(Compressor(compression, level), encryptor)
+            _copy_stream(stream, fin, fout, on_chunk, chunk_size)
+            return
+
+    if stat.st_size >= PIPELINE_MIN_SIZE:
+        fout.write(encryptor.finalize())
+        ctr_pipeline(encryptor.pipeline_transform(), fin, fout, chunk_size, on_chunk)
+        return
+
+    _copy_stream(encryptor, fin, fout, on_chunk, chunk_size)
+
+
+def _decrypt_stream(
+        key: bytes,
+        fin: BinaryIO,
+        fout: BinaryIO,
+        on_chunk: Callable[[int], object] | None = None,
+        chunk_size: int | None = None,
+    ) -> None:
+    """
+    Descifra en `fout` un archivo producido por `_encrypt_stream`; si
+    tiene cabecera de compresión, descomprime al mismo tiempo. Lanza
+    `ValueError` si falta la cabecera con el nonce o si los datos
+    comprimidos están dañados.
+
+    :param key: Llave de AES.
+    :type key: bytes
+    :param fin: Archivo cifrado abierto en modo binario.
+    :type fin: BinaryIO
+    :param fout: Archivo de salida abierto en modo binario.
+    :type fout: BinaryIO
+    :param on_chunk: Función que recibe los bytes leídos de cada bloque.
+    :type on_chunk: Callable[[int], object] | None
+    :param chunk_size: Tamaño de bloque; por defecto se elige según el
+                       archivo con `adaptive_chunk_size`.
+    :type chunk_size: int | None
+    """
+    stat = os.fstat(fin.fileno())
+    if chunk_size is None:
+        chunk_size = adaptive_chunk_size(stat)
+
+    decryptor = _CTRDecryptor(key)
+
+    start = fin.tell()
+    compression = read_header(fin)
+    if compression is not None:
+        if on_chunk is not None:
+            on_chunk(fin.tell() - start)
+        stream = chain(decryptor, Decompressor(compression[0]))
+        _copy_stream(stream, fin, fout, on_chunk, chunk_size)
+        return
 
-def _rebuild_key(key_filename: str) -> bytes:
-    with open(BASE_DIR / key_filename, "r", encoding="utf-8") as f:
-        data = f.read()
+    if stat.st_size >= PIPELINE_MIN_SIZE:
+        header = fin.read(1)
+        header += fin.read(header[0]) if header else b""
+        decryptor.update(header)
+        transform = decryptor.pipeline_transform()
+        if on_chunk is not None:
+            on_chunk(len(header))
+        ctr_pipeline(transform, fin, fout, chunk_size, on_chunk)
+        return
 
-    return base64.b64decode(data)
+    _copy_stream(decryptor, fin, fout, on_chunk, chunk_size)
 
 
-@validate_file("key_filename")
-@validate_key(_is_valid_key, "key_filename")
+@instrumented("aes.encrypt_file", size_param="plaintext_filename")
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
 @validate_file("plaintext_filename")
 def _encrypt_file(
     key_filename: str,
     plaintext_filename: str,
     ciphertext_filename: str,
-) -> None:
-    key = _rebuild_key(key_filename)
+    compression: str | None = None,
+    ctx: ValidationContext | None = None,
+) -> str:
+    key = ctx.keys["key_filename"]
     suffix = Path(plaintext_filename).suffix
-    input_file = BASE_DIR / plaintext_filename
     cipher_filename = f"{ciphertext_filename}{suffix}.enc"
     output_file = BASE_DIR / cipher_filename
 
-    cipher = AES.new(key, AES.MODE_CTR)
-    file_size = input_file.stat().st_size 
+    fin = ctx.open(plaintext_filename)
+    file_size = ctx.size(plaintext_filename)
 
     start = time.perf_counter()
 
-    with open(input_file, "rb") as fin, open(output_file, "wb") as fout:
-        fout.write(len(cipher.nonce).to_bytes(1, 'big'))
-        fout.write(cipher.nonce)
+    with open(output_file, "wb") as fout:
         print()
 
-        with tqdm(
-            total=file_size,
-            unit="B",
-            unit_scale=True,
-            desc="Cifrando",
-        ) as pbar:
-            while chunk := fin.read(CHUNK_SIZE):
-                fout.write(cipher.encrypt(chunk))
-                pbar.update(len(chunk))
+        with make_progress(file_size, "Cifrando") as progress:
+            _encrypt_stream(
+                key, fin, fout, progress.update,
+                adaptive_chunk_size(ctx.stat(plaintext_filename)),
+                compression,
+            )
 
     elapsed = time.perf_counter() - start
     speed_mb = (file_size / (1024 * 1024)) / elapsed
@@ -106,39 +414,38 @@ def _encrypt_file(
     )
     print(f"{yellow('>>')} Tiempo de cifrado: {elapsed:.3f} segundos")
     print(f"{yellow('>>')} Velocidad promedio: {speed_mb:.2f} MB/s")
+    return cipher_filename
 
 
-@validate_file("key_filename")
-@validate_key(_is_valid_key, "key_filename")
+@instrumented("aes.decrypt_file", size_param="ciphertext_filename")
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
 @validate_file("ciphertext_filename")
 def _decrypt_file(
     key_filename: str,
     ciphertext_filename: str,
-) -> None:
-    key = _rebuild_key(key_filename)
-    input_file = BASE_DIR / ciphertext_filename
+    ctx: ValidationContext | None = None,
+) -> str | None:
+    key = ctx.keys["key_filename"]
     recover_filename = ciphertext_filename.removesuffix(".enc")
     output_file = BASE_DIR / recover_filename
 
     start = time.perf_counter()
-    file_size = input_file.stat().st_size
+    fin = ctx.open(ciphertext_filename)
+    file_size = ctx.size(ciphertext_filename)
 
-    with open(input_file, "rb") as fin, open(output_file, "wb") as fout:
-        nonce_len = int.from_bytes(fin.read(1), 'big')
-        nonce = fin.read(nonce_len)
-
-        decipher = AES.new(key, AES.MODE_CTR, nonce=nonce)
-        print()
+    try:
+        with open(output_file, "wb") as fout:
+            print()
 
-        with tqdm(
-            total=file_size,
-            unit="B",
-            unit_scale=True,
-            desc="Descifrado",
-        ) as pbar:
-            while chunk := fin.read(CHUNK_SIZE):
-                fout.write(decipher.decrypt(chunk))
-                pbar.update(len(chunk))
+            with make_progress(file_size, "Descifrado") as progress:
+                _decrypt_stream(
+                    key, fin, fout, progress.update,
+                    adaptive_chunk_size(ctx.stat(ciphertext_filename)),
+                )
+    except ValueError as e:
+        output_file.unlink(missing_ok=True)
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
 
     elapsed = time.perf_counter() - start
     speed_mb = (file_size / (1024 * 1024)) / elapsed
@@ -148,7 +455,8 @@ def _decrypt_file(
         f"{success(f'Archivo recuperado correctamente y guardado como {recover_filename}')}"
     )
     print(f"{yellow('>>')} Tiempo de descifrado: {elapsed:.3f} segundos")
-    print(f"{yellow('>>')} Velocidad promedio: {speed_mb:.2f} MB/s")    
+    print(f"{yellow('>>')} Velocidad promedio: {speed_mb:.2f} MB/s")
+    return recover_filename
 
 
 def aes_cipher_menu() -> None:
@@ -164,7 +472,12 @@ def aes_cipher_menu() -> None:
 1.- Crear una llave para AES
 2.- Cifrar un archivo
 3.- Descifrar un archivo
-4.- Salir
+4.- Cifrar un directorio completo
+5.- Cifrar un archivo con autenticación (GCM)
+6.- Descifrar un archivo con autenticación (GCM)
+7.- Verificar un archivo cifrado con GCM
+8.- Cambiar la llave o el formato de un archivo cifrado
+9.- Salir
 """)
         option = input("Opción: ")
         match option:
@@ -182,20 +495,117 @@ def aes_cipher_menu() -> None:
                 key_file = input(
                     "Escribe el nombre del archivo donde se almacenará la 'llave' (solo nombre): "
                 )
-                _random_key_generator(key_size, key_file)
+                from_password = input(
+                    "¿Derivar la llave de una contraseña? (s/n): "
+                ).strip().lower() == "s"
+
+                if not from_password:
+                    _random_key_generator(key_size, key_file)
+                    wait_key()
+                    continue
+
+                import getpass
+
+                kdf = input("Función de derivación (scrypt, pbkdf2 o Enter para scrypt): ").strip().lower() or "scrypt"
+                password = getpass.getpass("Contraseña: ")
+                if password != getpass.getpass("Repite la contraseña: "):
+                    print(f"\n{yellow('>>')} {error('ERROR')}: Las contraseñas no coinciden")
+                    wait_key()
+                    continue
+
+                print(f"\n{yellow('>>')} Calibrando el costo de la derivación...")
+                _password_key_generator(key_size, key_file, password, kdf)
                 wait_key()
             case "2":
-                key_filename = input("\nEscribe el nombre del archivo con la llave: ")
+                key_filename = input("\nEscribe el nombre del archivo con la llave (o ring:<id>): ")
                 infile = input("Escribe el nombre del archivo a cifrar: ")
                 outfile = input("Escribe el nombre del archivo cifrado (solo nombre): ")
-                _encrypt_file(key_filename, infile, outfile)
+                compression = input(
+                    "Compresión antes de cifrar (zlib, lzma o Enter para ninguna): "
+                ).strip().lower() or None
+                if compression not in (None, "zlib", "lzma"):
+                    print(f"\n{yellow('>>')} {error('ERROR')}: Compresión no válida")
+                    wait_key()
+                    continue
+
+                _encrypt_file(key_filename, infile, outfile, compression)
                 wait_key()
             case "3":
-                key_filename = input("\nEscribe el nombre del archivo con la llave: ")
+                key_filename = input("\nEscribe el nombre del archivo con la llave (o ring:<id>): ")
                 infile = input("Escribe el nombre del archivo cifrado: ")
                 _decrypt_file(key_filename, infile)
                 wait_key()
             case "4":
+                from .aes_tree import (
+                    encrypt_tree,
+                    sync_tree,
+                )
+
+                key_filename = input("\nEscribe el nombre del archivo con la llave (o ring:<id>): ")
+                source_dir = input("Escribe el nombre del directorio a cifrar: ")
+                target_dir = input("Escribe el nombre del directorio destino: ")
+                sync = input(
+                    "¿Cifrar solo archivos nuevos o modificados? (s/n): "
+                ).strip().lower() == "s"
+
+                if sync:
+                    sync_tree(key_filename, source_dir, target_dir)
+                else:
+                    encrypt_tree(key_filename, source_dir, target_dir)
+                wait_key()
+            case "5":
+                from .aes_gcm import _encrypt_file_gcm
+
+                key_filename = input("\nEscribe el nombre del archivo con la llave (o ring:<id>): ")
+                infile = input("Escribe el nombre del archivo a cifrar: ")
+                outfile = input("Escribe el nombre del archivo cifrado (solo nombre): ")
+                _encrypt_file_gcm(key_filename, infile, outfile)
+                wait_key()
+            case "6":
+                from .aes_gcm import _decrypt_file_gcm
+
+                key_filename = input("\nEscribe el nombre del archivo con la llave (o ring:<id>): ")
+                infile = input("Escribe el nombre del archivo cifrado: ")
+                _decrypt_file_gcm(key_filename, infile)
+                wait_key()
+            case "7":
+                from .aes_gcm import verify_file
+
+                key_filename = input("\nEscribe el nombre del archivo con la llave (o ring:<id>): ")
+                infile = input("Escribe el nombre del archivo cifrado: ")
+                verify_file(key_filename, infile)
+                wait_key()
+            case "8":
+                from .rekey import (
+                    FORMATS,
+                    _load_key,
+                    rekey_file,
+                )
+
+                infile = input("\nEscribe el nombre del archivo cifrado: ")
+                source = input("Formato actual (aes, aes2 o des): ").strip().lower()
+                target = input("Formato nuevo (aes, aes2, des o Enter para el mismo): ").strip().lower() or source
+                if source not in FORMATS or target not in FORMATS:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: Formato no válido")
+                    wait_key()
+                    continue
+
+                prompts = {
+                    "des": "la llave de DES en base 64 (o ring:<id>)",
+                    "aes": "el nombre del archivo con la llave (o ring:<id>)",
+                    "aes2": "el nombre del archivo con la llave (o ring:<id>)",
+                }
+                try:
+                    old_key = _load_key(source, input(f"Escribe {prompts[source]} actual: "))
+                    new_key = _load_key(target, input(f"Escribe {prompts[target]} nueva: "))
+                except (ValueError, OSError) as e:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+                    wait_key()
+                    continue
+
+                rekey_file(old_key, new_key, infile, None, source, target)
+                wait_key()
+            case "9":
                 break
             case _:
                 print(f"\n{yellow('>>')} {error('ERROR')}: Opción no válida")
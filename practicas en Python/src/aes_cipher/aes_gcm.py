@@ -0,0 +1,477 @@
+"""
+Cifrado autenticado con AES-GCM por segmentos.
+
+El archivo se divide en segmentos de `segment_size` bytes y cada uno
+se sella por separado con AES-GCM, con su propia etiqueta. Formato:
+
+    cabecera:  MAGIC (4) | versión (1) | segment_size (4) | prefijo (8)
+    segmento:  datos cifrados (<= segment_size) | etiqueta (16)
+
+El nonce de cada segmento es el prefijo aleatorio seguido del índice
+del segmento (4 bytes), así que los segmentos se pueden cifrar y
+verificar en paralelo y en cualquier orden. Los datos asociados son la
+cabecera más un byte que marca el último segmento: cambiar el orden,
+quitar o truncar segmentos hace fallar la verificación.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Iterator,
+)
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+from ciphers import (
+    Cipher,
+    CipherStream,
+)
+from config import BASE_DIR
+from decorators import (
+    ValidationContext,
+    instrumented,
+    validate_file,
+    validate_key_file,
+)
+from key_cache import KEY_CACHE
+from progress import make_progress
+from utils import (
+    error,
+    success,
+    yellow,
+)
+
+from .aes_cipher import _decode_key
+
+__all__ = [
+    "AESGCMCipher",
+    "IntegrityError",
+    "verify_file",
+]
+
+MAGIC = b"AESG"
+VERSION = 1
+SEGMENT_SIZE = 1024 * 1024
+TAG_SIZE = 16
+PREFIX_SIZE = 8
+HEADER_SIZE = len(MAGIC) + 1 + 4 + PREFIX_SIZE
+MAX_SEGMENTS = 2 ** 32  # El índice ocupa 4 bytes del nonce
+MAX_ERRORS_SHOWN = 10
+
+# (índice, datos, es el último)
+Segment = tuple[int, bytes, bool]
+
+
+class IntegrityError(ValueError):
+    """
+    Un segmento no pasó la verificación de su etiqueta.
+
+    :param segment: Índice del segmento corrupto.
+    :type segment: int
+    """
+
+    def __init__(self, segment: int) -> None:
+        super().__init__(f"El segmento {segment} fue modificado o está incompleto")
+        self.segment = segment
+
+
+def _pack_header(segment_size: int, prefix: bytes) -> bytes:
+    return MAGIC + bytes([VERSION]) + segment_size.to_bytes(4, "big") + prefix
+
+
+def _unpack_header(header: bytes) -> int:
+    """Devuelve `segment_size`; lanza `ValueError` si no es válida."""
+    if len(header) != HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        raise ValueError("No es un archivo cifrado con AES-GCM")
+    if header[len(MAGIC)] != VERSION:
+        raise ValueError(f"Versión de formato no soportada: {header[len(MAGIC)]}")
+
+    segment_size = int.from_bytes(header[len(MAGIC) + 1:len(MAGIC) + 5], "big")
+    if segment_size == 0:
+        raise ValueError("Tamaño de segmento no válido")
+    return segment_size
+
+
+def _segment_cipher(key: bytes, header: bytes, index: int, last: bool) -> Any:
+    if index >= MAX_SEGMENTS:
+        raise ValueError("Demasiados segmentos para un solo archivo")
+
+    nonce = header[-PREFIX_SIZE:] + index.to_bytes(4, "big")
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce, mac_len=TAG_SIZE)
+    cipher.update(header + (b"\x01" if last else b"\x00"))
+    return cipher
+
+
+def _seal(key: bytes, header: bytes, segment: Segment) -> bytes:
+    index, data, last = segment
+    ciphertext, tag = _segment_cipher(key, header, index, last).encrypt_and_digest(data)
+    return ciphertext + tag
+
+
+def _open(key: bytes, header: bytes, segment: Segment) -> bytes:
+    """Descifra y verifica un segmento; lanza `IntegrityError` si falla."""
+    index, data, last = segment
+    if len(data) < TAG_SIZE:
+        raise IntegrityError(index)
+
+    cipher = _segment_cipher(key, header, index, last)
+    try:
+        return cipher.decrypt_and_verify(data[:-TAG_SIZE], data[-TAG_SIZE:])
+    except ValueError:
+        raise IntegrityError(index) from None
+
+
+class _GCMEncryptor(CipherStream):
+    """
+    Sella segmentos completos conforme llegan. Siempre retiene uno
+    hasta `finalize`, porque el último segmento se marca distinto.
+    """
+
+    def __init__(self, key: bytes, segment_size: int) -> None:
+        self._key = key
+        self._segment_size = segment_size
+        self._header = _pack_header(segment_size, get_random_bytes(PREFIX_SIZE))
+        self._out = self._header
+        self._pending = b""
+        self._index = 0
+
+    def update(self, data: bytes) -> bytes:
+        self._pending += data
+        out = [self._out]
+        self._out = b""
+
+        size = self._segment_size
+        start = 0
+        while len(self._pending) - start > size:
+            segment = (self._index, self._pending[start:start + size], False)
+            out.append(_seal(self._key, self._header, segment))
+            start += size
+            self._index += 1
+
+        self._pending = self._pending[start:]
+        return b"".join(out)
+
+    def finalize(self) -> bytes:
+        last = _seal(self._key, self._header, (self._index, self._pending, True))
+        out = self._out + last
+        self._out = self._pending = b""
+        return out
+
+
+class _GCMDecryptor(CipherStream):
+    """Lee la cabecera y verifica cada segmento antes de devolverlo."""
+
+    def __init__(self, key: bytes) -> None:
+        self._key = key
+        self._header = None
+        self._stored = 0
+        self._pending = b""
+        self._index = 0
+
+    def update(self, data: bytes) -> bytes:
+        self._pending += data
+
+        if self._header is None:
+            if len(self._pending) < HEADER_SIZE:
+                return b""
+            self._header = self._pending[:HEADER_SIZE]
+            self._stored = _unpack_header(self._header) + TAG_SIZE
+            self._pending = self._pending[HEADER_SIZE:]
+
+        out = []
+        start = 0
+        while len(self._pending) - start > self._stored:
+            segment = (self._index, self._pending[start:start + self._stored], False)
+            out.append(_open(self._key, self._header, segment))
+            start += self._stored
+            self._index += 1
+
+        self._pending = self._pending[start:]
+        return b"".join(out)
+
+    def finalize(self) -> bytes:
+        if self._header is None:
+            raise ValueError("No es un archivo cifrado con AES-GCM")
+        return _open(self._key, self._header, (self._index, self._pending, True))
+
+
+class AESGCMCipher(Cipher):
+    """
+    AES-GCM por segmentos, sin archivos ni impresiones. El texto
+    cifrado tiene el mismo formato que `_encrypt_file_gcm` y cada
+    segmento se verifica antes de entregarse.
+    """
+
+    name = "aes-gcm"
+
+    def __init__(self, key: bytes, segment_size: int = SEGMENT_SIZE) -> None:
+        key = bytes(key)
+        if len(key) not in (16, 24, 32):
+            raise ValueError("AES solo acepta llaves de 16, 24 o 32 bytes")
+        if not 0 < segment_size < 2 ** 32:
+            raise ValueError("Tamaño de segmento no válido")
+        self.key = key
+        self.segment_size = segment_size
+
+    def encryptor(self) -> CipherStream:
+        return _GCMEncryptor(self.key, self.segment_size)
+
+    def decryptor(self) -> CipherStream:
+        return _GCMDecryptor(self.key)
+
+
+def _read_segments(fin: BinaryIO, size: int) -> Iterator[Segment]:
+    """
+    Lee `fin` en bloques de `size` bytes y los numera. Se lee un
+    bloque por adelantado para saber cuál es el último; un archivo
+    vacío produce un único segmento vacío.
+    """
+    index = 0
+    current = fin.read(size)
+    while True:
+        following = fin.read(size)
+        yield index, current, not following
+        if not following:
+            return
+        current = following
+        index += 1
+
+
+def _map_segments(
+        func: Callable[[bytes, bytes, Segment], bytes],
+        key: bytes,
+        header: bytes,
+        segments: Iterator[Segment],
+        fout: BinaryIO | None,
+        on_chunk: Callable[[int], object] | None,
+        workers: int,
+    ) -> None:
+    """
+    Aplica `func` a los segmentos con `workers` hilos (pycryptodome
+    libera el GIL) y escribe los resultados en orden. Se procesan
+    lotes de `2 * workers` segmentos para acotar la memoria; la primera
+    excepción, en orden de segmento, detiene el proceso.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while batch := list(islice(segments, 2 * workers)):
+            results = executor.map(lambda segment: func(key, header, segment), batch)
+            for segment, result in zip(batch, results):
+                if fout is not None:
+                    fout.write(result)
+                if on_chunk is not None:
+                    on_chunk(len(segment[1]))
+
+
+def _seal_stream(
+        key: bytes,
+        fin: BinaryIO,
+        fout: BinaryIO,
+        on_chunk: Callable[[int], object] | None = None,
+        segment_size: int = SEGMENT_SIZE,
+        workers: int = min(8, os.cpu_count() or 1),
+    ) -> None:
+    """
+    Cifra `fin` en `fout` en el formato por segmentos.
+
+    :param key: Llave de AES.
+    :type key: bytes
+    :param fin: Archivo de entrada abierto en modo binario.
+    :type fin: BinaryIO
+    :param fout: Archivo de salida abierto en modo binario.
+    :type fout: BinaryIO
+    :param on_chunk: Función que recibe los bytes leídos de cada segmento.
+    :type on_chunk: Callable[[int], object] | None
+    :param segment_size: Bytes de texto plano por segmento.
+    :type segment_size: int
+    :param workers: Hilos que sellan segmentos.
+    :type workers: int
+    """
+    header = _pack_header(segment_size, get_random_bytes(PREFIX_SIZE))
+    fout.write(header)
+    _map_segments(
+        _seal, key, header, _read_segments(fin, segment_size), fout, on_chunk, workers
+    )
+
+
+def _open_stream(
+        key: bytes,
+        fin: BinaryIO,
+        fout: BinaryIO | None,
+        on_chunk: Callable[[int], object] | None = None,
+        workers: int = min(8, os.cpu_count() or 1),
+    ) -> None:
+    """
+    Verifica y descifra `fin` en `fout` (o solo verifica si `fout` es
+    `None`). Lanza `IntegrityError` en el primer segmento que falle.
+
+    :param key: Llave de AES.
+    :type key: bytes
+    :param fin: Archivo cifrado abierto en modo binario.
+    :type fin: BinaryIO
+    :param fout: Archivo de salida, o `None` para solo verificar.
+    :type fout: BinaryIO | None
+    :param on_chunk: Función que recibe los bytes leídos de cada segmento.
+    :type on_chunk: Callable[[int], object] | None
+    :param workers: Hilos que verifican segmentos.
+    :type workers: int
+    """
+    header = fin.read(HEADER_SIZE)
+    segment_size = _unpack_header(header)
+    if on_chunk is not None:
+        on_chunk(len(header))
+    _map_segments(
+        _open, key, header, _read_segments(fin, segment_size + TAG_SIZE),
+        fout, on_chunk, workers,
+    )
+
+
+def _corrupt_segments(key: bytes, fin: BinaryIO, workers: int) -> list[int]:
+    """Índices de todos los segmentos que no pasan la verificación."""
+    header = fin.read(HEADER_SIZE)
+    segments = _read_segments(fin, _unpack_header(header) + TAG_SIZE)
+
+    def _check(segment: Segment) -> int | None:
+        try:
+            _open(key, header, segment)
+        except IntegrityError:
+            return segment[0]
+        return None
+
+    corrupt = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while batch := list(islice(segments, 2 * workers)):
+            corrupt.extend(i for i in executor.map(_check, batch) if i is not None)
+    return corrupt
+
+
+@instrumented("aes.verify_file", size_param="ciphertext_filename")
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
+@validate_file("ciphertext_filename")
+def verify_file(
+        key_filename: str,
+        ciphertext_filename: str,
+        workers: int = min(8, os.cpu_count() or 1),
+        ctx: ValidationContext | None = None,
+    ) -> list[int] | None:
+    """
+    Verifica todos los segmentos de un archivo cifrado con AES-GCM sin
+    escribir nada, y reporta los que están corruptos. A diferencia del
+    descifrado no se detiene en el primer error.
+
+    :param key_filename: Archivo con la llave en base 64.
+    :type key_filename: str
+    :param ciphertext_filename: Archivo cifrado (`.gcm`).
+    :type ciphertext_filename: str
+    :param workers: Hilos que verifican segmentos.
+    :type workers: int
+    :param ctx: Contexto de validación con la llave ya decodificada.
+    :type ctx: ValidationContext | None
+    :return: Índices de los segmentos corruptos (vacía si el archivo
+             está íntegro) o `None` si no tiene el formato esperado.
+    :rtype: list[int] | None
+    """
+    key = ctx.keys["key_filename"]
+
+    try:
+        corrupt = _corrupt_segments(key, ctx.open(ciphertext_filename), workers)
+    except ValueError as e:
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
+
+    if corrupt:
+        shown = ", ".join(str(i) for i in corrupt[:MAX_ERRORS_SHOWN])
+        more = f" y {len(corrupt) - MAX_ERRORS_SHOWN} más" if len(corrupt) > MAX_ERRORS_SHOWN else ""
+        print(
+            f"\n{yellow('>>')} {error('ERROR')}: "
+            f"{len(corrupt)} segmentos corruptos: {shown}{more}"
+        )
+    else:
+        print(f"\n{yellow('>>')} {success('Todos los segmentos son auténticos')}")
+    return corrupt
+
+
+@instrumented("aes.encrypt_file_gcm", size_param="plaintext_filename")
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
+@validate_file("plaintext_filename")
+def _encrypt_file_gcm(
+    key_filename: str,
+    plaintext_filename: str,
+    ciphertext_filename: str,
+    ctx: ValidationContext | None = None,
+) -> str:
+    key = ctx.keys["key_filename"]
+    suffix = Path(plaintext_filename).suffix
+    cipher_filename = f"{ciphertext_filename}{suffix}.gcm"
+
+    fin = ctx.open(plaintext_filename)
+    file_size = ctx.size(plaintext_filename)
+
+    start = time.perf_counter()
+
+    with open(BASE_DIR / cipher_filename, "wb") as fout:
+        print()
+
+        with make_progress(file_size, "Cifrando") as progress:
+            _seal_stream(key, fin, fout, progress.update)
+
+    elapsed = time.perf_counter() - start
+    speed_mb = (file_size / (1024 * 1024)) / elapsed
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'Archivo cifrado correctamente y guardado como {cipher_filename}')}"
+    )
+    print(f"{yellow('>>')} Tiempo de cifrado: {elapsed:.3f} segundos")
+    print(f"{yellow('>>')} Velocidad promedio: {speed_mb:.2f} MB/s")
+    return cipher_filename
+
+
+@instrumented("aes.decrypt_file_gcm", size_param="ciphertext_filename")
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
+@validate_file("ciphertext_filename")
+def _decrypt_file_gcm(
+    key_filename: str,
+    ciphertext_filename: str,
+    ctx: ValidationContext | None = None,
+) -> str | None:
+    key = ctx.keys["key_filename"]
+    recover_filename = ciphertext_filename.removesuffix(".gcm")
+    output_file = BASE_DIR / recover_filename
+    # Los datos sin verificar van a un temporal: si un segmento no se
+    # autentica no se toca un archivo que ya existía con ese nombre
+    tmp_file = output_file.with_name(f".{output_file.name}.tmp")
+
+    start = time.perf_counter()
+    fin = ctx.open(ciphertext_filename)
+    file_size = ctx.size(ciphertext_filename)
+
+    try:
+        with open(tmp_file, "wb") as fout:
+            print()
+
+            with make_progress(file_size, "Descifrado") as progress:
+                _open_stream(key, fin, fout, progress.update)
+
+        os.replace(tmp_file, output_file)
+    except (ValueError, OSError) as e:
+        tmp_file.unlink(missing_ok=True)
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
+
+    elapsed = time.perf_counter() - start
+    speed_mb = (file_size / (1024 * 1024)) / elapsed
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'Archivo verificado y recuperado como {recover_filename}')}"
+    )
+    print(f"{yellow('>>')} Tiempo de descifrado: {elapsed:.3f} segundos")
+    print(f"{yellow('>>')} Velocidad promedio: {speed_mb:.2f} MB/s")
+    return recover_filename
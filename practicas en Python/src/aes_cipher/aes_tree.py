@@ -0,0 +1,468 @@
+"""
+Cifrado con AES de un directorio completo en un árbol espejo.
+
+`encrypt_tree` cifra todo cada vez. `sync_tree` guarda en el destino un
+índice con el tamaño, la fecha de modificación y un HMAC-SHA256 de cada
+archivo cifrado, y en las siguientes ejecuciones solo cifra los
+archivos nuevos o modificados. El índice queda junto a los cifrados, así
+que no guarda un SHA-256 simple (con él se podría confirmar si un
+archivo es uno conocido): el HMAC usa una llave derivada de la de AES.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import time
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    as_completed,
+)
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+)
+
+from config import BASE_DIR
+from decorators import (
+    ValidationContext,
+    validate_key_file,
+)
+from key_cache import KEY_CACHE
+from progress import make_progress
+from utils import (
+    error,
+    success,
+    yellow,
+)
+
+from .aes_cipher import (
+    _decode_key,
+    _encrypt_stream,
+)
+
+__all__ = [
+    "encrypt_tree",
+    "sync_tree",
+]
+
+SMALL_FILE_SIZE = 256 * 1024  # Archivos menores se agrupan en lotes
+BATCH_BYTES = 8 * 1024 * 1024  # Bytes máximos por lote de archivos pequeños
+BATCH_FILES = 256  # Archivos máximos por lote
+MAX_ERRORS_SHOWN = 10
+
+INDEX_FILENAME = ".aes_tree_index.json"
+INDEX_VERSION = 2
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# (archivo de entrada, archivo de salida, tamaño, fecha de modificación en ns)
+Entry = tuple[Path, Path, int, int]
+
+
+def _walk(source: Path, target: Path) -> tuple[list[Entry], set[Path]]:
+    """
+    Recorre `source` con `os.scandir` y devuelve los archivos a cifrar
+    junto con los directorios que hay que crear en `target`. No sigue
+    enlaces simbólicos a directorios y omite `target` si está dentro
+    de `source`.
+    """
+    entries: list[Entry] = []
+    dirs: set[Path] = {target}
+    pending = [source]
+    target_resolved = target.resolve()
+
+    while pending:
+        current = pending.pop()
+        out_dir = target / current.relative_to(source)
+
+        with os.scandir(current) as it:
+            for entry in it:
+                path = Path(entry.path)
+                if entry.is_dir(follow_symlinks=False):
+                    if path.resolve() != target_resolved:
+                        pending.append(path)
+                        dirs.add(out_dir / entry.name)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    entries.append((
+                        path,
+                        out_dir / f"{entry.name}.enc",
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                    ))
+
+    return entries, dirs
+
+
+def _batches(entries: list[Entry]) -> list[list[Entry]]:
+    """
+    Agrupa los archivos en lotes: cada archivo grande va solo y los
+    pequeños se juntan hasta `BATCH_BYTES` o `BATCH_FILES`, para no
+    pagar el costo de una tarea por archivo.
+    """
+    batches: list[list[Entry]] = []
+    batch: list[Entry] = []
+    batch_bytes = 0
+
+    for entry in entries:
+        size = entry[2]
+        if size >= SMALL_FILE_SIZE:
+            batches.append([entry])
+            continue
+
+        batch.append(entry)
+        batch_bytes += size
+        if batch_bytes >= BATCH_BYTES or len(batch) >= BATCH_FILES:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def _check_dirs(source_dir: str, target_dir: str) -> tuple[Path, Path] | None:
+    """Rutas de origen y destino, o `None` (con el error impreso)."""
+    source = BASE_DIR / source_dir
+    target = BASE_DIR / target_dir
+
+    if not source.is_dir():
+        print(
+            f"\n{yellow('>>')} {error('ERROR')}"
+            f": El directorio '{source_dir}' no existe"
+        )
+        return None
+
+    # Un destino dentro del origen sí se permite; `_walk` lo omite
+    if source.resolve() == target.resolve():
+        print(
+            f"\n{yellow('>>')} {error('ERROR')}"
+            ": El directorio destino debe ser distinto al de origen"
+        )
+        return None
+
+    return source, target
+
+
+def _process(
+        entries: list[Entry],
+        func: Callable[[Entry, Callable[[int], object]], Any],
+        workers: int,
+        desc: str,
+    ) -> tuple[list[tuple[Entry, Any]], list[tuple[Path, str]]]:
+    """
+    Aplica `func(entrada, progreso)` a cada archivo, por lotes en un
+    grupo de hilos y con una sola barra de progreso. Devuelve los
+    resultados y los archivos que fallaron con `OSError`.
+    """
+    total_bytes = sum(entry[2] for entry in entries)
+    results: list[tuple[Entry, Any]] = []
+    failed: list[tuple[Path, str]] = []
+
+    print()
+    with make_progress(total_bytes, desc) as progress:
+        def _run_batch(batch: list[Entry]) -> tuple[list, list]:
+            done, errors = [], []
+            for entry in batch:
+                try:
+                    done.append((entry, func(entry, progress.update)))
+                except OSError as e:
+                    errors.append((entry[0], e.strerror or str(e)))
+            return done, errors
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(_run_batch, batch) for batch in _batches(entries)]
+            for future in as_completed(futures):
+                done, errors = future.result()
+                results.extend(done)
+                failed.extend(errors)
+
+    return results, failed
+
+
+def _print_errors(source: Path, failed: list[tuple[Path, str]]) -> None:
+    for src, reason in failed[:MAX_ERRORS_SHOWN]:
+        print(f"{yellow('>>')} {error('ERROR')}: {src.relative_to(source)}: {reason}")
+    if len(failed) > MAX_ERRORS_SHOWN:
+        print(f"{yellow('>>')} ... y {len(failed) - MAX_ERRORS_SHOWN} errores más")
+
+
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
+def encrypt_tree(
+    key_filename: str,
+    source_dir: str,
+    target_dir: str,
+    workers: int = min(8, os.cpu_count() or 1),
+    ctx: ValidationContext | None = None,
+) -> tuple[int, int] | None:
+    """
+    Cifra con AES-CTR todos los archivos de `source_dir` (de forma
+    recursiva) en `target_dir`, conservando la estructura de carpetas
+    y agregando `.enc` a cada archivo. El formato es el mismo que el
+    de `_encrypt_file`, así que cada archivo se descifra por separado.
+
+    Los lotes se reparten en un grupo de hilos; pycryptodome libera el
+    GIL al cifrar, por lo que la lectura, el cifrado y la escritura de
+    distintos archivos se traslapan. Se muestra una sola barra de
+    progreso con el total de bytes (ninguna en modo por lotes).
+
+    :param key_filename: Archivo con la llave en base 64.
+    :type key_filename: str
+    :param source_dir: Directorio a cifrar.
+    :type source_dir: str
+    :param target_dir: Directorio donde se crea el árbol cifrado.
+    :type target_dir: str
+    :param workers: Número de hilos.
+    :type workers: int
+    :return: Número de archivos cifrados y número de archivos con
+             error, o `None` si el directorio no es válido.
+    :rtype: tuple[int, int] | None
+    """
+    key = ctx.keys["key_filename"]
+    dirs_ok = _check_dirs(source_dir, target_dir)
+    if dirs_ok is None:
+        return None
+    source, target = dirs_ok
+
+    entries, dirs = _walk(source, target)
+    for directory in sorted(dirs):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def _encrypt(entry: Entry, on_chunk: Callable[[int], object]) -> None:
+        src, dst, _, _ = entry
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            _encrypt_stream(key, fin, fout, on_chunk)
+
+    total_bytes = sum(entry[2] for entry in entries)
+    start = time.perf_counter()
+    _, failed = _process(entries, _encrypt, workers, f"Cifrando {len(entries)} archivos")
+
+    elapsed = time.perf_counter() - start
+    speed_mb = (total_bytes / (1024 * 1024)) / elapsed if elapsed else 0.0
+    encrypted = len(entries) - len(failed)
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'{encrypted} archivos cifrados en {target_dir}')}"
+    )
+    print(f"{yellow('>>')} Tiempo de cifrado: {elapsed:.3f} segundos")
+    print(f"{yellow('>>')} Velocidad promedio: {speed_mb:.2f} MB/s")
+    _print_errors(source, failed)
+
+    return encrypted, len(failed)
+
+
+# ---------- Sincronización incremental ----------
+
+class _HashingReader:
+    """
+    Envuelve un archivo y calcula el HMAC de lo que se lee, para
+    obtener el hash en la misma pasada del cifrado (también con
+    `readinto`, que usa `ctr_pipeline`).
+    """
+
+    def __init__(self, raw: BinaryIO, mac_key: bytes) -> None:
+        self._raw = raw
+        self.digest = hmac.new(mac_key, digestmod=hashlib.sha256)
+
+    def fileno(self) -> int:
+        return self._raw.fileno()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self.digest.update(data)
+        return data
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        n = self._raw.readinto(buffer)
+        self.digest.update(memoryview(buffer)[:n])
+        return n
+
+
+def _file_hash(path: Path, mac_key: bytes, on_chunk: Callable[[int], object]) -> str:
+    digest = hmac.new(mac_key, digestmod=hashlib.sha256)
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_BLOCK_SIZE):
+            digest.update(chunk)
+            on_chunk(len(chunk))
+    return digest.hexdigest()
+
+
+def _key_id(key: bytes) -> str:
+    """Identificador de la llave para el índice (no permite recuperarla)."""
+    return hashlib.sha256(b"aes_tree_index" + key).hexdigest()[:16]
+
+
+def _mac_key(key: bytes) -> bytes:
+    """Llave del HMAC de los archivos, derivada de la llave de AES."""
+    return hmac.new(key, b"aes_tree_index", hashlib.sha256).digest()
+
+
+def _load_index(path: Path, key_id: str) -> dict[str, dict[str, Any]]:
+    """
+    Registros del índice por ruta relativa. Si no existe, está dañado
+    o es de otra llave, se empieza con un índice vacío.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != INDEX_VERSION
+        or data.get("key") != key_id
+    ):
+        return {}
+    return data.get("files", {})
+
+
+def _store_index(path: Path, key_id: str, files: dict[str, dict[str, Any]]) -> None:
+    """Escribe el índice en un archivo temporal y lo reemplaza de una vez."""
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": INDEX_VERSION, "key": key_id, "files": files},
+            f, indent=1, sort_keys=True,
+        )
+    os.replace(tmp, path)
+
+
+def _index_target(target: Path, ciphertext: Any) -> Path | None:
+    """
+    Ruta del cifrado de un registro del índice, o `None` si no es una
+    ruta dentro de `target`: el índice es un archivo editable y no debe
+    servir para borrar nada fuera del árbol cifrado.
+    """
+    if not isinstance(ciphertext, str):
+        return None
+
+    root = target.resolve()
+    path = (root / ciphertext).resolve()
+    if path == root or not path.is_relative_to(root):
+        return None
+    return path
+
+
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
+def sync_tree(
+    key_filename: str,
+    source_dir: str,
+    target_dir: str,
+    workers: int = min(8, os.cpu_count() or 1),
+    ctx: ValidationContext | None = None,
+) -> tuple[int, int] | None:
+    """
+    Como `encrypt_tree`, pero solo cifra los archivos nuevos o
+    modificados desde la última sincronización.
+
+    El índice (`.aes_tree_index.json` en `target_dir`) guarda por cada
+    archivo su tamaño, fecha de modificación, HMAC-SHA256 y archivo
+    cifrado. Si el tamaño y la fecha coinciden y el cifrado existe, el
+    archivo no se lee. Si solo cambió la fecha, se compara el hash y se
+    vuelve a cifrar únicamente si el contenido cambió. Los cifrados de
+    archivos borrados del origen se eliminan. Con otra llave el índice
+    no sirve y se cifra todo de nuevo.
+
+    :param key_filename: Archivo con la llave en base 64.
+    :type key_filename: str
+    :param source_dir: Directorio a cifrar.
+    :type source_dir: str
+    :param target_dir: Directorio donde se mantiene el árbol cifrado.
+    :type target_dir: str
+    :param workers: Número de hilos.
+    :type workers: int
+    :return: Número de archivos cifrados y número de archivos con
+             error, o `None` si el directorio no es válido.
+    :rtype: tuple[int, int] | None
+    """
+    key = ctx.keys["key_filename"]
+    dirs_ok = _check_dirs(source_dir, target_dir)
+    if dirs_ok is None:
+        return None
+    source, target = dirs_ok
+
+    start = time.perf_counter()
+    entries, dirs = _walk(source, target)
+    for directory in sorted(dirs):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    key_id = _key_id(key)
+    mac_key = _mac_key(key)
+    index_path = target / INDEX_FILENAME
+    old_index = _load_index(index_path, key_id)
+    new_index: dict[str, dict[str, Any]] = {}
+    pending: list[Entry] = []
+
+    for entry in entries:
+        src, dst, size, mtime = entry
+        rel = src.relative_to(source).as_posix()
+        record = old_index.get(rel)
+
+        if (
+            record is not None
+            and record["size"] == size
+            and record["mtime_ns"] == mtime
+            and dst.exists()
+        ):
+            new_index[rel] = record
+        else:
+            pending.append(entry)
+
+    def _sync(entry: Entry, on_chunk: Callable[[int], object]) -> tuple[str, bool]:
+        src, dst, size, _ = entry
+        record = old_index.get(src.relative_to(source).as_posix())
+
+        # Misma longitud y otra fecha: el hash decide si cambió
+        if record is not None and record["size"] == size and dst.exists():
+            digest = _file_hash(src, mac_key, on_chunk)
+            if hmac.compare_digest(digest, record["hmac"]):
+                return digest, False
+
+        with open(src, "rb") as raw, open(dst, "wb") as fout:
+            fin = _HashingReader(raw, mac_key)
+            _encrypt_stream(key, fin, fout, on_chunk)
+        return fin.digest.hexdigest(), True
+
+    results, failed = _process(
+        pending, _sync, workers, f"Sincronizando {len(pending)} archivos"
+    )
+
+    encrypted = 0
+    for (src, dst, size, mtime), (digest, changed) in results:
+        new_index[src.relative_to(source).as_posix()] = {
+            "size": size,
+            "mtime_ns": mtime,
+            "hmac": digest,
+            "ciphertext": dst.relative_to(target).as_posix(),
+        }
+        encrypted += changed
+
+    # Los archivos que ya no están en el origen se quitan del destino
+    removed = 0
+    for rel, record in old_index.items():
+        if rel in new_index or (source / rel).exists():
+            continue
+
+        path = _index_target(target, record.get("ciphertext"))
+        if path is not None:
+            path.unlink(missing_ok=True)
+            removed += 1
+
+    _store_index(index_path, key_id, new_index)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'{encrypted} archivos cifrados en {target_dir}')}"
+    )
+    print(f"{yellow('>>')} Sin cambios: {len(entries) - encrypted - len(failed)}")
+    print(f"{yellow('>>')} Eliminados: {removed}")
+    print(f"{yellow('>>')} Tiempo de sincronización: {elapsed:.3f} segundos")
+    _print_errors(source, failed)
+
+    return encrypted, len(failed)
@@ -0,0 +1,141 @@
+"""Cifrado por etapas (lectura, cifrado y escritura) en hilos separados."""
+
+import queue
+import threading
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+)
+
+__all__ = ["ctr_pipeline"]
+
+DEFAULT_DEPTH = 4  # Buffers en circulación entre las tres etapas
+
+_DONE = None  # Marca de fin en las colas
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Encola `item` esperando lugar; devuelve False si se pidió parar."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    """Desencola un elemento; devuelve `_DONE` si se pidió parar."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def ctr_pipeline(
+        transform: Callable[..., object],
+        fin: BinaryIO,
+        fout: BinaryIO,
+        chunk_size: int,
+        on_chunk: Callable[[int], object] | None = None,
+        depth: int = DEFAULT_DEPTH,
+    ) -> None:
+    """
+    Aplica `transform` (el `encrypt` o `decrypt` de un objeto AES-CTR
+    de pycryptodome) a todo `fin` y escribe el resultado en `fout`.
+
+    Un hilo lee con `readinto` en `depth` buffers reutilizables, otro
+    cifra cada buffer en su lugar (pycryptodome libera el GIL) y el
+    hilo que llama escribe. Las colas están acotadas por el número de
+    buffers, así que la etapa más rápida espera a la más lenta y la
+    memoria usada es `depth * chunk_size`. El tiempo total tiende a
+    `max(E/S, cifrado)` en lugar de su suma.
+
+    Si una etapa falla, las demás se detienen y la excepción se
+    relanza en el hilo que llamó.
+
+    :param transform: Método que acepta `output=` para operar en el
+                      mismo buffer, como `cipher.encrypt`.
+    :type transform: Callable[..., object]
+    :param fin: Archivo de entrada, abierto en modo binario.
+    :type fin: BinaryIO
+    :param fout: Archivo de salida, abierto en modo binario.
+    :type fout: BinaryIO
+    :param chunk_size: Tamaño de cada buffer.
+    :type chunk_size: int
+    :param on_chunk: Función que recibe los bytes escritos de cada bloque.
+    :type on_chunk: Callable[[int], object] | None
+    :param depth: Número de buffers.
+    :type depth: int
+    """
+    free: queue.Queue = queue.Queue()
+    to_encrypt: queue.Queue = queue.Queue(maxsize=depth)
+    to_write: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    for _ in range(depth):
+        free.put(bytearray(chunk_size))
+
+    def _reader() -> None:
+        try:
+            while True:
+                buf = _get(free, stop)
+                if buf is _DONE:
+                    return
+                n = fin.readinto(buf)
+                if not n:
+                    break
+                if not _put(to_encrypt, (buf, n), stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        _put(to_encrypt, _DONE, stop)
+
+    def _encryptor() -> None:
+        try:
+            while True:
+                item = _get(to_encrypt, stop)
+                if item is _DONE:
+                    break
+                buf, n = item
+                view = memoryview(buf)[:n]
+                transform(view, output=view)
+                if not _put(to_write, item, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        _put(to_write, _DONE, stop)
+
+    threads = [
+        threading.Thread(target=_reader, name="aes-reader", daemon=True),
+        threading.Thread(target=_encryptor, name="aes-encryptor", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = _get(to_write, stop)
+            if item is _DONE:
+                break
+            buf, n = item
+            fout.write(memoryview(buf)[:n])
+            if on_chunk is not None:
+                on_chunk(n)
+            free.put(buf)
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
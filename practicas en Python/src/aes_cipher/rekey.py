@@ -0,0 +1,302 @@
+"""
+Cambio de llave y de formato de archivos cifrados en una sola pasada.
+
+Cambiar la llave de un `.enc` o convertirlo a otro formato no necesita
+descifrarlo a disco: el archivo se lee una vez y cada bloque se
+descifra con la llave anterior y se cifra con la nueva en memoria.
+
+Formatos:
+- `aes`: binario de `_encrypt_file` (longitud del nonce, nonce y datos).
+- `aes2`: nonce en base 64, salto de línea y datos en base 64.
+- `des`: `base64(IV + ciphertext)` de DES-CBC.
+
+De `aes` a `aes` basta con cambiar el flujo de llave de CTR: cada
+buffer se descifra y se cifra en su lugar, y con archivos grandes se
+usa `ctr_pipeline`. La cabecera de compresión de `aes` y `des` se
+conserva si el formato destino la admite; a `aes2` se descomprime.
+
+CTR no autentica, así que con una llave anterior equivocada el
+resultado es basura sin aviso (DES sí suele fallar por el relleno).
+"""
+
+import base64
+import os
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+)
+
+from Crypto.Cipher import AES
+
+from ciphers import (
+    CipherStream,
+    Decompressor,
+    chain,
+    feed,
+    get_cipher,
+    pack_header,
+    read_header,
+)
+from config import BASE_DIR
+from decorators import (
+    ValidationContext,
+    instrumented,
+    validate_file,
+)
+from key_ring import (
+    is_reference,
+    load_key,
+)
+from progress import (
+    adaptive_chunk_size,
+    make_progress,
+)
+from utils import (
+    error,
+    success,
+    yellow,
+)
+
+from .aes_cipher import (
+    PIPELINE_MIN_SIZE,
+    _CTREncryptor,
+    _decode_key,
+)
+from .pipeline import ctr_pipeline
+
+__all__ = [
+    "FORMATS",
+    "rekey_stream",
+    "rekey_file",
+]
+
+# Formato -> extensión de los archivos que produce
+FORMATS: dict[str, str] = {
+    "aes": ".enc",
+    "aes2": ".txt",
+    "des": ".cif",
+}
+
+# Formatos que pueden llevar la cabecera de compresión
+_COMPRESSIBLE = ("aes", "des")
+
+
+def _check_format(name: str) -> None:
+    if name not in FORMATS:
+        raise ValueError(f"Formato desconocido: {name}")
+
+
+def _rekey_ctr(
+        old_key: bytes,
+        new_key: bytes,
+        fin: BinaryIO,
+        fout: BinaryIO,
+        on_chunk: Callable[[int], object] | None,
+        chunk_size: int,
+        size: int,
+    ) -> None:
+    """
+    `aes` a `aes`: lee el nonce anterior, escribe el nuevo y cambia el
+    flujo de llave de cada buffer en su lugar.
+    """
+    header = fin.read(1)
+    header += fin.read(header[0]) if header else b""
+    if len(header) < 2 or len(header) != 1 + header[0]:
+        raise ValueError("Falta la cabecera con el nonce")
+    if on_chunk is not None:
+        on_chunk(len(header))
+
+    old = AES.new(old_key, AES.MODE_CTR, nonce=header[1:])
+    encryptor = _CTREncryptor(new_key)
+    new = encryptor.pipeline_transform()
+    fout.write(encryptor.finalize())
+
+    def _swap(data: bytearray | memoryview, output: bytearray | memoryview) -> None:
+        old.decrypt(data, output=output)
+        new(output, output=output)
+
+    if size >= PIPELINE_MIN_SIZE:
+        ctr_pipeline(_swap, fin, fout, chunk_size, on_chunk)
+        return
+
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    while n := fin.readinto(buffer):
+        _swap(view[:n], view[:n])
+        fout.write(view[:n])
+        if on_chunk is not None:
+            on_chunk(n)
+
+
+def rekey_stream(
+        old_key: bytes,
+        new_key: bytes,
+        fin: BinaryIO,
+        fout: BinaryIO,
+        source_format: str = "aes",
+        target_format: str | None = None,
+        on_chunk: Callable[[int], object] | None = None,
+        chunk_size: int | None = None,
+    ) -> None:
+    """
+    Pasa `fin` (cifrado con `old_key` en `source_format`) a `fout`
+    cifrado con `new_key` en `target_format` (por defecto el mismo
+    formato), sin escribir el texto plano en ningún lado. Lanza
+    `ValueError` si una llave o el archivo no son válidos.
+
+    :param old_key: Llave actual.
+    :type old_key: bytes
+    :param new_key: Llave nueva.
+    :type new_key: bytes
+    :param fin: Archivo cifrado abierto en modo binario.
+    :type fin: BinaryIO
+    :param fout: Archivo de salida abierto en modo binario.
+    :type fout: BinaryIO
+    :param source_format: `aes`, `aes2` o `des`.
+    :type source_format: str
+    :param target_format: Formato de salida; `None` para el mismo.
+    :type target_format: str | None
+    :param on_chunk: Función que recibe los bytes leídos de cada bloque.
+    :type on_chunk: Callable[[int], object] | None
+    :param chunk_size: Tamaño de bloque; por defecto según el archivo.
+    :type chunk_size: int | None
+    """
+    target_format = target_format or source_format
+    _check_format(source_format)
+    _check_format(target_format)
+
+    stat = os.fstat(fin.fileno())
+    if chunk_size is None:
+        chunk_size = adaptive_chunk_size(stat)
+
+    # Se crean antes de escribir nada para validar las dos llaves
+    decryptor: CipherStream = get_cipher(source_format, old_key).decryptor()
+    encryptor: CipherStream = get_cipher(target_format, new_key).encryptor()
+
+    start = fin.tell()
+    compression = read_header(fin) if source_format in _COMPRESSIBLE else None
+    if on_chunk is not None:
+        on_chunk(fin.tell() - start)
+
+    if compression is not None:
+        if target_format in _COMPRESSIBLE:
+            # Los datos siguen comprimidos; solo cambia el cifrado
+            fout.write(pack_header(*compression))
+        else:
+            decryptor = chain(decryptor, Decompressor(compression[0]))
+
+    if source_format == target_format == "aes":
+        _rekey_ctr(
+            bytes(old_key), bytes(new_key), fin, fout, on_chunk,
+            chunk_size, stat.st_size,
+        )
+        return
+
+    stream = chain(decryptor, encryptor)
+    while chunk := fin.read(chunk_size):
+        for part in feed(stream, chunk):
+            fout.write(part)
+        if on_chunk is not None:
+            on_chunk(len(chunk))
+
+    fout.write(stream.finalize())
+
+
+def _output_name(ciphertext_file: str, source_format: str, target_format: str) -> str:
+    """
+    Con el mismo formato, el mismo archivo; si no, el mismo nombre con
+    la extensión del formato destino.
+    """
+    if source_format == target_format:
+        return ciphertext_file
+
+    source_suffix = FORMATS[source_format]
+    base = ciphertext_file.removesuffix(source_suffix)
+    return f"{base}{FORMATS[target_format]}"
+
+
+@instrumented("aes.rekey_file", size_param="ciphertext_file")
+@validate_file("ciphertext_file")
+def rekey_file(
+        old_key: bytes,
+        new_key: bytes,
+        ciphertext_file: str,
+        output_file: str | None = None,
+        source_format: str = "aes",
+        target_format: str | None = None,
+        ctx: ValidationContext | None = None,
+    ) -> str | None:
+    """
+    Cambia la llave (y opcionalmente el formato) de un archivo cifrado
+    en una pasada. Sin `output_file`, con el mismo formato el archivo
+    se reemplaza al terminar; con otro formato se cambia la extensión.
+    La salida se escribe en un temporal junto al destino, así que un
+    error no deja archivos a medias.
+
+    :param old_key: Llave actual.
+    :type old_key: bytes
+    :param new_key: Llave nueva.
+    :type new_key: bytes
+    :param ciphertext_file: Archivo cifrado.
+    :type ciphertext_file: str
+    :param output_file: Archivo de salida.
+    :type output_file: str | None
+    :param source_format: `aes`, `aes2` o `des`.
+    :type source_format: str
+    :param target_format: Formato de salida; `None` para el mismo.
+    :type target_format: str | None
+    :param ctx: Contexto de validación con el archivo ya abierto.
+    :type ctx: ValidationContext | None
+    :return: Nombre del archivo resultante o `None` si hubo un error.
+    :rtype: str | None
+    """
+    target_format = target_format or source_format
+    if source_format not in FORMATS or target_format not in FORMATS:
+        print(f"\n{yellow('>>')} {error('ERROR')}: Formato no válido")
+        return None
+
+    if output_file is None:
+        output_file = _output_name(ciphertext_file, source_format, target_format)
+
+    output_path = BASE_DIR / output_file
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    fin = ctx.open(ciphertext_file)
+
+    try:
+        with open(tmp_path, "wb") as fout:
+            print()
+            with make_progress(ctx.size(ciphertext_file), "Cambiando llave") as progress:
+                rekey_stream(
+                    old_key, new_key, fin, fout, source_format, target_format,
+                    progress.update, adaptive_chunk_size(ctx.stat(ciphertext_file)),
+                )
+
+        # En Windows no se puede reemplazar un archivo abierto
+        fin.close()
+        os.replace(tmp_path, output_path)
+    except (ValueError, OSError) as e:
+        tmp_path.unlink(missing_ok=True)
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'Archivo cifrado con la llave nueva y guardado como {output_file}')}"
+    )
+    return output_file
+
+
+def _load_key(fmt: str, value: str) -> bytes:
+    """
+    Llave según el formato: para `des` es la llave en base 64 y para
+    `aes` y `aes2` el archivo con la llave (`.key` o `.kdf`). En los
+    tres, `ring:<id>` la toma del llavero.
+    """
+    if is_reference(value):
+        return load_key(value, "des" if fmt == "des" else "aes")
+    if fmt == "des":
+        return base64.b64decode(value, validate=True)
+
+    with open(BASE_DIR / Path(value), "rb") as f:
+        return _decode_key(f.read())
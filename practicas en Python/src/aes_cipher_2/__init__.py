@@ -1,3 +1,9 @@
-from .aes_cipher_2 import aes_cipher_2_menu
+from .aes_cipher_2 import (
+    aes_cipher_2_menu,
+    AESCipherV2,
+)
 
-__all__ = ["aes_cipher_2_menu"]
+__all__ = [
+    "aes_cipher_2_menu",
+    "AESCipherV2",
+]
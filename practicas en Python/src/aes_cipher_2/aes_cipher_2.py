@@ -6,11 +6,22 @@ from pathlib import Path
 from Crypto.Random import get_random_bytes
 from Crypto.Cipher import AES
 
+from aes_cipher.aes_cipher import _decode_key
+from ciphers import (
+    Base64Decoder,
+    Base64Encoder,
+    Cipher,
+    CipherStream,
+)
 from config import BASE_DIR
 from decorators import (
+    ValidationContext,
+    instrumented,
     validate_file,
-    validate_key,
+    validate_key_file,
 )
+from key_cache import KEY_CACHE
+from key_ring import store_key
 from utils import (
     clean_console,
     wait_key,
@@ -19,20 +30,89 @@ from utils import (
     yellow,
 )
 
-__all__ = ["aes_cipher_2_menu"]
+__all__ = [
+    "aes_cipher_2_menu",
+    "AESCipherV2",
+]
+
+class _Base64CTREncryptor(CipherStream):
+    """
+    Cifra con AES-CTR y escribe el nonce en base 64, un salto de línea
+    y los datos cifrados en base 64.
+    """
+
+    def __init__(self, key: bytes) -> None:
+        self._cipher = AES.new(key, AES.MODE_CTR)
+        self._encoder = Base64Encoder()
+        self._header = base64.b64encode(self._cipher.nonce) + b"\n"
+
+    def update(self, data: bytes) -> bytes:
+        out = self._header + self._encoder.update(self._cipher.encrypt(data))
+        self._header = b""
+        return out
+
+    def finalize(self) -> bytes:
+        out = self._header + self._encoder.finalize()
+        self._header = b""
+        return out
+
+
+class _Base64CTRDecryptor(CipherStream):
+    """Lee la línea del nonce y descifra el base 64 que sigue."""
+
+    def __init__(self, key: bytes) -> None:
+        self._key = key
+        self._cipher = None
+        self._decoder = Base64Decoder()
+        self._header = b""
+
+    def update(self, data: bytes) -> bytes:
+        if self._cipher is None:
+            self._header += data
+            if b"\n" not in self._header:
+                return b""
+
+            nonce_b64, data = self._header.split(b"\n", 1)
+            try:
+                nonce = base64.b64decode(nonce_b64.strip(), validate=True)
+            except ValueError as e:
+                raise ValueError(f"Nonce no válido: {e}") from e
+
+            self._cipher = AES.new(self._key, AES.MODE_CTR, nonce=nonce)
+            self._header = b""
+
+        return self._cipher.decrypt(self._decoder.update(data))
+
+    def finalize(self) -> bytes:
+        if self._cipher is None:
+            raise ValueError("Falta la línea con el nonce")
+        return self._cipher.decrypt(self._decoder.finalize())
 
-def _is_valid_key(key_filename: str) -> bool:
-    with open(BASE_DIR / key_filename, "r", encoding="utf-8") as f:
-        data = f.read()
-    
-    try:
-        base64.b64decode(data, validate=True)
-        return True
-    except Exception:
-        return False
 
+class AESCipherV2(Cipher):
+    """
+    AES-CTR con el texto cifrado en base 64, sin archivos ni
+    impresiones. La salida es el nonce en base 64, un salto de línea y
+    los datos cifrados en base 64, el mismo formato que `_encrypt_file`.
+    """
 
-def _random_key_generator(key_size: int, key_file: str) -> None:
+    name = "aes2"
+
+    def __init__(self, key: bytes) -> None:
+        key = bytes(key)
+        if len(key) not in (16, 24, 32):
+            raise ValueError("AES solo acepta llaves de 16, 24 o 32 bytes")
+        self.key = key
+
+    def encryptor(self) -> CipherStream:
+        return _Base64CTREncryptor(self.key)
+
+    def decryptor(self) -> CipherStream:
+        return _Base64CTRDecryptor(self.key)
+
+
+@instrumented("aes2.keygen")
+def _random_key_generator(key_size: int, key_file: str) -> str | None:
     if key_size not in (16, 24, 32):
         print(
             f"\n{yellow('>>')} "
@@ -45,73 +125,56 @@ def _random_key_generator(key_size: int, key_file: str) -> None:
 
     with open(BASE_DIR / key_filename, "w", encoding="utf-8") as f:
         f.write(base64.b64encode(key).decode())
+    KEY_CACHE.evict(BASE_DIR / key_filename)
 
     print(
         f"\n{yellow('>>')} "
         f"{success(f'Llave guardada correctamente y guardado como {key_filename}')}"
     )
 
-
-def _rebuild_key(key_filename: str) -> bytes:
-    with open(BASE_DIR / key_filename, "r", encoding="utf-8") as f:
-        data = f.read()
-
-    return base64.b64decode(data)
+    key_id = Path(key_filename).name.removesuffix(".key")
+    if store_key(key_id, "aes", key):
+        print(f"{yellow('>>')} {success(f'Llave agregada al llavero como {key_id}')}")
+    return key_filename
 
 
-@validate_file("key_filename")
-@validate_key(_is_valid_key, "key_filename")
+@instrumented("aes2.encrypt_file", size_param="plaintext_filename")
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
 @validate_file("plaintext_filename")
 def _encrypt_file(
     key_filename: str,
     plaintext_filename: str,
-    ciphertext_filename: str
-) -> None:
-    with open(BASE_DIR / plaintext_filename, "rb") as f:
-        data = f.read()
-
-    key = _rebuild_key(key_filename)
-
-    cipher = AES.new(key, AES.MODE_CTR)
-    ciphertext = cipher.encrypt(data)
+    ciphertext_filename: str,
+    ctx: ValidationContext | None = None,
+) -> str:
+    data = ctx.read(plaintext_filename)
+    key = ctx.keys["key_filename"]
 
     suffix = Path(plaintext_filename).suffix
-    nonce_b64 = base64.b64encode(cipher.nonce).decode()
-    ciphertext_b64 = base64.b64encode(ciphertext).decode()
-
     cipher_filename = f"{ciphertext_filename}{suffix}.txt"
 
-
-    with open(BASE_DIR / cipher_filename, "w") as f:
-        f.write(nonce_b64 + "\n")
-        f.write(ciphertext_b64)
+    with open(BASE_DIR / cipher_filename, "wb") as f:
+        f.write(AESCipherV2(key).encrypt(data))
 
     print(
         f"\n{yellow('>>')} "
         f"{success(f'Archivo cifrado correctamente y guardado como {cipher_filename}')}"
     )
+    return cipher_filename
 
 
-@validate_file("key_filename")
-@validate_key(_is_valid_key, "key_filename")
+@instrumented("aes2.decrypt_file", size_param="ciphertext_filename")
+@validate_key_file(_decode_key, "key_filename", KEY_CACHE, "aes")
 @validate_file("ciphertext_filename")
 def _decryp_file(
     key_filename: str,
     ciphertext_filename: str,
     recovered_filename: str,
-) -> None:
-    with open(BASE_DIR / ciphertext_filename, "r") as f:
-        nonce_b64 = f.readline().strip()
-        ciphertext_b64 = f.readline().strip()
-
-    key = _rebuild_key(key_filename)
+    ctx: ValidationContext | None = None,
+) -> str:
+    key = ctx.keys["key_filename"]
+    recovered_plaintext = AESCipherV2(key).decrypt(ctx.read(ciphertext_filename))
 
-    # Decodificamos base64
-    nonce = base64.b64decode(nonce_b64)
-    ciphertext = base64.b64decode(ciphertext_b64)
-    
-    decipher = AES.new(key, AES.MODE_CTR, nonce=nonce)    
-    recovered_plaintext = decipher.decrypt(ciphertext)
     cipher_no_suffix = ciphertext_filename.removesuffix(".txt")
     suffix = Path(cipher_no_suffix).suffix
     output_file = f"{recovered_filename}{suffix}"
@@ -123,6 +186,7 @@ def _decryp_file(
         f"\n{yellow('>>')} "
         f"{success(f'Archivo recuperado correctamente y guardado como {output_file}')}"
     )
+    return output_file
     
 
 def aes_cipher_2_menu() -> None:
@@ -159,13 +223,13 @@ def aes_cipher_2_menu() -> None:
                 _random_key_generator(key_size, key_file)
                 wait_key()
             case "2":
-                key_filename = input("\nEscribe el nombre del archivo con la llave: ")
+                key_filename = input("\nEscribe el nombre del archivo con la llave (o ring:<id>): ")
                 infile = input("Escribe el nombre del archivo a cifrar: ")
                 outfile = input("Escribe el nombre del archivo cifrado (solo nombre): ")
                 _encrypt_file(key_filename, infile, outfile)
                 wait_key()
             case "3":
-                key_filename = input("\nEscribe el nombre del archivo con la llave: ")
+                key_filename = input("\nEscribe el nombre del archivo con la llave (o ring:<id>): ")
                 infile = input("Escribe el nombre del archivo cifrado: ")
                 outfile = input("Escribe el nombre del archivo recuperado (solo nombre): ")
                 _decryp_file(key_filename, infile, outfile)
@@ -0,0 +1,19 @@
+from .aes_numpy import (
+    SBOX,
+    INV_SBOX,
+    expand_key,
+    encrypt_blocks,
+    decrypt_blocks,
+    ctr_keystream,
+    AESNumpyCipher,
+)
+
+__all__ = [
+    "SBOX",
+    "INV_SBOX",
+    "expand_key",
+    "encrypt_blocks",
+    "decrypt_blocks",
+    "ctr_keystream",
+    "AESNumpyCipher",
+]
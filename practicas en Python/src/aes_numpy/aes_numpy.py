@@ -0,0 +1,363 @@
+"""
+AES en NumPy que procesa miles de bloques a la vez.
+
+El estado es un arreglo `(N, 16)` de `uint8`, que se ve como cuatro
+columnas de palabras de 32 bits. Cada ronda completa (SubBytes,
+ShiftRows, MixColumns) es una búsqueda con `np.take` en las cuatro
+tablas T y un XOR con la llave de la ronda; la última ronda solo usa
+la S-box. Las tablas se construyen al importar el módulo con las
+tablas de `gf256` (inversos y multiplicación en GF(2^8)), y la
+expansión de llaves se guarda en caché por llave.
+
+No es una implementación de tiempo constante: sirve para estudiar,
+medir e instrumentar AES, no para proteger datos frente a ataques de
+canal lateral. Para eso está pycryptodome.
+"""
+
+from functools import lru_cache
+from typing import TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+from Crypto.Random import get_random_bytes
+
+from ciphers import (
+    Cipher,
+    CipherStream,
+)
+from decorators import instrument
+from gf256 import (
+    INV_TABLE,
+    MUL_TABLE,
+)
+
+__all__ = [
+    "SBOX",
+    "INV_SBOX",
+    "expand_key",
+    "encrypt_blocks",
+    "decrypt_blocks",
+    "ctr_keystream",
+    "AESNumpyCipher",
+]
+
+Blocks: TypeAlias = npt.NDArray[np.uint8]  # Forma (N, 16)
+Words: TypeAlias = npt.NDArray[np.uint32]
+
+BLOCK_SIZE = 16
+BATCH_BLOCKS = 64 * 1024  # Bloques por lote (1 MB) para acotar los temporales
+ROUNDS = {16: 10, 24: 12, 32: 14}
+
+
+def _build_sbox() -> tuple[npt.NDArray[np.uint8], npt.NDArray[np.uint8]]:
+    """
+    S-box de AES: inverso en GF(2^8) (con 0 -> 0) seguido de la
+    transformación afín. Devuelve la S-box y su inversa.
+    """
+    b = INV_TABLE
+    sbox = b ^ np.uint8(0x63)
+    for shift in range(1, 5):
+        sbox ^= (b << shift) | (b >> (8 - shift))
+
+    inv_sbox = np.empty_like(sbox)
+    inv_sbox[sbox] = np.arange(256, dtype=np.uint8)
+    return sbox, inv_sbox
+
+
+def _t_tables(s: npt.NDArray[np.uint8], coefficients: tuple[int, ...]) -> tuple[Words, ...]:
+    """
+    Tabla T con la columna `coefficients * s` de MixColumns (o de
+    InvMixColumns) y sus tres rotaciones de 8, 16 y 24 bits.
+    """
+    t0 = np.zeros(256, dtype=np.uint32)
+    for coefficient, shift in zip(coefficients, (24, 16, 8, 0)):
+        t0 |= MUL_TABLE[coefficient, s].astype(np.uint32) << shift
+
+    return (
+        t0,
+        (t0 >> 8) | (t0 << 24),
+        (t0 >> 16) | (t0 << 16),
+        (t0 >> 24) | (t0 << 8),
+    )
+
+
+SBOX, INV_SBOX = _build_sbox()
+SBOX.flags.writeable = False
+INV_SBOX.flags.writeable = False
+
+# Te: SubBytes + MixColumns; Td: InvSubBytes + InvMixColumns
+_TE = _t_tables(SBOX, (2, 1, 1, 3))
+_TD = _t_tables(INV_SBOX, (14, 9, 13, 11))
+
+# S-box desplazada a cada byte de la palabra, para la última ronda
+_SE = tuple(SBOX.astype(np.uint32) << shift for shift in (24, 16, 8, 0))
+_SD = tuple(INV_SBOX.astype(np.uint32) << shift for shift in (24, 16, 8, 0))
+
+_RCON = [1, 2, 4, 8, 16, 32, 64, 128, 27, 54]
+
+
+def _word(b0: int, b1: int, b2: int, b3: int) -> int:
+    return (b0 << 24) | (b1 << 16) | (b2 << 8) | b3
+
+
+@lru_cache(maxsize=32)
+def expand_key(key: bytes) -> tuple[Words, Words]:
+    """
+    Expansión de la llave de AES. Devuelve las llaves de ronda para
+    cifrar y, ya con InvMixColumns aplicado, para descifrar (cifrado
+    inverso equivalente). El resultado se guarda en caché y los
+    arreglos son de solo lectura.
+
+    :param key: Llave de 16, 24 o 32 bytes.
+    :type key: bytes
+    :return: Llaves de ronda como arreglos `(rondas + 1, 4)`.
+    :rtype: tuple[Words, Words]
+    """
+    if len(key) not in ROUNDS:
+        raise ValueError("AES solo acepta llaves de 16, 24 o 32 bytes")
+
+    nk = len(key) // 4
+    rounds = ROUNDS[len(key)]
+    words = [int.from_bytes(key[4 * i:4 * i + 4], "big") for i in range(nk)]
+
+    for i in range(nk, 4 * (rounds + 1)):
+        w = words[i - 1]
+        if i % nk == 0:
+            w = ((w << 8) | (w >> 24)) & 0xFFFFFFFF
+            w = _word(*(int(SBOX[(w >> s) & 0xFF]) for s in (24, 16, 8, 0)))
+            w ^= _RCON[i // nk - 1] << 24
+        elif nk > 6 and i % nk == 4:
+            w = _word(*(int(SBOX[(w >> s) & 0xFF]) for s in (24, 16, 8, 0)))
+        words.append(words[i - nk] ^ w)
+
+    enc = np.array(words, dtype=np.uint32).reshape(rounds + 1, 4)
+
+    dec = enc[::-1].copy()
+    middle = dec[1:-1]
+    te_s = SBOX.astype(np.uint32)
+    dec[1:-1] = (
+        _TD[0][te_s[middle >> 24]]
+        ^ _TD[1][te_s[(middle >> 16) & 0xFF]]
+        ^ _TD[2][te_s[(middle >> 8) & 0xFF]]
+        ^ _TD[3][te_s[middle & 0xFF]]
+    )
+
+    enc.flags.writeable = False
+    dec.flags.writeable = False
+    return enc, dec
+
+
+def _rounds(
+        columns: list[Words],
+        round_keys: Words,
+        tables: tuple[Words, ...],
+        last: tuple[Words, ...],
+        order: tuple[int, int, int],
+    ) -> list[Words]:
+    """
+    Aplica todas las rondas a las columnas del estado. `order` indica
+    de qué columna sale cada byte (ShiftRows o InvShiftRows).
+    """
+    a, b, c = order
+    s = [columns[i] ^ round_keys[0, i] for i in range(4)]
+    steps = [(rk, tables) for rk in round_keys[1:-1]] + [(round_keys[-1], last)]
+
+    for rk, (t0, t1, t2, t3) in steps:
+        # Índices de cada byte de las cuatro columnas; los índices
+        # siempre están en 0..255, así que `wrap` evita la comprobación
+        # de límites sin cambiar el resultado
+        b0 = [x >> 24 for x in s]
+        b1 = [(x >> 16) & 0xFF for x in s]
+        b2 = [(x >> 8) & 0xFF for x in s]
+        b3 = [x & 0xFF for x in s]
+
+        s = []
+        for i in range(4):
+            column = np.take(t0, b0[i], mode="wrap")
+            column ^= np.take(t1, b1[(i + a) % 4], mode="wrap")
+            column ^= np.take(t2, b2[(i + b) % 4], mode="wrap")
+            column ^= np.take(t3, b3[(i + c) % 4], mode="wrap")
+            column ^= rk[i]
+            s.append(column)
+
+    return s
+
+
+def _process(
+        blocks: Blocks,
+        round_keys: Words,
+        tables: tuple[Words, ...],
+        last: tuple[Words, ...],
+        order: tuple[int, int, int],
+    ) -> Blocks:
+    blocks = np.ascontiguousarray(blocks, dtype=np.uint8).reshape(-1, BLOCK_SIZE)
+    out = np.empty_like(blocks)
+
+    for start in range(0, len(blocks), BATCH_BLOCKS):
+        batch = blocks[start:start + BATCH_BLOCKS].view(">u4").astype(np.uint32)
+        columns = _rounds(
+            [batch[:, i] for i in range(4)], round_keys, tables, last, order
+        )
+        words = np.stack(columns, axis=1).astype(">u4")
+        out[start:start + BATCH_BLOCKS] = words.view(np.uint8).reshape(-1, BLOCK_SIZE)
+
+    return out
+
+
+def encrypt_blocks(key: bytes, blocks: Blocks) -> Blocks:
+    """
+    Cifra bloques independientes con AES (modo ECB).
+
+    :param key: Llave de 16, 24 o 32 bytes.
+    :type key: bytes
+    :param blocks: Bloques como arreglo `(N, 16)` de `uint8`.
+    :type blocks: Blocks
+    :return: Bloques cifrados, misma forma.
+    :rtype: Blocks
+    """
+    with instrument("aes_numpy.encrypt_blocks", blocks.size):
+        return _process(blocks, expand_key(bytes(key))[0], _TE, _SE, (1, 2, 3))
+
+
+def decrypt_blocks(key: bytes, blocks: Blocks) -> Blocks:
+    """
+    Descifra bloques independientes con AES (modo ECB).
+
+    :param key: Llave de 16, 24 o 32 bytes.
+    :type key: bytes
+    :param blocks: Bloques cifrados como arreglo `(N, 16)` de `uint8`.
+    :type blocks: Blocks
+    :return: Bloques descifrados, misma forma.
+    :rtype: Blocks
+    """
+    with instrument("aes_numpy.decrypt_blocks", blocks.size):
+        return _process(blocks, expand_key(bytes(key))[1], _TD, _SD, (3, 2, 1))
+
+
+def ctr_keystream(key: bytes, nonce: bytes, first_block: int, count: int) -> Blocks:
+    """
+    Flujo de llave de CTR para los bloques `first_block` a
+    `first_block + count - 1`. Cada bloque de contador es el nonce de
+    8 bytes seguido del número de bloque en 64 bits big-endian, igual
+    que `AES.new(key, AES.MODE_CTR, nonce=nonce)` de pycryptodome.
+
+    :param key: Llave de 16, 24 o 32 bytes.
+    :type key: bytes
+    :param nonce: Nonce de 8 bytes.
+    :type nonce: bytes
+    :param first_block: Número del primer bloque.
+    :type first_block: int
+    :param count: Número de bloques.
+    :type count: int
+    :return: Flujo de llave como arreglo `(count, 16)`.
+    :rtype: Blocks
+    """
+    if len(nonce) != 8:
+        raise ValueError("El nonce debe ser de 8 bytes")
+
+    counters = np.empty((count, BLOCK_SIZE), dtype=np.uint8)
+    counters[:, :8] = np.frombuffer(nonce, dtype=np.uint8)
+    numbers = np.arange(first_block, first_block + count, dtype=np.uint64)
+    counters[:, 8:] = numbers.astype(">u8").view(np.uint8).reshape(count, 8)
+    return encrypt_blocks(key, counters)
+
+
+class _NumpyCTRStream(CipherStream):
+    """
+    CTR por bloques completos de NumPy; guarda la posición en bytes
+    para continuar el flujo de llave entre llamadas.
+    """
+
+    def __init__(self, key: bytes, nonce: bytes) -> None:
+        self._key = key
+        self._nonce = nonce
+        self._position = 0
+
+    def _apply(self, data: bytes) -> bytes:
+        if not data:
+            return b""
+
+        first, offset = divmod(self._position, BLOCK_SIZE)
+        count = -(-(offset + len(data)) // BLOCK_SIZE)
+        keystream = ctr_keystream(self._key, self._nonce, first, count).reshape(-1)
+        self._position += len(data)
+
+        plain = np.frombuffer(data, dtype=np.uint8)
+        return (plain ^ keystream[offset:offset + len(data)]).tobytes()
+
+    def update(self, data: bytes) -> bytes:
+        return self._apply(data)
+
+    def finalize(self) -> bytes:
+        return b""
+
+
+class _NumpyCTREncryptor(_NumpyCTRStream):
+    """La primera salida lleva la cabecera del nonce, como `AESCipher`."""
+
+    def __init__(self, key: bytes) -> None:
+        nonce = get_random_bytes(8)
+        super().__init__(key, nonce)
+        self._header = len(nonce).to_bytes(1, "big") + nonce
+
+    def update(self, data: bytes) -> bytes:
+        out = self._header + self._apply(data)
+        self._header = b""
+        return out
+
+    def finalize(self) -> bytes:
+        out = self._header
+        self._header = b""
+        return out
+
+
+class _NumpyCTRDecryptor(CipherStream):
+    """Lee la cabecera del nonce y descifra el resto."""
+
+    def __init__(self, key: bytes) -> None:
+        self._key = key
+        self._stream = None
+        self._header = b""
+
+    def update(self, data: bytes) -> bytes:
+        if self._stream is not None:
+            return self._stream.update(data)
+
+        self._header += data
+        if not self._header or len(self._header) < 1 + self._header[0]:
+            return b""
+
+        nonce_len = self._header[0]
+        if nonce_len != 8:
+            raise ValueError("El motor de NumPy solo acepta nonces de 8 bytes")
+        nonce, rest = self._header[1:1 + nonce_len], self._header[1 + nonce_len:]
+        self._stream = _NumpyCTRStream(self._key, nonce)
+        self._header = b""
+        return self._stream.update(rest)
+
+    def finalize(self) -> bytes:
+        if self._stream is None:
+            raise ValueError("Falta la cabecera con el nonce")
+        return b""
+
+
+class AESNumpyCipher(Cipher):
+    """
+    AES-CTR calculado con el motor de NumPy. Produce y lee el mismo
+    formato que `AESCipher` (longitud del nonce, nonce y datos), así
+    que ambos son intercambiables.
+    """
+
+    name = "aes-numpy"
+
+    def __init__(self, key: bytes) -> None:
+        key = bytes(key)
+        if len(key) not in ROUNDS:
+            raise ValueError("AES solo acepta llaves de 16, 24 o 32 bytes")
+        self.key = key
+
+    def encryptor(self) -> CipherStream:
+        return _NumpyCTREncryptor(self.key)
+
+    def decryptor(self) -> CipherStream:
+        return _NumpyCTRDecryptor(self.key)
@@ -1,3 +1,9 @@
-from .affin_cipher import affin_cipher_menu
+from .affin_cipher import (
+    affin_cipher_menu,
+    AffinCipher,
+)
 
-__all__ = ["affin_cipher_menu"]
+__all__ = [
+    "affin_cipher_menu",
+    "AffinCipher",
+]
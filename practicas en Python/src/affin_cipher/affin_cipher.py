@@ -4,6 +4,11 @@ import numpy as np
 import numpy.typing as npt
 import ast
 
+from ciphers import (
+    Cipher,
+    CipherStream,
+    TextStream,
+)
 from config import BASE_DIR
 from decorators import (
     validate_file,
@@ -17,7 +22,10 @@ from utils import (
     yellow,
 )
 
-__all__ = ["affin_cipher_menu"]
+__all__ = [
+    "affin_cipher_menu",
+    "AffinCipher",
+]
 
 _PRINTABLE_ASCII_LENGHT = 95
 _VOCALES_ACENTUDADAS = "ÁÉÍÓÚáéíóú"
@@ -79,6 +87,54 @@ def _get_multiplicative_inverse(n: int, a: int) -> int:
     )
     
 
+def _affin_encrypt_text(text: str, a: int, b: int) -> str:
+    """Aplica `c = (a * m + b) mod 95` a cada carácter que se cifra."""
+    ciphertext = ""
+
+    for m in text:
+        if m in ("\n", "\t") or m in _VOCALES_ACENTUDADAS:
+            ciphertext += m  # Solo concatenar
+        else:
+            c = (a * _get_unicode(m) + b) % _PRINTABLE_ASCII_LENGHT
+            ciphertext += _get_char(c)
+
+    return ciphertext
+
+
+def _affin_decrypt_text(text: str, a_inverse: int, b: int) -> str:
+    """Aplica `m = (c - b) * a^-1 mod 95` a cada carácter cifrado."""
+    plaintext = ""
+
+    for c in text:
+        if c in ("\n", "\t") or c in _VOCALES_ACENTUDADAS:
+            plaintext += c  # Solo concatenar
+        else:
+            m = ((_get_unicode(c) - b) * a_inverse) % _PRINTABLE_ASCII_LENGHT
+            plaintext += _get_char(m)
+
+    return plaintext
+
+
+class AffinCipher(Cipher):
+    """Affin Cipher sobre texto UTF-8, sin archivos ni impresiones."""
+
+    name = "affin"
+
+    def __init__(self, key: tuple[int, int]) -> None:
+        a, b = (int(k) for k in key)
+        if not _is_valid_key((a, b)):
+            raise ValueError(f"Llave no válida para Affin Cipher: {(a, b)}")
+
+        self.a, self.b = a, b
+        self.a_inverse = int(_get_multiplicative_inverse(_PRINTABLE_ASCII_LENGHT, a))
+
+    def encryptor(self) -> CipherStream:
+        return TextStream(lambda text: _affin_encrypt_text(text, self.a, self.b))
+
+    def decryptor(self) -> CipherStream:
+        return TextStream(lambda text: _affin_decrypt_text(text, self.a_inverse, self.b))
+
+
 def _key_generator_affin() -> None:
     """Genera una llave válida para el Affin Cipher."""
     rng = np.random.default_rng()
@@ -95,7 +151,7 @@ def _encrypt_affin(
         key: tuple[int, int],
         plaintext_file: str,
         ciphertext_file: str,
-    ) -> None:
+    ) -> str:
     """
     Cifra un texto usando Affin Cipher y lo guarda en un archivo de
     texto.
@@ -106,19 +162,14 @@ def _encrypt_affin(
     :type plaintext_file: str
     :param ciphertext_file: Archivo con el texto descifrado.
     :type ciphertext_file: str
+    :return: Nombre del archivo cifrado.
+    :rtype: str
     """
     with open(BASE_DIR / plaintext_file, "r", encoding="utf-8") as f:
         plaintext = f.read()
     
-    ciphertext = ""
     a, b = key
-
-    for m in plaintext:
-        if m in ("\n", "\t") or m in _VOCALES_ACENTUDADAS:
-            ciphertext += m  # Solo concatenar
-        else:
-            c = (a * _get_unicode(m) + b) % _PRINTABLE_ASCII_LENGHT
-            ciphertext += _get_char(c)
+    ciphertext = _affin_encrypt_text(plaintext, a, b)
 
     with open(BASE_DIR / ciphertext_file, "w", encoding="utf-8") as f:
         f.write(ciphertext)
@@ -127,6 +178,7 @@ def _encrypt_affin(
         f"\n{yellow('>>')} "
         f"{success(f'Texto cifrado correctamente y guardado en {ciphertext_file}')}"
     )
+    return ciphertext_file
     
 
 @validate_key(_is_valid_key)
@@ -134,7 +186,7 @@ def _encrypt_affin(
 def _decrypt_affin(
         key: tuple[int, int],
         ciphertext_file: str,
-    ) -> None:
+    ) -> str:
     """
     Descifra un texto usando Affin Cipher e imprime el resultado.
 
@@ -142,23 +194,19 @@ def _decrypt_affin(
     :type key: tuple[int, int]
     :param ciphertext_file: Archivo con el texto descifrado.
     :type ciphertext_file: str
+    :return: Texto original recuperado.
+    :rtype: str
     """
     with open(BASE_DIR / ciphertext_file, "r", encoding="utf-8") as f:
         ciphertext = f.read()
     
-    plaintext = ""
     a, b = key
     a_inverse = _get_multiplicative_inverse(_PRINTABLE_ASCII_LENGHT, a)
+    plaintext = _affin_decrypt_text(ciphertext, a_inverse, b)
 
-    for c in ciphertext:
-        if c in("\n", "\t") or c in _VOCALES_ACENTUDADAS:
-            plaintext += c  # Solo concatenar
-        else:
-            m = ((_get_unicode(c) - b) * a_inverse) % _PRINTABLE_ASCII_LENGHT
-            plaintext += _get_char(m)
-        
     print(f"\n{yellow('>>')} El inverso multiplicativo usado fue: {a_inverse}")
     print(f"{yellow('>>')} Texto original recuperado:\n\n{plaintext}")
+    return plaintext
 
 
 def affin_cipher_menu() -> None:
@@ -0,0 +1,9 @@
+from .attacks import (
+    brute_force_discrete_log,
+    trial_division,
+)
+
+__all__ = [
+    "brute_force_discrete_log",
+    "trial_division",
+]
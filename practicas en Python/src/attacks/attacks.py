@@ -0,0 +1,61 @@
+"""Ataques por fuerza bruta de las prácticas (logaritmo discreto y factorización)."""
+
+from math import isqrt
+
+from decorators import instrumented
+
+__all__ = [
+    "brute_force_discrete_log",
+    "trial_division",
+]
+
+
+@instrumented("attack.discrete_log")
+def brute_force_discrete_log(base: int, target: int, modulus: int) -> int | None:
+    """
+    Busca el menor `x` tal que `base^x ≡ target (mod modulus)` probando
+    `x = 0, 1, 2, ...` (el mismo ataque de `main3.py`). En lugar de
+    llamar a `pow` en cada paso se lleva la potencia acumulada, así que
+    cada intento cuesta una sola multiplicación modular.
+
+    :param base: Generador `g`.
+    :type base: int
+    :param target: Valor `y = g^x mod p` del que se busca `x`.
+    :type target: int
+    :param modulus: Módulo `p`.
+    :type modulus: int
+    :return: Exponente encontrado o `None` si no existe.
+    :rtype: int | None
+    """
+    target %= modulus
+    value = 1 % modulus
+
+    for x in range(modulus):
+        if value == target:
+            return x
+        value = value * base % modulus
+
+    return None
+
+
+@instrumented("attack.factoring")
+def trial_division(n: int) -> tuple[int, int] | None:
+    """
+    Factoriza `n = p * q` por división de prueba hasta `sqrt(n)`, como
+    `factorizar_n` de las prácticas, pero probando solo el 2 y los
+    impares.
+
+    :param n: Número a factorizar.
+    :type n: int
+    :return: Par `(p, q)` con `p` el menor factor, o `None` si `n` es
+             primo.
+    :rtype: tuple[int, int] | None
+    """
+    if n % 2 == 0 and n > 2:
+        return 2, n // 2
+
+    for p in range(3, isqrt(n) + 1, 2):
+        if n % p == 0:
+            return p, n // p
+
+    return None
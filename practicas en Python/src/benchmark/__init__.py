@@ -0,0 +1,15 @@
+from .benchmark import (
+    BenchmarkResult,
+    parse_size,
+    run_benchmarks,
+    compare_results,
+    main,
+)
+
+__all__ = [
+    "BenchmarkResult",
+    "parse_size",
+    "run_benchmarks",
+    "compare_results",
+    "main",
+]
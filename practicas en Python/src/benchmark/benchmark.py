@@ -0,0 +1,545 @@
+"""
+Banco de pruebas de rendimiento para cifrados, generadores de primos y
+ataques.
+
+Cada caso se ejecuta primero `warmup` veces sin medir y después
+`repeats` veces midiendo con `time.perf_counter`; se reportan la
+mediana y el percentil 99. Los resultados se guardan en JSON y se
+pueden comparar contra una ejecución anterior (línea base) para marcar
+regresiones.
+
+Los cifrados se miden en memoria con la interfaz de `ciphers`, así que
+un caso de 1 GB necesita alrededor de tres veces ese tamaño en RAM
+(entrada, texto cifrado y salida).
+
+Ejemplos (desde la carpeta src):
+
+    py -m benchmark --out ../data/bench.json
+    py -m benchmark --sizes 1KB,1MB,1GB --ciphers aes,des
+    py -m benchmark --bits 16,512,2048 --only prime
+    py -m benchmark --baseline ../data/bench.json --threshold 0.1
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import (
+    asdict,
+    dataclass,
+)
+from datetime import (
+    datetime,
+    timezone,
+)
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+)
+
+from utils import (
+    error,
+    success,
+    yellow,
+)
+
+__all__ = [
+    "BenchmarkResult",
+    "parse_size",
+    "run_benchmarks",
+    "compare_results",
+    "main",
+]
+
+DEFAULT_SIZES = ("1KB", "64KB", "1MB", "16MB")
+DEFAULT_PRIME_BITS = (16, 128, 512, 1024)
+DEFAULT_DLOG_BITS = (12, 16, 20)
+DEFAULT_FACTOR_BITS = (16, 24, 32, 40)
+DEFAULT_THRESHOLD = 0.10  # 10 % más lento que la línea base
+
+# Los cifrados clásicos recorren el texto carácter por carácter en
+# Python; arriba de este tamaño se omiten salvo que se pida otro límite
+CLASSICAL_MAX_SIZE = 1024 * 1024
+CLASSICAL_CIPHERS = ("shift", "affin", "hill", "permutation")
+
+_UNITS = {"B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+# Texto ASCII que todos los cifrados aceptan
+_PATTERN = b"HOLA MUNDO ESTE ES UN TEXTO DE PRUEBA 0123456789\n"
+
+SEED = 2026
+
+
+@dataclass
+class BenchmarkResult:
+    """Resultado de un caso: grupo, nombre, operación y parámetro."""
+
+    group: str
+    name: str
+    op: str
+    param: str
+    samples: int
+    median: float
+    p99: float
+    mean: float
+    bytes: int = 0
+    mb_s: float | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.group}/{self.name}/{self.op}/{self.param}"
+
+
+def parse_size(text: str) -> int:
+    """
+    Convierte un tamaño como `1KB`, `16MB` o `1GB` a bytes.
+
+    :param text: Tamaño con unidad opcional (B, KB, MB, GB).
+    :type text: str
+    :return: Tamaño en bytes.
+    :rtype: int
+    """
+    text = text.strip().upper()
+    for unit in ("GB", "MB", "KB", "B"):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * _UNITS[unit])
+    return int(text)
+
+
+def _format_size(size: int) -> str:
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def _percentile(sorted_samples: list[float], q: float) -> float:
+    """Percentil por rango más cercano sobre muestras ordenadas."""
+    rank = max(1, -(-len(sorted_samples) * q // 100))
+    return sorted_samples[int(rank) - 1]
+
+
+def _measure(
+        func: Callable[[], Any],
+        warmup: int,
+        repeats: int,
+    ) -> list[float]:
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def _result(
+        group: str,
+        name: str,
+        op: str,
+        param: str,
+        samples: list[float],
+        nbytes: int = 0,
+    ) -> BenchmarkResult:
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    mb_s = (nbytes / (1024 * 1024)) / median if nbytes and median else None
+
+    return BenchmarkResult(
+        group=group,
+        name=name,
+        op=op,
+        param=param,
+        samples=len(samples),
+        median=median,
+        p99=_percentile(ordered, 99),
+        mean=statistics.fmean(samples),
+        bytes=nbytes,
+        mb_s=mb_s,
+    )
+
+
+def _payload(size: int) -> bytes:
+    return (_PATTERN * (size // len(_PATTERN) + 1))[:size]
+
+
+def _cipher_keys(rng: random.Random) -> dict[str, Any]:
+    """Llaves fijas (o derivadas de la semilla) para cada cifrado."""
+    permutation = list(range(1, 9))
+    rng.shuffle(permutation)
+    bit_permutation = list(range(1, 65))
+    rng.shuffle(bit_permutation)
+
+    return {
+        "shift": 3,
+        "affin": (49, 82),
+        "hill": [[3, 3], [2, 5]],
+        "permutation": permutation,
+        "permutation-bits": bit_permutation,
+        "des": rng.randbytes(8),
+        "aes": rng.randbytes(32),
+        "aes-gcm": rng.randbytes(32),
+        "aes-numpy": rng.randbytes(32),
+        "aes2": rng.randbytes(32),
+        "tbc": rng.getrandbits(16),
+    }
+
+
+def _cipher_options(rng: random.Random) -> dict[str, dict[str, Any]]:
+    """Opciones de `get_cipher` para los cifrados que necesitan más que la llave."""
+    sbox = list(range(256))
+    rng.shuffle(sbox)
+    pbox = list(range(1, 9))
+    rng.shuffle(pbox)
+
+    return {
+        "tbc": {"sbox": sbox, "pbox": tuple(pbox)},
+    }
+
+
+def _bench_ciphers(
+        names: list[str],
+        sizes: list[int],
+        warmup: int,
+        repeats: int,
+        classical_max_size: int,
+        report: Callable[[BenchmarkResult], None],
+    ) -> list[BenchmarkResult]:
+    from ciphers import get_cipher
+
+    rng = random.Random(SEED)
+    keys = _cipher_keys(rng)
+    options = _cipher_options(rng)
+    results = []
+
+    for name in names:
+        cipher = get_cipher(name, keys[name], **options.get(name, {}))
+
+        for size in sizes:
+            if name in CLASSICAL_CIPHERS and size > classical_max_size:
+                continue
+
+            data = _payload(size)
+            ciphertext = cipher.encrypt(data)
+            param = _format_size(size)
+
+            for op, func in (
+                ("encrypt", lambda data=data: cipher.encrypt(data)),
+                ("decrypt", lambda ciphertext=ciphertext: cipher.decrypt(ciphertext)),
+            ):
+                result = _result(
+                    "cipher", name, op, param,
+                    _measure(func, warmup, repeats), size,
+                )
+                results.append(result)
+                report(result)
+
+            # Libera la entrada antes de crear la del siguiente tamaño
+            del data, ciphertext, func
+
+    return results
+
+
+def _bench_primes(
+        bits_list: list[int],
+        warmup: int,
+        repeats: int,
+        report: Callable[[BenchmarkResult], None],
+    ) -> list[BenchmarkResult]:
+    from rsa_cipher.rsa_cipher import PRIME_BACKENDS
+
+    results = []
+    for backend, generate in PRIME_BACKENDS.items():
+        for bits in bits_list:
+            result = _result(
+                "prime", backend, "generate", f"{bits}",
+                _measure(lambda: generate(bits), warmup, repeats),
+            )
+            results.append(result)
+            report(result)
+
+    return results
+
+
+def _bench_attacks(
+        dlog_bits: list[int],
+        factor_bits: list[int],
+        warmup: int,
+        repeats: int,
+        report: Callable[[BenchmarkResult], None],
+    ) -> list[BenchmarkResult]:
+    """
+    Los problemas se generan con una semilla fija para que el trabajo
+    (posición del exponente, tamaño de los factores) sea el mismo entre
+    ejecuciones y las comparaciones tengan sentido.
+    """
+    from attacks import (
+        brute_force_discrete_log,
+        trial_division,
+    )
+    from rsa_cipher.prime_sieve import is_probable_prime
+
+    rng = random.Random(SEED)
+
+    def _prime(bits: int) -> int:
+        while True:
+            candidate = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+            if is_probable_prime(candidate):
+                return candidate
+
+    results = []
+
+    for bits in dlog_bits:
+        p, g = _prime(bits), 2
+        target = pow(g, rng.randrange(1, p - 1), p)
+        result = _result(
+            "attack", "discrete_log", "brute_force", f"{bits}",
+            _measure(lambda: brute_force_discrete_log(g, target, p), warmup, repeats),
+        )
+        results.append(result)
+        report(result)
+
+    for bits in factor_bits:
+        n = _prime(bits // 2) * _prime(bits - bits // 2)
+        result = _result(
+            "attack", "factoring", "trial_division", f"{bits}",
+            _measure(lambda: trial_division(n), warmup, repeats),
+        )
+        results.append(result)
+        report(result)
+
+    return results
+
+
+def _print_result(result: BenchmarkResult) -> None:
+    speed = f"  {result.mb_s:10.2f} MB/s" if result.mb_s is not None else ""
+    print(
+        f"{result.key:<40} mediana {result.median * 1000:11.3f} ms"
+        f"  p99 {result.p99 * 1000:11.3f} ms{speed}",
+        file=sys.stderr,
+    )
+
+
+def run_benchmarks(
+        ciphers: list[str] | None = None,
+        sizes: list[int] | None = None,
+        prime_bits: list[int] | None = None,
+        dlog_bits: list[int] | None = None,
+        factor_bits: list[int] | None = None,
+        only: list[str] | None = None,
+        warmup: int = 1,
+        repeats: int = 5,
+        classical_max_size: int = CLASSICAL_MAX_SIZE,
+        verbose: bool = True,
+    ) -> dict[str, Any]:
+    """
+    Ejecuta los casos pedidos y devuelve el documento de resultados
+    (metadatos y lista de resultados) listo para guardarse como JSON.
+
+    :param ciphers: Cifrados a medir; por defecto todos los registrados.
+    :type ciphers: list[str] | None
+    :param sizes: Tamaños de entrada en bytes para los cifrados.
+    :type sizes: list[int] | None
+    :param prime_bits: Tamaños en bits para los generadores de primos.
+    :type prime_bits: list[int] | None
+    :param dlog_bits: Tamaños del módulo para el logaritmo discreto.
+    :type dlog_bits: list[int] | None
+    :param factor_bits: Tamaños de `n` para la factorización.
+    :type factor_bits: list[int] | None
+    :param only: Grupos a ejecutar (`cipher`, `prime`, `attack`).
+    :type only: list[str] | None
+    :param warmup: Ejecuciones sin medir antes de cada caso.
+    :type warmup: int
+    :param repeats: Ejecuciones medidas por caso.
+    :type repeats: int
+    :param classical_max_size: Tamaño máximo para los cifrados clásicos.
+    :type classical_max_size: int
+    :param verbose: Imprime cada resultado en `stderr` al terminar.
+    :type verbose: bool
+    :return: Documento con `meta` y `results`.
+    :rtype: dict[str, Any]
+    """
+    from ciphers import available_ciphers
+
+    if repeats < 1 or warmup < 0:
+        raise ValueError("repeats debe ser mayor que 0 y warmup no negativo")
+
+    ciphers = ciphers or available_ciphers()
+    sizes = sizes or [parse_size(s) for s in DEFAULT_SIZES]
+    prime_bits = prime_bits or list(DEFAULT_PRIME_BITS)
+    dlog_bits = dlog_bits or list(DEFAULT_DLOG_BITS)
+    factor_bits = factor_bits or list(DEFAULT_FACTOR_BITS)
+    only = only or ["cipher", "prime", "attack"]
+    report = _print_result if verbose else (lambda result: None)
+
+    results: list[BenchmarkResult] = []
+    if "cipher" in only:
+        results += _bench_ciphers(ciphers, sizes, warmup, repeats, classical_max_size, report)
+    if "prime" in only:
+        results += _bench_primes(prime_bits, warmup, repeats, report)
+    if "attack" in only:
+        results += _bench_attacks(dlog_bits, factor_bits, warmup, repeats, report)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "warmup": warmup,
+            "repeats": repeats,
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare_results(
+        current: dict[str, Any],
+        baseline: dict[str, Any],
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> list[dict[str, Any]]:
+    """
+    Compara las medianas de `current` contra `baseline` caso por caso.
+    Un caso es una regresión si su mediana creció más de `threshold`
+    (fracción) respecto a la línea base.
+
+    :param current: Documento de resultados actual.
+    :type current: dict[str, Any]
+    :param baseline: Documento de resultados de referencia.
+    :type baseline: dict[str, Any]
+    :param threshold: Tolerancia relativa, p. ej. 0.10 para 10 %.
+    :type threshold: float
+    :return: Una fila por caso presente en ambos documentos con
+             `key`, `baseline`, `current`, `ratio` y `regression`.
+    :rtype: list[dict[str, Any]]
+    """
+    def _key(result: dict[str, Any]) -> str:
+        return f"{result['group']}/{result['name']}/{result['op']}/{result['param']}"
+
+    reference = {_key(result): result["median"] for result in baseline["results"]}
+    rows = []
+
+    for result in current["results"]:
+        key = _key(result)
+        if key not in reference or not reference[key]:
+            continue
+
+        ratio = result["median"] / reference[key]
+        rows.append({
+            "key": key,
+            "baseline": reference[key],
+            "current": result["median"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+
+    return rows
+
+
+def _int_list(text: str) -> list[int]:
+    return [int(item) for item in text.split(",") if item.strip()]
+
+
+def _str_list(text: str) -> list[str]:
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="benchmark",
+        description="Mide cifrados, generadores de primos y ataques.",
+    )
+    parser.add_argument("--ciphers", type=_str_list, help="Cifrados separados por comas (por defecto todos)")
+    parser.add_argument(
+        "--sizes",
+        type=lambda text: [parse_size(s) for s in _str_list(text)],
+        help=f"Tamaños de entrada, p. ej. 1KB,1MB,1GB (por defecto {','.join(DEFAULT_SIZES)})",
+    )
+    parser.add_argument("--bits", type=_int_list, help="Bits de los primos, p. ej. 16,512,2048")
+    parser.add_argument("--dlog-bits", type=_int_list, help="Bits del módulo para el logaritmo discreto")
+    parser.add_argument("--factor-bits", type=_int_list, help="Bits de n para la factorización")
+    parser.add_argument("--only", type=_str_list, help="Grupos: cipher, prime, attack")
+    parser.add_argument("--warmup", type=int, default=1, help="Ejecuciones de calentamiento por caso")
+    parser.add_argument("--repeats", type=int, default=5, help="Ejecuciones medidas por caso")
+    parser.add_argument(
+        "--classical-max-size",
+        type=parse_size,
+        default=CLASSICAL_MAX_SIZE,
+        help="Tamaño máximo para shift, affin, hill y permutation",
+    )
+    parser.add_argument("--out", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--baseline", help="Archivo JSON de una ejecución anterior")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Tolerancia relativa antes de marcar una regresión",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            parser.error(f"no se pudo leer la línea base: {e}")
+
+    try:
+        document = run_benchmarks(
+            ciphers=args.ciphers,
+            sizes=args.sizes,
+            prime_bits=args.bits,
+            dlog_bits=args.dlog_bits,
+            factor_bits=args.factor_bits,
+            only=args.only,
+            warmup=args.warmup,
+            repeats=args.repeats,
+            classical_max_size=args.classical_max_size,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    output = json.dumps(document, indent=2)
+    if args.out:
+        Path(args.out).write_text(output + "\n", encoding="utf-8")
+        print(f"{yellow('>>')} {success(f'Resultados guardados en {args.out}')}", file=sys.stderr)
+    else:
+        print(output)
+
+    if baseline is None:
+        return 0
+
+    rows = compare_results(document, baseline, args.threshold)
+    regressions = [row for row in rows if row["regression"]]
+
+    print(f"\n{yellow('>>')} Comparación contra {args.baseline}", file=sys.stderr)
+    for row in rows:
+        mark = error("REGRESIÓN") if row["regression"] else ""
+        print(f"{row['key']:<40} {row['ratio']:6.2f}x  {mark}", file=sys.stderr)
+
+    if regressions:
+        print(
+            f"\n{yellow('>>')} {error('ERROR')}: {len(regressions)} casos más lentos "
+            f"que la línea base (tolerancia {args.threshold:.0%})",
+            file=sys.stderr,
+        )
+        return 1
+
+    print(f"\n{yellow('>>')} {success('Sin regresiones')}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+from .bit_permutation import (
+    BitPermutation,
+    permute_bits,
+)
+
+__all__ = [
+    "BitPermutation",
+    "permute_bits",
+]
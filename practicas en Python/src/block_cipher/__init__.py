@@ -1,7 +1,17 @@
-from .block_cipher import block_cipher_menu
+from .block_cipher import (
+    block_cipher_menu,
+    DESCipher,
+)
+from .des_async import (
+    encrypt_file_async,
+    decrypt_file_async,
+)
 from .tests import file_generator_DES
 
 __all__ = [
     "block_cipher_menu",
+    "DESCipher",
     "file_generator_DES",
+    "encrypt_file_async",
+    "decrypt_file_async",
 ]
@@ -9,11 +9,33 @@ from Crypto.Util.Padding import (
     unpad,
 )
 
+from ciphers import (
+    Base64Decoder,
+    Base64Encoder,
+    Cipher,
+    CipherStream,
+    Compressor,
+    Decompressor,
+    chain,
+    choose_level,
+    feed,
+    pack_header,
+    parse_header,
+)
 from config import BASE_DIR
 from decorators import (
+    ValidationContext,
+    instrumented,
     validate_key,
+    validate_file,
     validate_file_DES,
 )
+from key_ring import (
+    fingerprint,
+    is_reference,
+    load_key,
+    store_key,
+)
 from utils import (
     clean_console,
     wait_key,
@@ -22,7 +44,12 @@ from utils import (
     yellow,
 )
 
-__all__ = ["block_cipher_menu"]
+__all__ = [
+    "block_cipher_menu",
+    "DESCipher",
+]
+
+BLOCK_SIZE = 8  # Bloque de DES en bytes
 
 def _is_valid_key(key: bytes) -> bool:
     """
@@ -48,6 +75,7 @@ def _binary_to_base64(binary_str: str) -> str:
     return encode.decode()
 
 
+@instrumented("des.keygen")
 def _random_key_generator() -> bytes:
     """
     Genera una llave en bse 64 de 8 bytes.
@@ -58,18 +86,125 @@ def _random_key_generator() -> bytes:
     key = get_random_bytes(8)
     key_base64 = base64.b64encode(key).decode()
     print(f"\n{yellow('>>')} Tu llave DES (Base64): {key_base64}")
+
+    key_id = fingerprint("des", key)
+    if store_key(key_id, "des", key):
+        print(f"{yellow('>>')} {success(f'Llave agregada al llavero como {key_id}')}")
     return key
 
 
+def _parse_key(value: str) -> bytes:
+    """
+    Llave en base 64 o, con `ring:<id>`, la del llavero. Lanza
+    `ValueError` si no es válida.
+    """
+    if is_reference(value):
+        return load_key(value, "des")
+    try:
+        return base64.b64decode(value)
+    except ValueError:
+        raise ValueError("La llave en base64 no es válida") from None
+
+
+class _DESEncryptor(CipherStream):
+    """Cifra con DES-CBC por bloques y codifica `IV + ciphertext` en base 64."""
+
+    def __init__(self, key: bytes) -> None:
+        iv = get_random_bytes(BLOCK_SIZE)
+        self._cipher = DES.new(key, DES.MODE_CBC, iv=iv)
+        self._encoder = Base64Encoder()
+        self._header = self._encoder.update(iv)
+        self._pending = b""
+
+    def update(self, data: bytes) -> bytes:
+        data = self._pending + data
+        cut = len(data) - len(data) % BLOCK_SIZE
+        self._pending = data[cut:]
+
+        out = self._header + self._encoder.update(self._cipher.encrypt(data[:cut]))
+        self._header = b""
+        return out
+
+    def finalize(self) -> bytes:
+        last = self._cipher.encrypt(pad(self._pending, BLOCK_SIZE))
+        return self._header + self._encoder.update(last) + self._encoder.finalize()
+
+
+class _DESDecryptor(CipherStream):
+    """
+    Decodifica base 64, toma el IV y descifra con DES-CBC. El último
+    bloque se retiene hasta `finalize` para quitar el relleno.
+    """
+
+    def __init__(self, key: bytes) -> None:
+        self._key = key
+        self._decoder = Base64Decoder()
+        self._cipher = None
+        self._pending = b""
+
+    def update(self, data: bytes) -> bytes:
+        data = self._pending + self._decoder.update(data)
+
+        if self._cipher is None:
+            if len(data) < BLOCK_SIZE:
+                self._pending = data
+                return b""
+            self._cipher = DES.new(self._key, DES.MODE_CBC, iv=data[:BLOCK_SIZE])
+            data = data[BLOCK_SIZE:]
+
+        # Se conserva al menos un bloque completo para `finalize`
+        cut = max(0, len(data) - len(data) % BLOCK_SIZE - BLOCK_SIZE)
+        self._pending = data[cut:]
+        return self._cipher.decrypt(data[:cut])
+
+    def finalize(self) -> bytes:
+        self._decoder.finalize()
+        if self._cipher is None or len(self._pending) != BLOCK_SIZE:
+            raise ValueError("El texto cifrado de DES está incompleto")
+
+        return unpad(self._cipher.decrypt(self._pending), BLOCK_SIZE)
+
+
+class DESCipher(Cipher):
+    """
+    DES-CBC con IV aleatorio, sin archivos ni impresiones. El texto
+    cifrado es `base64(IV + ciphertext)`, el mismo formato que
+    `_encrypt_file`.
+    """
+
+    name = "des"
+
+    def __init__(self, key: bytes) -> None:
+        key = bytes(key)
+        if not _is_valid_key(key):
+            raise ValueError("DES necesita una llave de 8 bytes")
+        self.key = key
+
+    def encryptor(self) -> CipherStream:
+        return _DESEncryptor(self.key)
+
+    def decryptor(self) -> CipherStream:
+        return _DESDecryptor(self.key)
+
+
+@instrumented("des.encrypt_file", size_param="plaintext_file")
 @validate_key(_is_valid_key)
 @validate_file_DES("plaintext_file")
-def _encrypt_file(key: bytes, plaintext_file: str, ciphertext_file: str) -> None:
+def _encrypt_file(
+        key: bytes,
+        plaintext_file: str,
+        ciphertext_file: str,
+        compression: str | None = None,
+        ctx: ValidationContext | None = None,
+    ) -> str:
     """
     Cifra un archivo de texto usando DES e IV (Initialization Vector)
     de 8 bytes para hacer el cifrado no determinista.
 
     Después del cifrafo se creará un archivo de texto con el resultado
-    del cifrado `ciphertext_file`.
+    del cifrado `ciphertext_file`. Con `compression` (`zlib` o `lzma`)
+    el archivo se comprime antes de cifrarse y el resultado empieza
+    con la línea del codec, salvo que casi no se comprima.
 
     :param key: Llave en base 64 de 8 bytes.
     :type key: bytes
@@ -77,30 +212,49 @@ def _encrypt_file(key: bytes, plaintext_file: str, ciphertext_file: str) -> None
     :type plaintext_file: str
     :param ciphertext_file: Archivo de texto con el ciphertext.
     :type ciphertext_file: str
+    :param compression: Codec de compresión o `None` para no comprimir.
+    :type compression: str | None
+    :param ctx: Contexto de validación con el archivo ya abierto.
+    :type ctx: ValidationContext | None
+    :return: Nombre del archivo cifrado.
+    :rtype: str
     """
-    with open(BASE_DIR / plaintext_file, "rb") as f:
-        data = f.read()
-
-    iv = get_random_bytes(8)  # Bloque de 8 bytes para DES
-    cipher = DES.new(key, DES.MODE_CBC, iv=iv)
-
-    ciphertext = cipher.encrypt(pad(data, 8))
+    plaintext = ctx.read(plaintext_file)
+    level = choose_level(compression, plaintext) if compression else None
+
+    if level is None:
+        ciphertext = DESCipher(key).encrypt(plaintext)
+    else:
+        stream = chain(Compressor(compression, level), DESCipher(key).encryptor())
+        ciphertext = b"".join((
+            pack_header(compression, level),
+            stream.update(plaintext),
+            stream.finalize(),
+        ))
 
     with open(BASE_DIR / ciphertext_file, "wb") as f:
-        f.write(base64.b64encode(iv + ciphertext))
+        f.write(ciphertext)
 
     print(
         f"\n{yellow('>>')} "
         f"{success(f'Archivo cifrado correctamente y guardado como {ciphertext_file}')}"
     )
+    return ciphertext_file
 
 
+@instrumented("des.decrypt_file", size_param="ciphertext_file")
 @validate_key(_is_valid_key)
-@validate_file_DES("ciphertext_file")
-def _decrypt_file(key: bytes, ciphertext_file: str, output_file: str) -> None:
+@validate_file("ciphertext_file")
+def _decrypt_file(
+        key: bytes,
+        ciphertext_file: str,
+        output_file: str,
+        ctx: ValidationContext | None = None,
+    ) -> str | None:
     """
     Descifra un archivo de texto usando DES e IV (Initialization Vector)
-    de 8 bytes.
+    de 8 bytes. Si el archivo tiene la línea de compresión, descomprime
+    al mismo tiempo.
 
     Después del descifrado se creará un archivo de texto con el
     resultado del descifrado `output_file`.
@@ -112,23 +266,39 @@ def _decrypt_file(key: bytes, ciphertext_file: str, output_file: str) -> None:
     :param output_file: Archivo original recuperado después del
                         descifrado.
     :type output_file: str
+    :param ctx: Contexto de validación con el archivo ya abierto.
+    :type ctx: ValidationContext | None
+    :return: Nombre del archivo recuperado o `None` si hubo un error.
+    :rtype: str | None
     """
-    with open(BASE_DIR / ciphertext_file, "rb") as f:
-        data = base64.b64decode(f.read())
-
-    iv = data[:8]
-    ciphertext = data[8:]
+    ciphertext = ctx.read(ciphertext_file)
+    output_path = BASE_DIR / output_file
+
+    try:
+        header = parse_header(ciphertext)
+        if header is None:
+            stream = DESCipher(key).decryptor()
+        else:
+            codec, _, length = header
+            ciphertext = ciphertext[length:]
+            stream = chain(DESCipher(key).decryptor(), Decompressor(codec))
+
+        # La salida se escribe por partes: descomprimida puede ser mucho
+        # más grande que el archivo cifrado
+        with open(output_path, "wb") as f:
+            for part in feed(stream, ciphertext):
+                f.write(part)
+            f.write(stream.finalize())
+    except ValueError as e:
+        output_path.unlink(missing_ok=True)
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
 
-    cipher = DES.new(key, DES.MODE_CBC, iv=iv)
-    plaintext = unpad(cipher.decrypt(ciphertext), 8)
-
-    with open(BASE_DIR / output_file, "wb") as f:
-        f.write(plaintext)
-    
     print(
         f"\n{yellow('>>')} "
         f"{success(f'Archivo descifrado correctamente y guardado como {output_file}')}"
     )
+    return output_file
 
 
 def block_cipher_menu() -> None:
@@ -152,14 +322,11 @@ def block_cipher_menu() -> None:
                 _random_key_generator()
                 wait_key()
             case "2":
-                key_base64 = input("\nEscribe la llave en base 64: ")
+                key_base64 = input("\nEscribe la llave en base 64 (o ring:<id>): ")
                 try:
-                    key = base64.b64decode(key_base64)
-                except Exception:
-                    print(
-                        f"\n{yellow('>>')} {error('ERROR')}"
-                        ": La llave en base64 no es válida"
-                    )
+                    key = _parse_key(key_base64)
+                except (ValueError, OSError) as e:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
                     wait_key()
                     continue
 
@@ -167,17 +334,22 @@ def block_cipher_menu() -> None:
                 outfile = input(
                     "Escribe el nombre del archivo donde se almacenará el 'ciphertext': "
                 )
-                _encrypt_file(key, infile, outfile)
+                compression = input(
+                    "Compresión antes de cifrar (zlib, lzma o Enter para ninguna): "
+                ).strip().lower() or None
+                if compression not in (None, "zlib", "lzma"):
+                    print(f"\n{yellow('>>')} {error('ERROR')}: Compresión no válida")
+                    wait_key()
+                    continue
+
+                _encrypt_file(key, infile, outfile, compression)
                 wait_key()
             case "3":
-                key_base64 = input("\nEscribe la llave en base 64: ")
+                key_base64 = input("\nEscribe la llave en base 64 (o ring:<id>): ")
                 try:
-                    key = base64.b64decode(key_base64)
-                except Exception:
-                    print(
-                        f"\n{yellow('>>')} {error('ERROR')}"
-                        ": La llave en base64 no es válida"
-                    )
+                    key = _parse_key(key_base64)
+                except (ValueError, OSError) as e:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
                     wait_key()
                     continue
 
@@ -0,0 +1,72 @@
+"""Cifrado de archivos con DES desde `asyncio`."""
+
+from ciphers import transform_file_async
+from config import BASE_DIR
+
+from .block_cipher import DESCipher
+
+__all__ = [
+    "encrypt_file_async",
+    "decrypt_file_async",
+]
+
+
+async def encrypt_file_async(
+        key: bytes,
+        plaintext_file: str,
+        ciphertext_file: str,
+        compression: str | None = None,
+    ) -> str:
+    """
+    Versión para `asyncio` de `_encrypt_file`: mismo formato
+    (`base64(IV + ciphertext)`, con la línea del codec si se comprime),
+    sin impresiones y lanzando excepciones en lugar de devolver `None`.
+    No exige el tamaño mínimo de 100 KB.
+
+    :param key: Llave de 8 bytes.
+    :type key: bytes
+    :param plaintext_file: Archivo con el plaintext.
+    :type plaintext_file: str
+    :param ciphertext_file: Archivo con el ciphertext.
+    :type ciphertext_file: str
+    :param compression: Codec de compresión o `None` para no comprimir.
+    :type compression: str | None
+    :return: Nombre del archivo cifrado.
+    :rtype: str
+    """
+    cipher = DESCipher(key)
+    await transform_file_async(
+        cipher.encryptor,
+        BASE_DIR / plaintext_file,
+        BASE_DIR / ciphertext_file,
+        compression=compression,
+    )
+    return ciphertext_file
+
+
+async def decrypt_file_async(
+        key: bytes,
+        ciphertext_file: str,
+        output_file: str,
+    ) -> str:
+    """
+    Versión para `asyncio` de `_decrypt_file`; si el archivo tiene la
+    línea de compresión, descomprime al mismo tiempo.
+
+    :param key: Llave de 8 bytes.
+    :type key: bytes
+    :param ciphertext_file: Archivo con el ciphertext.
+    :type ciphertext_file: str
+    :param output_file: Archivo original recuperado.
+    :type output_file: str
+    :return: Nombre del archivo recuperado.
+    :rtype: str
+    """
+    cipher = DESCipher(key)
+    await transform_file_async(
+        cipher.decryptor,
+        BASE_DIR / ciphertext_file,
+        BASE_DIR / output_file,
+        decompress=True,
+    )
+    return output_file
@@ -0,0 +1,49 @@
+from .ciphers import (
+    Cipher,
+    CipherStream,
+    feed,
+    BufferedStream,
+    BufferedTextStream,
+    TextStream,
+    Base64Encoder,
+    Base64Decoder,
+    register_cipher,
+    get_cipher,
+    available_ciphers,
+)
+from .compression import (
+    Compressor,
+    Decompressor,
+    chain,
+    choose_level,
+    pack_header,
+    parse_header,
+    read_header,
+)
+from .async_io import (
+    set_max_concurrency,
+    transform_file_async,
+)
+
+__all__ = [
+    "Cipher",
+    "CipherStream",
+    "feed",
+    "BufferedStream",
+    "BufferedTextStream",
+    "TextStream",
+    "Base64Encoder",
+    "Base64Decoder",
+    "register_cipher",
+    "get_cipher",
+    "available_ciphers",
+    "Compressor",
+    "Decompressor",
+    "chain",
+    "choose_level",
+    "pack_header",
+    "parse_header",
+    "read_header",
+    "set_max_concurrency",
+    "transform_file_async",
+]
@@ -0,0 +1,195 @@
+"""
+Cifrado de archivos desde `asyncio` sin bloquear el ciclo de eventos.
+
+Las lecturas, el cifrado y las escrituras se hacen en hilos con
+`asyncio.to_thread`; el ciclo de eventos solo coordina. Un semáforo
+por ciclo de eventos limita cuántos archivos se procesan a la vez y,
+dentro de cada archivo, una cola acotada entre la lectura y la
+escritura hace que el lector espere si la escritura se atrasa.
+
+La compresión usa el mismo formato que los cifrados síncronos: al
+cifrar, la cabecera del codec va antes del cifrado; al descifrar, si el
+archivo la tiene, la salida se descomprime en la misma pasada.
+"""
+
+import asyncio
+import os
+import weakref
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+)
+
+from progress import adaptive_chunk_size
+
+from .ciphers import (
+    CipherStream,
+    feed,
+)
+from .compression import (
+    Compressor,
+    Decompressor,
+    chain,
+    choose_level,
+    pack_header,
+    read_header,
+)
+
+__all__ = [
+    "set_max_concurrency",
+    "transform_file_async",
+]
+
+MAX_CONCURRENCY = 8  # Archivos procesados a la vez por ciclo de eventos
+MAX_CHUNK_SIZE = 1024 * 1024  # Con muchos archivos a la vez, bloques chicos
+QUEUE_DEPTH = 2  # Bloques leídos que pueden esperar a ser escritos
+
+_max_concurrency = MAX_CONCURRENCY
+_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def set_max_concurrency(limit: int) -> None:
+    """
+    Cambia el número de archivos que se procesan a la vez. Aplica a
+    los ciclos de eventos que todavía no han cifrado nada.
+
+    :param limit: Máximo de operaciones simultáneas.
+    :type limit: int
+    """
+    global _max_concurrency
+    if limit < 1:
+        raise ValueError("El límite de concurrencia debe ser al menos 1")
+    _max_concurrency = limit
+    _semaphores.clear()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    """Semáforo del ciclo de eventos actual (uno por ciclo)."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_max_concurrency)
+    return semaphore
+
+
+def _open_source(source: Path) -> tuple[BinaryIO, int]:
+    """Abre `source` y elige el tamaño de bloque según su tamaño."""
+    fin = open(source, "rb")
+    try:
+        stat = os.fstat(fin.fileno())
+    except OSError:
+        fin.close()
+        raise
+    return fin, min(adaptive_chunk_size(stat), MAX_CHUNK_SIZE)
+
+
+def _prepare_stream(
+        make_stream: Callable[[], CipherStream],
+        fin: BinaryIO,
+        fout: BinaryIO,
+        chunk_size: int,
+        compression: str | None,
+        decompress: bool,
+    ) -> CipherStream:
+    """
+    Crea el flujo y le agrega la compresión si hace falta: con
+    `compression` elige el nivel sobre el primer bloque y escribe la
+    cabecera; con `decompress` lee la cabecera de `fin` si la tiene.
+    """
+    stream = make_stream()
+
+    if compression is not None:
+        start = fin.tell()
+        level = choose_level(compression, fin.read(chunk_size))
+        fin.seek(start)
+        if level is not None:
+            fout.write(pack_header(compression, level))
+            return chain(Compressor(compression, level), stream)
+    elif decompress:
+        header = read_header(fin)
+        if header is not None:
+            return chain(stream, Decompressor(header[0]))
+
+    return stream
+
+
+async def transform_file_async(
+        make_stream: Callable[[], CipherStream],
+        source: Path | str,
+        target: Path | str,
+        depth: int = QUEUE_DEPTH,
+        compression: str | None = None,
+        decompress: bool = False,
+    ) -> None:
+    """
+    Pasa el archivo `source` por el flujo que crea `make_stream` y
+    escribe el resultado en `target`. Si algo falla se borra `target`
+    y se relanza la excepción.
+
+    :param make_stream: Función que crea el cifrador o descifrador.
+    :type make_stream: Callable[[], CipherStream]
+    :param source: Archivo de entrada.
+    :type source: Path | str
+    :param target: Archivo de salida.
+    :type target: Path | str
+    :param depth: Bloques leídos que pueden esperar a ser escritos.
+    :type depth: int
+    :param compression: Al cifrar, codec (`zlib` o `lzma`) para
+                        comprimir antes del flujo.
+    :type compression: str | None
+    :param decompress: Al descifrar, descomprimir la salida si el
+                       archivo tiene cabecera de compresión.
+    :type decompress: bool
+    """
+    async with _semaphore():
+        fin, chunk_size = await asyncio.to_thread(_open_source, Path(source))
+        try:
+            fout = await asyncio.to_thread(open, target, "wb")
+        except BaseException:
+            await asyncio.to_thread(fin.close)
+            raise
+
+        stream: CipherStream | None = None
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=depth)
+
+        async def _reader() -> None:
+            try:
+                while chunk := await asyncio.to_thread(fin.read, chunk_size):
+                    await chunks.put(chunk)
+            except Exception as e:
+                await chunks.put(e)
+            else:
+                await chunks.put(b"")
+
+        def _write(chunk: bytes) -> None:
+            if not chunk:
+                fout.write(stream.finalize())
+                return
+            for part in feed(stream, chunk):
+                fout.write(part)
+
+        reader = None
+        try:
+            stream = await asyncio.to_thread(
+                _prepare_stream, make_stream, fin, fout, chunk_size, compression, decompress,
+            )
+            reader = asyncio.create_task(_reader())
+            while True:
+                chunk = await chunks.get()
+                if isinstance(chunk, Exception):
+                    raise chunk
+                await asyncio.to_thread(_write, chunk)
+                if not chunk:
+                    break
+        except BaseException:
+            if reader is not None:
+                reader.cancel()
+                await asyncio.gather(reader, return_exceptions=True)
+            await asyncio.to_thread(fout.close)
+            await asyncio.to_thread(Path(target).unlink, True)
+            raise
+        finally:
+            await asyncio.to_thread(fin.close)
+
+        await asyncio.to_thread(fout.close)
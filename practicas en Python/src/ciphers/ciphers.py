@@ -0,0 +1,258 @@
+"""Interfaz común de cifrado sobre bytes y registro de cifrados."""
+
+import base64
+import codecs
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from importlib import import_module
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+)
+
+__all__ = [
+    "Cipher",
+    "CipherStream",
+    "feed",
+    "BufferedStream",
+    "BufferedTextStream",
+    "TextStream",
+    "Base64Encoder",
+    "Base64Decoder",
+    "register_cipher",
+    "get_cipher",
+    "available_ciphers",
+]
+
+
+class CipherStream(ABC):
+    """
+    Objeto de cifrado o descifrado incremental. Se le pasan los datos
+    por partes con `update` y se termina con `finalize`; la
+    concatenación de todo lo que devuelven es el resultado completo.
+    """
+
+    @abstractmethod
+    def update(self, data: bytes) -> bytes:
+        """Procesa `data` y devuelve la salida disponible hasta ahora."""
+
+    @abstractmethod
+    def finalize(self) -> bytes:
+        """Procesa lo pendiente y devuelve el resto de la salida."""
+
+    @property
+    def pending(self) -> bool:
+        """
+        Indica si quedó salida retenida que se obtiene llamando a
+        `update(b"")`. Las etapas que acotan su salida (como
+        `Decompressor`) lo usan; las demás nunca retienen nada.
+        """
+        return False
+
+
+def feed(stream: CipherStream, data: bytes) -> Iterator[bytes]:
+    """
+    Pasa `data` por `stream` y devuelve la salida por partes, vaciando
+    lo retenido. Así un bloque de entrada que se expande mucho (datos
+    comprimidos) nunca está completo en memoria.
+
+    :param stream: Etapa de cifrado o descifrado.
+    :type stream: CipherStream
+    :param data: Datos de entrada.
+    :type data: bytes
+    :return: Partes de la salida.
+    :rtype: Iterator[bytes]
+    """
+    yield stream.update(data)
+    while stream.pending:
+        yield stream.update(b"")
+
+
+class Cipher(ABC):
+    """
+    Cifrado con una llave ya validada. Las operaciones trabajan en
+    memoria, no leen ni escriben archivos y no imprimen nada; los
+    errores se reportan con `ValueError`.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def encryptor(self) -> CipherStream:
+        """Devuelve un objeto de cifrado incremental."""
+
+    @abstractmethod
+    def decryptor(self) -> CipherStream:
+        """Devuelve un objeto de descifrado incremental."""
+
+    def encrypt(self, data: bytes) -> bytes:
+        """Cifra `data` completo."""
+        stream = self.encryptor()
+        return stream.update(data) + stream.finalize()
+
+    def decrypt(self, data: bytes) -> bytes:
+        """Descifra `data` completo."""
+        stream = self.decryptor()
+        return stream.update(data) + stream.finalize()
+
+
+def _decode_utf8(data: bytes, decoder: Any = None, final: bool = True) -> str:
+    try:
+        if decoder is None:
+            return data.decode("utf-8")
+        return decoder.decode(data, final)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"El texto no es UTF-8 válido: {e}") from e
+
+
+class BufferedStream(CipherStream):
+    """
+    Acumula toda la entrada y aplica `func` al final. Es para cifrados
+    que necesitan el mensaje completo (relleno, reinserción de
+    caracteres, longitud original).
+    """
+
+    def __init__(self, func: Callable[[bytes], bytes]) -> None:
+        self._func = func
+        self._chunks: list[bytes] = []
+
+    def update(self, data: bytes) -> bytes:
+        self._chunks.append(bytes(data))
+        return b""
+
+    def finalize(self) -> bytes:
+        return self._func(b"".join(self._chunks))
+
+
+class BufferedTextStream(BufferedStream):
+    """
+    `BufferedStream` para cifrados de texto: decodifica la entrada
+    completa como UTF-8, aplica `func` y codifica el resultado.
+    """
+
+    def __init__(self, func: Callable[[str], str]) -> None:
+        super().__init__(lambda data: func(_decode_utf8(data)).encode("utf-8"))
+
+
+class TextStream(CipherStream):
+    """
+    Decodifica UTF-8 de forma incremental y aplica `func` a cada parte
+    del texto. Es para cifrados que transforman carácter por carácter;
+    un carácter partido entre dos `update` espera al siguiente.
+    """
+
+    def __init__(self, func: Callable[[str], str]) -> None:
+        self._func = func
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def _process(self, data: bytes, final: bool) -> bytes:
+        return self._func(_decode_utf8(data, self._decoder, final)).encode("utf-8")
+
+    def update(self, data: bytes) -> bytes:
+        return self._process(data, False)
+
+    def finalize(self) -> bytes:
+        return self._process(b"", True)
+
+
+class Base64Encoder:
+    """Codifica en base 64 por partes, en grupos de 3 bytes."""
+
+    def __init__(self) -> None:
+        self._pending = b""
+
+    def update(self, data: bytes) -> bytes:
+        data = self._pending + data
+        cut = len(data) - len(data) % 3
+        self._pending = data[cut:]
+        return base64.b64encode(data[:cut])
+
+    def finalize(self) -> bytes:
+        out = base64.b64encode(self._pending)
+        self._pending = b""
+        return out
+
+
+class Base64Decoder:
+    """Decodifica base 64 por partes, en grupos de 4 caracteres."""
+
+    def __init__(self) -> None:
+        self._pending = b""
+
+    def update(self, data: bytes) -> bytes:
+        data = self._pending + b"".join(data.split())
+        cut = len(data) - len(data) % 4
+        self._pending = data[cut:]
+        return self._decode(data[:cut])
+
+    def finalize(self) -> bytes:
+        if self._pending:
+            raise ValueError("Base 64 incompleto")
+        return b""
+
+    @staticmethod
+    def _decode(data: bytes) -> bytes:
+        try:
+            return base64.b64decode(data, validate=True)
+        except ValueError as e:
+            raise ValueError(f"Base 64 no válido: {e}") from e
+
+
+# Nombre del cifrado -> (módulo, clase). Los módulos se importan solo
+# cuando se pide el cifrado, igual que en el menú principal.
+_REGISTRY: dict[str, tuple[str, str]] = {
+    "shift": ("shift_cipher.shift_cipher", "ShiftCipher"),
+    "affin": ("affin_cipher.affin_cipher", "AffinCipher"),
+    "hill": ("hill_cipher.hill_cipher", "HillCipher"),
+    "permutation": ("permutation_cipher.permutation_cipher", "PermutationCipher"),
+    "permutation-bits": ("permutation_cipher.permutation_cipher", "BitPermutationCipher"),
+    "des": ("block_cipher.block_cipher", "DESCipher"),
+    "aes": ("aes_cipher.aes_cipher", "AESCipher"),
+    "aes-gcm": ("aes_cipher.aes_gcm", "AESGCMCipher"),
+    "aes-numpy": ("aes_numpy.aes_numpy", "AESNumpyCipher"),
+    "aes2": ("aes_cipher_2.aes_cipher_2", "AESCipherV2"),
+    "tbc": ("tiny_block_cipher.tiny_block_cipher", "TinyBlockCipher"),
+}
+
+
+def register_cipher(name: str, module_name: str, class_name: str) -> None:
+    """
+    Registra un cifrado para `get_cipher`.
+
+    :param name: Nombre con el que se pide el cifrado.
+    :type name: str
+    :param module_name: Módulo que define la clase.
+    :type module_name: str
+    :param class_name: Subclase de `Cipher` en ese módulo.
+    :type class_name: str
+    """
+    _REGISTRY[name] = (module_name, class_name)
+
+
+def available_ciphers() -> list[str]:
+    """Nombres de los cifrados registrados."""
+    return list(_REGISTRY)
+
+
+def get_cipher(name: str, key: Any, **options: Any) -> Cipher:
+    """
+    Crea el cifrado `name` con la llave `key`.
+
+    :param name: Nombre del cifrado registrado.
+    :type name: str
+    :param key: Llave en el formato que espera el cifrado.
+    :type key: Any
+    :param options: Opciones adicionales del cifrado.
+    :type options: Any
+    :return: Cifrado listo para usarse.
+    :rtype: Cipher
+    """
+    if name not in _REGISTRY:
+        raise ValueError(f"Cifrado desconocido: {name}")
+
+    module_name, class_name = _REGISTRY[name]
+    cipher_class = getattr(import_module(module_name), class_name)
+    return cipher_class(key, **options)
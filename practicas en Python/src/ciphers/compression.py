@@ -0,0 +1,265 @@
+"""
+Compresión antes del cifrado.
+
+Un `Compressor` es un `CipherStream` que comprime con zlib o lzma por
+bloques; se encadena delante del cifrador con `chain`, así que los
+datos se comprimen y cifran en una sola pasada. Al descifrar, la
+salida de `Decompressor` está acotada y se vacía con `feed`. El nivel se elige con
+`choose_level` a partir de una muestra del primer bloque: si la muestra
+casi no se comprime, no se usa compresión y el archivo queda en el
+formato de siempre.
+
+Los archivos comprimidos empiezan con una línea en claro con el codec y
+el nivel (`#zlib:6\\n`). El `#` no puede ser el primer byte de los
+formatos anteriores (AES empieza con la longitud del nonce y DES es
+base 64), así que `read_header` distingue ambos casos al descifrar.
+"""
+
+import lzma
+import zlib
+from typing import (
+    Any,
+    BinaryIO,
+)
+
+from .ciphers import CipherStream
+
+__all__ = [
+    "CODECS",
+    "SAMPLE_SIZE",
+    "Compressor",
+    "Decompressor",
+    "chain",
+    "choose_level",
+    "pack_header",
+    "parse_header",
+    "read_header",
+]
+
+SAMPLE_SIZE = 256 * 1024  # Bytes del primer bloque usados para elegir el nivel
+OUTPUT_SIZE = 1024 * 1024  # Bytes máximos que devuelve cada `update` al descomprimir
+INPUT_STEP = 64 * 1024  # Bytes comprimidos que se entregan al codec a la vez
+
+# Niveles (rápido, normal, alto) de cada codec
+CODECS: dict[str, tuple[int, int, int]] = {
+    "zlib": (1, 6, 9),
+    "lzma": (0, 1, 3),
+}
+
+STORE_RATIO = 0.9  # Con una razón mayor no vale la pena comprimir
+HIGH_RATIO = 0.05  # Con una razón menor el nivel alto casi no cuesta
+
+_MAGIC = b"#"
+_MAX_HEADER = 16
+
+
+def choose_level(codec: str, sample: bytes) -> int | None:
+    """
+    Elige el nivel de `codec` comprimiendo `sample` con zlib en su nivel
+    más rápido. Devuelve `None` si la muestra casi no se comprime
+    (datos cifrados, comprimidos o aleatorios).
+
+    :param codec: `zlib` o `lzma`.
+    :type codec: str
+    :param sample: Primeros bytes de la entrada.
+    :type sample: bytes
+    :return: Nivel a usar o `None` para no comprimir.
+    :rtype: int | None
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Codec desconocido: {codec}")
+    if not sample:
+        return None
+
+    ratio = len(zlib.compress(sample[:SAMPLE_SIZE], 1)) / len(sample[:SAMPLE_SIZE])
+    fast, normal, high = CODECS[codec]
+
+    if ratio > STORE_RATIO:
+        return None
+    if ratio < HIGH_RATIO:
+        return high
+    return normal if ratio < 0.5 else fast
+
+
+def pack_header(codec: str, level: int) -> bytes:
+    """Línea de cabecera `#codec:nivel\\n`."""
+    return _MAGIC + f"{codec}:{level}\n".encode("ascii")
+
+
+def parse_header(data: bytes) -> tuple[str, int, int] | None:
+    """
+    Lee la cabecera al inicio de `data`. Devuelve el codec, el nivel y
+    la longitud de la cabecera, o `None` si `data` no empieza con una.
+    Lanza `ValueError` si la cabecera está dañada.
+
+    :param data: Inicio del archivo.
+    :type data: bytes
+    :return: `(codec, nivel, longitud)` o `None`.
+    :rtype: tuple[str, int, int] | None
+    """
+    if not data.startswith(_MAGIC):
+        return None
+
+    end = data.find(b"\n", 0, _MAX_HEADER)
+    try:
+        if end < 0:
+            raise ValueError
+        codec, level = data[1:end].decode("ascii").split(":")
+        level = int(level)
+        if codec not in CODECS:
+            raise ValueError
+    except ValueError:
+        raise ValueError("La cabecera de compresión no es válida") from None
+
+    return codec, level, end + 1
+
+
+def read_header(fin: BinaryIO) -> tuple[str, int] | None:
+    """
+    Lee la cabecera de `fin` si la tiene; si no, deja `fin` donde
+    estaba.
+
+    :param fin: Archivo cifrado abierto en modo binario.
+    :type fin: BinaryIO
+    :return: `(codec, nivel)` o `None`.
+    :rtype: tuple[str, int] | None
+    """
+    start = fin.tell()
+    header = parse_header(fin.read(_MAX_HEADER))
+    if header is None:
+        fin.seek(start)
+        return None
+
+    codec, level, length = header
+    fin.seek(start + length)
+    return codec, level
+
+
+class Compressor(CipherStream):
+    """Comprime por bloques con `codec` al nivel indicado."""
+
+    def __init__(self, codec: str, level: int) -> None:
+        if codec == "zlib":
+            self._compressor: Any = zlib.compressobj(level)
+        elif codec == "lzma":
+            self._compressor = lzma.LZMACompressor(preset=level)
+        else:
+            raise ValueError(f"Codec desconocido: {codec}")
+
+    def update(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finalize(self) -> bytes:
+        return self._compressor.flush()
+
+
+class Decompressor(CipherStream):
+    """
+    Descomprime por bloques. Cada `update` devuelve a lo más
+    `OUTPUT_SIZE` bytes; si queda salida, `pending` es verdadero y se
+    obtiene con `update(b"")` (ver `feed`). Así un archivo pequeño que
+    se expande a gigabytes se descomprime con memoria acotada. Lanza
+    `ValueError` si el flujo está dañado o incompleto.
+    """
+
+    def __init__(self, codec: str) -> None:
+        if codec == "zlib":
+            self._decompressor: Any = zlib.decompressobj()
+        elif codec == "lzma":
+            self._decompressor = lzma.LZMADecompressor()
+        else:
+            raise ValueError(f"Codec desconocido: {codec}")
+        self._codec = codec
+        self._input = memoryview(b"")
+        self._offset = 0
+        self._more = False  # El codec puede tener salida sin pedir entrada
+
+    @property
+    def pending(self) -> bool:
+        return not self._decompressor.eof and (
+            self._offset < len(self._input) or self._more
+        )
+
+    def _step(self, limit: int) -> bytes:
+        """Una llamada al codec con a lo más `INPUT_STEP` bytes de entrada."""
+        decompressor = self._decompressor
+        if self._codec == "zlib":
+            piece = self._input[self._offset:self._offset + INPUT_STEP]
+            out = decompressor.decompress(piece, limit)
+            self._offset += len(piece) - len(decompressor.unconsumed_tail)
+            self._more = len(out) == limit
+        else:
+            # lzma guarda la entrada que no usó; solo se le da más cuando la pide
+            piece = b""
+            if decompressor.needs_input:
+                piece = self._input[self._offset:self._offset + INPUT_STEP]
+            out = decompressor.decompress(piece, limit)
+            self._offset += len(piece)
+            self._more = not decompressor.needs_input
+        return out
+
+    def update(self, data: bytes) -> bytes:
+        if self._decompressor.eof:
+            if data:
+                raise ValueError("Hay datos después del final del flujo comprimido")
+            return b""
+
+        if data:
+            rest = self._input[self._offset:]
+            self._input = memoryview(bytes(rest) + bytes(data) if rest else bytes(data))
+            self._offset = 0
+
+        parts, size = [], 0
+        try:
+            while size < OUTPUT_SIZE and self.pending:
+                out = self._step(OUTPUT_SIZE - size)
+                parts.append(out)
+                size += len(out)
+        except (zlib.error, lzma.LZMAError):
+            raise ValueError("Los datos comprimidos están dañados") from None
+
+        if self._decompressor.eof and (
+            self._decompressor.unused_data or self._offset < len(self._input)
+        ):
+            raise ValueError("Hay datos después del final del flujo comprimido")
+        return b"".join(parts)
+
+    def finalize(self) -> bytes:
+        # Lo retenido viene de la última entrada, así que es poco
+        parts = []
+        while self.pending:
+            parts.append(self.update(b""))
+        if not self._decompressor.eof:
+            raise ValueError("Los datos comprimidos están incompletos")
+        return b"".join(parts)
+
+
+class _Chain(CipherStream):
+    def __init__(self, first: CipherStream, second: CipherStream) -> None:
+        self._first = first
+        self._second = second
+
+    def update(self, data: bytes) -> bytes:
+        return self._second.update(self._first.update(data))
+
+    @property
+    def pending(self) -> bool:
+        return self._first.pending or self._second.pending
+
+    def finalize(self) -> bytes:
+        return self._second.update(self._first.finalize()) + self._second.finalize()
+
+
+def chain(first: CipherStream, second: CipherStream) -> CipherStream:
+    """
+    Encadena dos etapas: la salida de `first` es la entrada de
+    `second` (por ejemplo, comprimir y luego cifrar).
+
+    :param first: Primera etapa.
+    :type first: CipherStream
+    :param second: Segunda etapa.
+    :type second: CipherStream
+    :return: Etapa combinada.
+    :rtype: CipherStream
+    """
+    return _Chain(first, second)
@@ -0,0 +1,631 @@
+"""
+Interfaz de línea de comandos, sin menús ni `input()`.
+
+Ejemplos (desde la carpeta del proyecto):
+
+    py src/cli.py aes keygen --size 32 --name llave
+    py src/cli.py aes encrypt --key data/llave_32.key a.pdf b.pdf -j 4
+    py src/cli.py aes encrypt --key data/llave_32.key log.txt --compress zlib
+    py src/cli.py aes keygen --size 32 --name llave --password --kdf scrypt
+    py src/cli.py aes encrypt --key data/llave_32.kdf a.pdf b.pdf -j 4
+    py src/cli.py aes encrypt-tree --key data/llave_32.key fotos --out-dir fotos_enc
+    py src/cli.py aes encrypt-tree --key data/llave_32.key fotos --out-dir fotos_enc --sync
+    py src/cli.py aes rekey --key data/vieja.key --new-key data/nueva.key a.pdf.enc
+    py src/cli.py aes rekey --key data/llave.key --to des --new-key <base64> a.pdf.enc
+    py src/cli.py aes-gcm encrypt --key data/llave_32.key a.pdf
+    py src/cli.py aes decrypt --key ring:llave_32 a.pdf.enc
+    py src/cli.py des encrypt --key <base64> --manifest lote.txt
+    py src/cli.py shift decrypt --key 3 cifrado.txt
+    py src/cli.py rsa keygen --bits 512 --backend sieve
+
+Las rutas relativas se toman desde el directorio actual. Los archivos
+de entrada se procesan con un grupo de hilos y una cola acotada; al
+final se imprime el rendimiento total. El programa termina con código
+0 si todo salió bien, 1 si falló algún archivo y 2 si los argumentos
+no son válidos.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+)
+
+from progress import set_batch_mode
+from utils import (
+    error,
+    success,
+    yellow,
+)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+# (archivo de entrada, archivo de salida o None para el valor por defecto)
+Job = tuple[str, str | None]
+Task = Callable[[str, str | None], Any]
+
+
+def _path(filename: str) -> str:
+    """Ruta absoluta; las funciones de cifrado la usan tal cual."""
+    return str(Path(filename).resolve())
+
+
+def _key_path(value: str) -> str:
+    """Como `_path`, pero deja tal cual las referencias `ring:<id>`."""
+    from key_ring import is_reference
+
+    return value if is_reference(value) else _path(value)
+
+
+def _output_base(src: str, out_dir: str | None) -> Path:
+    """Ruta base de la salida: junto a la entrada o dentro de `out_dir`."""
+    if out_dir is None:
+        return Path(src)
+    return Path(out_dir).resolve() / Path(src).name
+
+
+def _load_manifest(manifest: str) -> list[Job]:
+    """
+    Lee un manifiesto con un archivo por línea. Cada línea tiene la
+    entrada y, opcionalmente, la salida separada por un tabulador. Las
+    líneas vacías y las que empiezan con `#` se ignoran.
+
+    :param manifest: Ruta del manifiesto.
+    :type manifest: str
+    :return: Lista de trabajos.
+    :rtype: list[Job]
+    """
+    jobs: list[Job] = []
+
+    with open(manifest, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+
+            src, _, dst = line.partition("\t")
+            jobs.append((_path(src), _path(dst) if dst else None))
+
+    return jobs
+
+
+def _run_jobs(
+        task: Task,
+        jobs: list[Job],
+        workers: int,
+        queue_size: int,
+    ) -> int:
+    """
+    Ejecuta `task` sobre cada trabajo con un grupo de hilos. Como
+    mucho hay `queue_size` trabajos pendientes a la vez, así que los
+    manifiestos grandes no se cargan completos en la cola.
+
+    Una tarea falla si lanza una excepción o si devuelve `None` (los
+    decoradores de validación devuelven `None` cuando algo no es
+    válido).
+
+    :param task: Función que procesa `(entrada, salida)`.
+    :type task: Task
+    :param jobs: Trabajos a procesar.
+    :type jobs: list[Job]
+    :param workers: Número de hilos.
+    :type workers: int
+    :param queue_size: Máximo de trabajos pendientes.
+    :type queue_size: int
+    :return: Código de salida.
+    :rtype: int
+    """
+    slots = threading.BoundedSemaphore(queue_size)
+    lock = threading.Lock()
+    totals = {"ok": 0, "failed": 0, "bytes": 0}
+
+    def _done(future: Future, src: str) -> None:
+        slots.release()
+
+        try:
+            result = future.result()
+        except Exception as e:
+            result = None
+            print(f"\n{yellow('>>')} {error('ERROR')}: {src}: {e}", file=sys.stderr)
+
+        with lock:
+            if result is None:
+                totals["failed"] += 1
+            else:
+                totals["ok"] += 1
+                totals["bytes"] += os.path.getsize(src)
+
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for src, dst in jobs:
+            slots.acquire()
+            future = pool.submit(task, src, dst)
+            future.add_done_callback(lambda f, src=src: _done(f, src))
+
+    elapsed = time.perf_counter() - start
+    megabytes = totals["bytes"] / (1024 * 1024)
+    speed = megabytes / elapsed if elapsed > 0 else 0.0
+
+    print(
+        f"\n{yellow('>>')} {totals['ok']} archivos correctos, "
+        f"{totals['failed']} con error",
+        file=sys.stderr,
+    )
+    print(
+        f"{yellow('>>')} {megabytes:.2f} MB en {elapsed:.3f} segundos "
+        f"({speed:.2f} MB/s)",
+        file=sys.stderr,
+    )
+
+    return EXIT_FAILED if totals["failed"] else EXIT_OK
+
+
+def _strip_suffix(path: Path, suffix: str, fallback: str) -> str:
+    name = str(path)
+    if name.endswith(suffix):
+        return name.removesuffix(suffix)
+    return name + fallback
+
+
+def _shift_task(args: argparse.Namespace) -> Task:
+    from shift_cipher.shift_cipher import (
+        _encrypt_shift,
+        _decrypt_shift,
+    )
+
+    key = int(args.key)
+    if args.action == "encrypt":
+        return lambda src, dst: _encrypt_shift(
+            key, src, dst or f"{_output_base(src, args.out_dir)}.cif"
+        )
+    return lambda src, dst: _decrypt_shift(key, src)
+
+
+def _affin_task(args: argparse.Namespace) -> Task:
+    from affin_cipher.affin_cipher import (
+        _encrypt_affin,
+        _decrypt_affin,
+    )
+
+    a, b = (int(part) for part in args.key.split(","))
+    if args.action == "encrypt":
+        return lambda src, dst: _encrypt_affin(
+            (a, b), src, dst or f"{_output_base(src, args.out_dir)}.cif"
+        )
+    return lambda src, dst: _decrypt_affin((a, b), src)
+
+
+def _hill_task(args: argparse.Namespace) -> Task:
+    from hill_cipher.hill_cipher import (
+        _convert_key_format,
+        _encrypt_hill,
+        _decrypt_hill,
+    )
+
+    key = _convert_key_format(", ".join(part.strip() for part in args.key.split(",")))
+    if args.action == "encrypt":
+        return lambda src, dst: _encrypt_hill(
+            key, src, dst or f"{_output_base(src, args.out_dir)}.cif"
+        )
+    return lambda src, dst: _decrypt_hill(key, src)
+
+
+def _permutation_task(args: argparse.Namespace) -> Task:
+    from permutation_cipher.permutation_cipher import (
+        _encrypt_permutation,
+        _decrypt_permutation,
+    )
+
+    permutation_file = _path(args.key)
+    if args.action == "encrypt":
+        return lambda src, dst: _encrypt_permutation(src, permutation_file)
+    return lambda src, dst: _decrypt_permutation(src, permutation_file)
+
+
+def _des_task(args: argparse.Namespace) -> Task:
+    from block_cipher.block_cipher import (
+        _encrypt_file,
+        _decrypt_file,
+        _parse_key,
+    )
+
+    key = _parse_key(args.key)
+    if args.action == "encrypt":
+        return lambda src, dst: _encrypt_file(
+            key, src, dst or f"{_output_base(src, args.out_dir)}.cif", args.compress
+        )
+    return lambda src, dst: _decrypt_file(
+        key, src, dst or _strip_suffix(_output_base(src, args.out_dir), ".cif", ".dec")
+    )
+
+
+def _aes_task(args: argparse.Namespace) -> Task:
+    from aes_cipher.aes_cipher import (
+        _encrypt_file,
+        _decrypt_file,
+    )
+
+    key_filename = _key_path(args.key)
+    if args.action == "encrypt":
+        # `_encrypt_file` agrega la extensión original y `.enc`
+        return lambda src, dst: _encrypt_file(
+            key_filename,
+            src,
+            dst or str(_output_base(src, args.out_dir).with_suffix("")),
+            args.compress,
+        )
+    return lambda src, dst: _decrypt_file(key_filename, src)
+
+
+def _aes_gcm_task(args: argparse.Namespace) -> Task:
+    from aes_cipher.aes_gcm import (
+        _encrypt_file_gcm,
+        _decrypt_file_gcm,
+    )
+
+    key_filename = _key_path(args.key)
+    if args.action == "encrypt":
+        # `_encrypt_file_gcm` agrega la extensión original y `.gcm`
+        return lambda src, dst: _encrypt_file_gcm(
+            key_filename,
+            src,
+            dst or str(_output_base(src, args.out_dir).with_suffix("")),
+        )
+    return lambda src, dst: _decrypt_file_gcm(key_filename, src)
+
+
+def _aes_2_task(args: argparse.Namespace) -> Task:
+    from aes_cipher_2.aes_cipher_2 import (
+        _encrypt_file,
+        _decryp_file,
+    )
+
+    key_filename = _key_path(args.key)
+    if args.action == "encrypt":
+        # `_encrypt_file` agrega la extensión original y `.txt`
+        return lambda src, dst: _encrypt_file(
+            key_filename,
+            src,
+            dst or str(_output_base(src, args.out_dir).with_suffix("")),
+        )
+
+    def _decrypt(src: str, dst: str | None) -> str | None:
+        if dst is None:
+            base = Path(str(_output_base(src, args.out_dir)).removesuffix(".txt"))
+            dst = f"{base.with_suffix('')}_recuperado"
+        return _decryp_file(key_filename, src, dst)
+
+    return _decrypt
+
+
+def _rekey_task(args: argparse.Namespace) -> Task:
+    from aes_cipher.rekey import (
+        FORMATS,
+        _load_key,
+        _output_name,
+        rekey_file,
+    )
+
+    source = args.cipher
+    target = args.to or source
+    if source not in FORMATS:
+        raise ValueError(f"rekey solo está disponible para {', '.join(FORMATS)}")
+
+    def _key(fmt: str, value: str) -> bytes:
+        return _load_key(fmt, value if fmt == "des" else _key_path(value))
+
+    old_key = _key(source, args.key)
+    new_key = _key(target, args.new_key)
+
+    def _rekey(src: str, dst: str | None) -> str | None:
+        if dst is None and args.out_dir is not None:
+            dst = _output_name(str(_output_base(src, args.out_dir)), source, target)
+        return rekey_file(old_key, new_key, src, dst, source, target)
+
+    return _rekey
+
+
+# Operaciones cuyo archivo de salida lo decide la función (o que solo
+# imprimen el resultado), así que no aceptan --out ni --out-dir
+_FIXED_OUTPUT = {
+    ("shift", "decrypt"),
+    ("affin", "decrypt"),
+    ("hill", "decrypt"),
+    ("permutation", "encrypt"),
+    ("permutation", "decrypt"),
+    ("aes", "decrypt"),
+    ("aes-gcm", "decrypt"),
+}
+
+# Operaciones que reciben un nombre base y le agregan la extensión del
+# archivo original y la suya (`a.txt` -> `<base>.txt.enc`)
+_BASE_OUTPUT: dict[tuple[str, str], str] = {
+    ("aes", "encrypt"): ".enc",
+    ("aes-gcm", "encrypt"): ".gcm",
+    ("aes2", "encrypt"): ".txt",
+}
+
+# Cifrados que procesan archivos
+_TASKS: dict[str, Callable[[argparse.Namespace], Task]] = {
+    "shift": _shift_task,
+    "affin": _affin_task,
+    "hill": _hill_task,
+    "permutation": _permutation_task,
+    "des": _des_task,
+    "aes": _aes_task,
+    "aes-gcm": _aes_gcm_task,
+    "aes2": _aes_2_task,
+}
+
+
+def _keygen(args: argparse.Namespace) -> int:
+    """Genera llaves; no procesa archivos."""
+    match args.cipher:
+        case "affin":
+            from affin_cipher.affin_cipher import _key_generator_affin
+            _key_generator_affin()
+        case "hill":
+            from hill_cipher.hill_cipher import _key_generator_hill
+            _key_generator_hill()
+        case "permutation":
+            from permutation_cipher.permutation_cipher import _permutation_random_generator
+            if args.size is None or args.size < 3:
+                print(f"{yellow('>>')} {error('ERROR')}: --size debe ser mayor o igual a 3", file=sys.stderr)
+                return EXIT_USAGE
+            _permutation_random_generator(args.size)
+        case "des":
+            from block_cipher.block_cipher import _random_key_generator
+            _random_key_generator()
+        case "aes" | "aes-gcm" | "aes2":
+            if args.cipher in ("aes", "aes-gcm"):
+                from aes_cipher.aes_cipher import _random_key_generator
+            else:
+                from aes_cipher_2.aes_cipher_2 import _random_key_generator
+
+            if args.size is None or args.name is None:
+                print(f"{yellow('>>')} {error('ERROR')}: se necesitan --size y --name", file=sys.stderr)
+                return EXIT_USAGE
+
+            if args.password:
+                from aes_cipher.aes_cipher import _password_key_generator
+                from key_derivation import read_password
+
+                # Sirve para aes, aes-gcm y aes2: todos leen los `.kdf`
+                password = read_password()
+                if _password_key_generator(args.size, _path(args.name), password, args.kdf, args.kdf_time) is None:
+                    return EXIT_FAILED
+            elif _random_key_generator(args.size, _path(args.name)) is None:
+                return EXIT_FAILED
+        case "rsa":
+            from rsa_cipher.rsa_cipher import (
+                _random_keypair_generator,
+                _store_keypair,
+            )
+            from rsa_cipher.rsa_cipher import PRIME_BACKENDS
+
+            if args.backend not in PRIME_BACKENDS:
+                print(f"{yellow('>>')} {error('ERROR')}: motor no válido", file=sys.stderr)
+                return EXIT_USAGE
+
+            public_key, d = _random_keypair_generator(args.bits, args.backend)
+            e, n = public_key
+            print(f"e = {e}\nd = {d}\nn = {n}")
+            _store_keypair(public_key, d)
+        case _:
+            print(f"{yellow('>>')} {error('ERROR')}: {args.cipher} no genera llaves", file=sys.stderr)
+            return EXIT_USAGE
+
+    return EXIT_OK
+
+
+def _encrypt_tree(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    if args.cipher != "aes":
+        parser.error("encrypt-tree solo está disponible para aes")
+
+    sources = [*args.inputs, *args.extra_inputs]
+    if len(sources) != 1 or args.manifest or args.out:
+        parser.error("encrypt-tree recibe exactamente un directorio de entrada")
+
+    if args.jobs < 1:
+        parser.error("--jobs debe ser mayor que 0")
+
+    from aes_cipher.aes_tree import (
+        encrypt_tree,
+        sync_tree,
+    )
+
+    source = _path(sources[0])
+    target = _path(args.out_dir) if args.out_dir else f"{source}_enc"
+    run = sync_tree if args.sync else encrypt_tree
+    result = run(_key_path(args.key), source, target, workers=args.jobs)
+    if result is None:
+        return EXIT_FAILED
+
+    # Como `_run_jobs`: basta un archivo con error para fallar
+    _, failed = result
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _ask_password(args: argparse.Namespace) -> None:
+    """
+    Si alguna llave es un archivo `.kdf`, pide la contraseña una sola
+    vez antes de repartir el trabajo entre los hilos.
+    """
+    from key_derivation import (
+        is_params,
+        read_password,
+        set_password,
+    )
+
+    formats = [(args.cipher, args.key)]
+    if args.action == "rekey":
+        formats.append((args.to or args.cipher, args.new_key))
+
+    for fmt, value in formats:
+        if fmt not in ("aes", "aes-gcm", "aes2") or value is None:
+            continue
+        try:
+            with open(_path(value), "rb") as f:
+                data = f.read(64)
+        except OSError:
+            continue
+        if is_params(data):
+            set_password(read_password())
+            return
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="crypto",
+        description="Cifrado por lotes sin menús interactivos.",
+    )
+    parser.add_argument(
+        "cipher",
+        choices=[*_TASKS, "rsa"],
+        help="Algoritmo de cifrado",
+    )
+    parser.add_argument(
+        "action",
+        choices=["encrypt", "decrypt", "encrypt-tree", "rekey", "keygen", "primes"],
+        help="Operación a realizar",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Archivos de entrada",
+    )
+    parser.add_argument(
+        "--key",
+        help=(
+            "Llave: número (shift), 'a,b' (affin), 'k1,k2,k3,k4' (hill), "
+            "archivo de permutación, base 64 (des) o archivo .key/.kdf (aes, aes-gcm, aes2); "
+            "en des y aes, ring:<id> toma la llave del llavero; "
+            "con un .kdf la contraseña se toma de CRYPTO_PASSWORD o se pide una vez"
+        ),
+    )
+    parser.add_argument("--in", dest="extra_inputs", action="append", default=[], help="Archivo de entrada (repetible)")
+    parser.add_argument(
+        "--manifest",
+        help=(
+            "Archivo con una entrada[<TAB>salida] por línea; con aes, aes-gcm y aes2 encrypt "
+            "la salida es un nombre base al que se agrega la extensión original y .enc/.gcm/.txt"
+        ),
+    )
+    parser.add_argument(
+        "--out",
+        help=(
+            "Archivo de salida (solo con una entrada); con aes, aes-gcm y aes2 encrypt debe "
+            "terminar en la extensión original y .enc/.gcm/.txt (p. ej. a.txt -> b.txt.enc)"
+        ),
+    )
+    parser.add_argument("--out-dir", help="Directorio para las salidas")
+    parser.add_argument("-j", "--jobs", type=int, default=min(4, os.cpu_count() or 1), help="Hilos de trabajo")
+    parser.add_argument("--queue-size", type=int, default=64, help="Máximo de trabajos pendientes")
+    parser.add_argument("--sync", action="store_true", help="Con encrypt-tree, cifrar solo archivos nuevos o modificados")
+    parser.add_argument("--compress", choices=["zlib", "lzma"], help="Comprimir antes de cifrar (aes, des)")
+    parser.add_argument("--new-key", help="Con rekey, llave nueva (mismo formato que --key)")
+    parser.add_argument("--to", choices=["aes", "aes2", "des"], help="Con rekey, formato de salida (por defecto el mismo)")
+    parser.add_argument("--size", type=int, help="Tamaño de la llave (aes, aes-gcm, aes2) o de la permutación")
+    parser.add_argument("--name", help="Nombre del archivo de la llave (aes, aes-gcm, aes2)")
+    parser.add_argument("--password", action="store_true", help="Con keygen, derivar la llave de una contraseña (aes, aes-gcm, aes2)")
+    parser.add_argument("--kdf", choices=["scrypt", "pbkdf2"], default="scrypt", help="Función de derivación de --password")
+    parser.add_argument("--kdf-time", type=float, default=0.25, help="Segundos objetivo de la derivación al calibrar")
+    parser.add_argument("--bits", type=int, default=512, help="Bits de los primos (rsa)")
+    parser.add_argument("--backend", default="pycryptodome", help="Motor de primos: pycryptodome o sieve (rsa)")
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = _build_parser()
+    args = parser.parse_intermixed_args(argv)
+
+    if args.action == "keygen":
+        return _keygen(args)
+
+    if args.action == "primes":
+        if args.cipher != "rsa":
+            parser.error("primes solo está disponible para rsa")
+
+        from rsa_cipher.rsa_cipher import (
+            PRIME_BACKENDS,
+            get_primes,
+        )
+        if args.backend not in PRIME_BACKENDS:
+            parser.error(f"motor no válido: {args.backend}")
+        get_primes(args.backend)
+        return EXIT_OK
+
+    if args.cipher == "rsa":
+        parser.error("rsa solo admite keygen y primes")
+
+    if args.key is None:
+        parser.error("falta --key")
+
+    if args.action == "encrypt-tree":
+        return _encrypt_tree(parser, args)
+
+    jobs: list[Job] = [(_path(src), None) for src in [*args.inputs, *args.extra_inputs]]
+    if args.manifest:
+        jobs.extend(_load_manifest(args.manifest))
+
+    if not jobs:
+        parser.error("no se indicó ningún archivo de entrada")
+
+    if args.out is not None:
+        if len(jobs) != 1:
+            parser.error("--out solo se puede usar con un archivo de entrada")
+        out = _path(args.out)
+
+        extension = _BASE_OUTPUT.get((args.cipher, args.action))
+        if extension is not None:
+            # --out es el archivo final: se le quitan las extensiones que
+            # la función vuelve a agregar
+            expected = f"{Path(jobs[0][0]).suffix}{extension}"
+            if not out.endswith(expected) or Path(out).name == expected:
+                parser.error(f"con {args.cipher} {args.action}, --out debe terminar en {expected}")
+            out = out.removesuffix(expected)
+
+        jobs = [(jobs[0][0], out)]
+
+    if (args.cipher, args.action) in _FIXED_OUTPUT and (args.out or args.out_dir):
+        parser.error(f"{args.cipher} {args.action} no admite --out ni --out-dir")
+
+    if args.jobs < 1 or args.queue_size < 1:
+        parser.error("--jobs y --queue-size deben ser mayores que 0")
+
+    if args.action == "rekey" and args.new_key is None:
+        parser.error("rekey necesita --new-key")
+
+    _ask_password(args)
+
+    try:
+        if args.action == "rekey":
+            task = _rekey_task(args)
+        else:
+            task = _TASKS[args.cipher](args)
+    except (ValueError, TypeError, IndexError, OSError) as e:
+        parser.error(f"llave no válida: {e}")
+
+    # Una barra por archivo desde varios hilos solo estorba; el
+    # rendimiento total se reporta al final
+    set_batch_mode(True)
+    status = _run_jobs(task, jobs, args.jobs, args.queue_size)
+    if status == EXIT_OK:
+        print(f"{yellow('>>')} {success('Lote terminado')}", file=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,33 @@
 from .decorators import (
+    ValidationContext,
     validate_files,
     validate_file_DES,
     validate_file,
-    validate_key,   
+    validate_key,
+    validate_key_file,
+)
+from .instrumentation import (
+    MemorySink,
+    JsonLinesSink,
+    PrometheusSink,
+    enable_instrumentation,
+    disable_instrumentation,
+    instrumented,
+    instrument,
 )
 
-_all__ = [
+__all__ = [
+    "ValidationContext",
     "validate_files",
     "validate_file_DES",
     "validate_file",
     "validate_key",
+    "validate_key_file",
+    "MemorySink",
+    "JsonLinesSink",
+    "PrometheusSink",
+    "enable_instrumentation",
+    "disable_instrumentation",
+    "instrumented",
+    "instrument",
 ]
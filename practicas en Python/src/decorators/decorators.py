@@ -2,33 +2,262 @@
 
 import inspect
 import os
-from pathlib import Path
 from functools import wraps
 from typing import (
+    Any,
+    BinaryIO,
     Callable,
     ParamSpec,
     TypeVar,
 )
 
 from config import BASE_DIR
+from key_cache import KeyCache
 from utils import (
     error,
     yellow,
 )
 
 __all__ = [
+    "ValidationContext",
     "validate_files",
     "validate_file_DES",
     "validate_file",
     "validate_key",
+    "validate_key_file",
 ]
 
 P = ParamSpec("P")
 T = TypeVar("T")
 K = TypeVar("K")  # Tipo de la llave
 
-def _file_exists(filename: str) -> bool:
-    return Path(BASE_DIR / filename).exists()
+_MISSING = object()
+
+
+class ValidationContext:
+    """
+    Archivos abiertos y llaves decodificadas durante la validación de
+    una llamada.
+
+    Cada archivo se abre una sola vez (en modo binario): abrirlo ya
+    comprueba que existe, y el tamaño sale de `fstat` sobre el mismo
+    descriptor. La función decorada recibe el contexto en su
+    parámetro `ctx` y reutiliza los mismos manejadores; al terminar la
+    llamada se cierran todos.
+    """
+
+    def __init__(self) -> None:
+        self._files: dict[str, BinaryIO | None] = {}
+        self._stats: dict[str, os.stat_result] = {}
+        self._data: dict[str, bytes] = {}
+        self.keys: dict[str, Any] = {}
+
+    def open(self, filename: str) -> BinaryIO | None:
+        """
+        Devuelve el archivo `filename` (relativo a `BASE_DIR`) abierto
+        en modo binario, o `None` si no existe o no se puede abrir.
+        """
+        if filename not in self._files:
+            try:
+                self._files[filename] = open(BASE_DIR / filename, "rb")
+            except OSError:
+                self._files[filename] = None
+
+        return self._files[filename]
+
+    def exists(self, filename: str, open_file: bool = True) -> bool:
+        """
+        Comprueba que el archivo exista. Con `open_file=False` solo se
+        hace `stat`, sin abrirlo.
+        """
+        if open_file:
+            return self.open(filename) is not None
+
+        try:
+            self.stat(filename)
+        except OSError:
+            return False
+        return True
+
+    def stat(self, filename: str) -> os.stat_result:
+        """
+        Resultado de `stat` del archivo: `fstat` si ya está abierto o
+        `stat` sobre la ruta si no.
+        """
+        if filename not in self._stats:
+            f = self._files.get(filename)
+            if f is not None:
+                self._stats[filename] = os.fstat(f.fileno())
+            else:
+                self._stats[filename] = os.stat(BASE_DIR / filename)
+        return self._stats[filename]
+
+    def size(self, filename: str) -> int:
+        return self.stat(filename).st_size
+
+    def read(self, filename: str) -> bytes:
+        """Contenido completo del archivo, leído una sola vez."""
+        if filename not in self._data:
+            f = self.open(filename)
+            f.seek(0)
+            self._data[filename] = f.read()
+        return self._data[filename]
+
+    def close(self) -> None:
+        for f in self._files.values():
+            if f is not None:
+                f.close()
+        self._files.clear()
+
+
+# Una validación recibe los argumentos de la llamada y el contexto, y
+# devuelve False (después de imprimir el error) si la función no debe
+# ejecutarse.
+Check = Callable[[tuple[Any, ...], dict[str, Any], ValidationContext], bool]
+
+
+def _argument_getter(
+        func: Callable[..., Any],
+        param_name: str,
+    ) -> Callable[[tuple[Any, ...], dict[str, Any]], Any]:
+    """
+    Resuelve una sola vez dónde llega el parámetro `param_name` y
+    devuelve una función que lo extrae de `(args, kwargs)` sin usar
+    `inspect.signature().bind()`. Si el parámetro no se pasó y no
+    tiene valor por defecto se obtiene `_MISSING`.
+
+    :param func: Función decorada.
+    :type func: Callable[..., Any]
+    :param param_name: Nombre del parámetro.
+    :type param_name: str
+    :return: Función que obtiene el valor del parámetro.
+    :rtype: Callable[[tuple[Any, ...], dict[str, Any]], Any]
+    """
+    parameters = inspect.signature(func).parameters
+    param = parameters.get(param_name)
+    position = None
+    default = _MISSING
+
+    if param is not None:
+        if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+            position = list(parameters).index(param_name)
+        if param.default is not param.empty:
+            default = param.default
+
+    def _get(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+        if position is not None and position < len(args):
+            return args[position]
+        return kwargs.get(param_name, default)
+
+    return _get
+
+
+def _report_missing_argument(
+        func: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        param_name: str,
+    ) -> None:
+    """
+    Camino lento, solo cuando el parámetro no aparece: usa `bind()`
+    para dar el mismo mensaje de error que daría Python.
+    """
+    try:
+        inspect.signature(func).bind(*args, **kwargs)
+    except TypeError as e:
+        print(f"\n{yellow('>>')} {error('ERROR')} en argumentos: {e}")
+        return
+
+    print(
+        f"\n{yellow('>>')} {error('ERROR')}"
+        f": No se encontró el parámetro {param_name}"
+    )
+
+
+def _validated(func: Callable[P, T], checks: list[Check]) -> Callable[P, T | None]:
+    """
+    Envuelve `func` para que ejecute `checks` antes de cada llamada.
+
+    Si `func` ya es un envoltorio de validación, sus validaciones se
+    fusionan con las nuevas en un único envoltorio alrededor de la
+    función original, así que apilar decoradores no agrega llamadas
+    anidadas. El orden se conserva: primero el decorador de más
+    arriba.
+
+    Todas las validaciones comparten un `ValidationContext`; si la
+    función original tiene un parámetro `ctx` lo recibe ya con los
+    archivos abiertos y las llaves decodificadas.
+
+    :param func: Función a decorar (o envoltorio de validación).
+    :type func: Callable[P, T]
+    :param checks: Validaciones a ejecutar antes de `func`.
+    :type checks: list[Check]
+    :return: Función envuelta que retorna el resultado original o
+             `None` si alguna validación falla.
+    :rtype: Callable[P, T | None]
+    """
+    original = getattr(func, "__validated__", None)
+    if original is not None:
+        checks = [*checks, *func.__validators__]
+        func = original
+
+    wants_context = "ctx" in inspect.signature(func).parameters
+
+    @wraps(func)
+    def _wrapper(*args: P.args, **kwargs: P.kwargs) -> T | None:
+        ctx = ValidationContext()
+        try:
+            for check in checks:
+                if not check(args, kwargs, ctx):
+                    return None
+
+            if wants_context:
+                kwargs["ctx"] = ctx
+            return func(*args, **kwargs)
+        finally:
+            ctx.close()
+
+    _wrapper.__validated__ = func
+    _wrapper.__validators__ = checks
+    return _wrapper
+
+
+def _file_param_check(
+        func: Callable[..., Any],
+        textfile_param_name: str,
+        open_file: bool = True,
+    ) -> Check:
+    """
+    Validación de que el parámetro `textfile_param_name` exista, sea
+    un `str` y corresponda a un archivo existente. Con
+    `open_file=False` el archivo solo se consulta con `stat`.
+    """
+    get_filename = _argument_getter(func, textfile_param_name)
+
+    def _check(
+            args: tuple[Any, ...],
+            kwargs: dict[str, Any],
+            ctx: ValidationContext,
+        ) -> bool:
+        filename = get_filename(args, kwargs)
+        if filename is _MISSING or filename is None:
+            _report_missing_argument(func, args, kwargs, textfile_param_name)
+            return False
+
+        if not isinstance(filename, str):
+            print(
+                f"\n{yellow('>>')} {error('ERROR')}"
+                f": El parámetro {textfile_param_name} debe ser un string"
+            )
+            return False
+
+        if not ctx.exists(filename, open_file):
+            print(f"\n{yellow('>>')} {error('ERROR')}: El archivo {filename} no existe")
+            return False
+
+        return True
+
+    return _check
 
 
 def validate_files(func: Callable[P, T]) -> Callable[P, T | None]:
@@ -47,29 +276,34 @@ def validate_files(func: Callable[P, T]) -> Callable[P, T | None]:
              `None` si la validación falla.
     :rtype: Callable[[Callable[P, T]], Callable[P, T | None]]
     """
-    @wraps(func)
-    def _wrapper(*args: P.args, **kwargs: P.kwargs) -> T | None:
+    def _check(
+            args: tuple[Any, ...],
+            kwargs: dict[str, Any],
+            ctx: ValidationContext,
+        ) -> bool:
         for arg in args:
-            if isinstance(arg, str) and not _file_exists(arg):
+            if isinstance(arg, str) and not ctx.exists(arg):
                 print(f"\n{yellow('>>')} {error('ERROR')}: El archivo {arg} no existe")
-                return None
-        
-        return func(*args, **kwargs)
-    return _wrapper
+                return False
+
+        return True
 
+    return _validated(func, [_check])
 
-def _is_valid_file_size_DES(filename: str) -> bool:
+
+def _is_valid_file_size_DES(ctx: ValidationContext, filename: str) -> bool:
     """
     Varifica si el tamaño de un archivo es de mínimo 100 KB para DES.
 
+    :param ctx: Contexto con el archivo ya abierto.
+    :type ctx: ValidationContext
     :param filename: Nombre del archivo.
     :type filename: str
     :return: True si tiene como mínimo 100 KB de tamaño, False en caso
              contrario.
     :rtype: bool
     """
-    size = os.path.getsize(BASE_DIR / filename)
-    return size > 100 * 1024
+    return ctx.size(filename) > 100 * 1024
 
 
 def validate_file_DES(
@@ -85,8 +319,8 @@ def validate_file_DES(
     - Corresponda a un archivo existente.
     - Cumpla con un tamaño requerido.
 
-    Usa `inspect.signature().bind()` para mapear `*args` y `**kwargs`
-    a los nombres de parámetros de la función.
+    La posición del parámetro se resuelve al aplicar el decorador, no
+    en cada llamada.
 
     Si alguna validación falla, se imprime un mensaje de error y la
     función decorada no se ejecuta, retornando `None`.
@@ -100,43 +334,28 @@ def validate_file_DES(
     :rtype: Callable[[Callable[P, T]], Callable[P, T | None]]
     """
     def _decorator(func: Callable[P, T]) -> Callable[P, T | None]:
-        @wraps(func)
-        def _wrapper(*args: P.args, **kwargs: P.kwargs) -> T | None:
-            try:
-                bound = inspect.signature(func).bind(*args, **kwargs)
-                bound.apply_defaults()
-            except TypeError as e:
-                print(f"\n{yellow('>>')} {error('ERROR')} en argumentos: {e}")
-                return None
-            
-            filename = bound.arguments.get(textfile_param_name)
-            if filename is None:
-                print(
-                    f"\n{yellow('>>')} {error('ERROR')}"
-                    f": No se encontró el parámetro {textfile_param_name}"
-                )
-                return None
-            
-            if not isinstance(filename, str):
-                print(
-                    f"\n{yellow('>>')} {error('ERROR')}"
-                    f": El parámetro {textfile_param_name} debe ser un string"
-                )
-                return None
-            
-            if not _file_exists(filename):
-                print(f"\n{yellow('>>')} {error('ERROR')}: El archivo {filename} no existe")
-                return None
-            
-            if not _is_valid_file_size_DES(filename):
+        check_file = _file_param_check(func, textfile_param_name)
+        get_filename = _argument_getter(func, textfile_param_name)
+
+        def _check(
+                args: tuple[Any, ...],
+                kwargs: dict[str, Any],
+                ctx: ValidationContext,
+            ) -> bool:
+            if not check_file(args, kwargs, ctx):
+                return False
+
+            filename = get_filename(args, kwargs)
+            if not _is_valid_file_size_DES(ctx, filename):
                 print(
                     f"\n{yellow('>>')} {error('ERROR')}"
                     f": El archivo {filename} debe pesar más de 100 KB"
                 )
-                return None
-            
-            return func(*args, **kwargs)
-        return _wrapper
+                return False
+
+            return True
+
+        return _validated(func, [_check])
     return _decorator
 
 
@@ -150,8 +369,8 @@ def validate_file(textfile_param_name: str) -> Callable[[Callable[P, T]], Callab
     - Sea de tipo `str`.
     - Corresponda a un archivo existente.
 
-    Usa `inspect.signature().bind()` para mapear `*args` y `**kwargs`
-    a los nombres de parámetros de la función.
+    La posición del parámetro se resuelve al aplicar el decorador, no
+    en cada llamada.
 
     Si alguna validación falla, se imprime un mensaje de error y la
     función decorada no se ejecuta, retornando `None`.
@@ -165,36 +384,7 @@ def validate_file(textfile_param_name: str) -> Callable[[Callable[P, T]], Callab
     :rtype: Callable[[Callable[P, T]], Callable[P, T | None]]
     """
     def _decorator(func: Callable[P, T]) -> Callable[P, T | None]:
-        @wraps(func)
-        def _wrapper(*args: P.args, **kwargs: P.kwargs) -> T | None:
-            try:
-                bound = inspect.signature(func).bind(*args, **kwargs)
-                bound.apply_defaults()
-            except TypeError as e:
-                print(f"\n{yellow('>>')} {error('ERROR')} en argumentos: {e}")
-                return None
-            
-            filename = bound.arguments.get(textfile_param_name)
-            if filename is None:
-                print(
-                    f"\n{yellow('>>')} {error('ERROR')}"
-                    f": No se encontró el parámetro {textfile_param_name}"
-                )
-                return None
-            
-            if not isinstance(filename, str):
-                print(
-                    f"\n{yellow('>>')} {error('ERROR')}"
-                    f": El parámetro {textfile_param_name} debe ser un string"
-                )
-                return None
-            
-            if not _file_exists(filename):
-                print(f"\n{yellow('>>')} {error('ERROR')}: El archivo {filename} no existe")
-                return None
-            
-            return func(*args, **kwargs)
-        return _wrapper
+        return _validated(func, [_file_param_check(func, textfile_param_name)])
     return _decorator
 
 
@@ -203,27 +393,108 @@ def validate_key(
         param_name: str = "key",
     ) -> Callable[[Callable[P, T]], Callable[P, T | None]]:
     def _decorator(func: Callable[P, T]) -> Callable[P, T | None]:
-        @wraps(func)
-        def _wrapper(*args: P.args, **kwargs: P.kwargs) -> T | None:
-            try:
-                bound = inspect.signature(func).bind(*args, **kwargs)
-                bound.apply_defaults()
-            except TypeError as e:
-                print(f"\n{yellow('>>')} {error('ERROR')} en argumentos: {e}")
-                return None
-            
-            key = bound.arguments.get(param_name)
-            if key is None:
-                print(
-                    f"\n{yellow('>>')} {error('ERROR')}"
-                    f": No se encontró el parámetro {param_name}"
-                )
-                return None
+        get_key = _argument_getter(func, param_name)
+
+        def _check(
+                args: tuple[Any, ...],
+                kwargs: dict[str, Any],
+                ctx: ValidationContext,
+            ) -> bool:
+            key = get_key(args, kwargs)
+            if key is _MISSING or key is None:
+                _report_missing_argument(func, args, kwargs, param_name)
+                return False
 
             if not condition_func(key):
                 print(f"\n{yellow('>>')} {error('ERROR')}: La llave no es valida")
-                return
-            
-            return func(*args, **kwargs)
-        return _wrapper
+                return False
+
+            return True
+
+        return _validated(func, [_check])
+    return _decorator
+
+
+def validate_key_file(
+        decode_func: Callable[[bytes], K],
+        param_name: str = "key_filename",
+        cache: KeyCache | None = None,
+        ring_kind: str | None = None,
+    ) -> Callable[[Callable[P, T]], Callable[P, T | None]]:
+    """
+    Decorador que valida una llave guardada en un archivo.
+
+    Lee el archivo indicado por `param_name` a través del
+    `ValidationContext` (una sola apertura y lectura) y lo decodifica
+    con `decode_func`. Si la decodificación lanza una excepción la
+    llave no es válida; si tiene éxito, la llave decodificada queda en
+    `ctx.keys[param_name]` para que la función no vuelva a leerla.
+
+    Con `cache`, el archivo solo se consulta con `stat` y la llave se
+    toma de la caché mientras el archivo no cambie; solo se abre y se
+    decodifica cuando no está en caché.
+
+    Con `ring_kind`, el parámetro también puede ser una referencia
+    `ring:<id>` a una llave de ese tipo en el llavero; esa llave ya está
+    decodificada y no pasa por `decode_func` ni por la caché.
+
+    :param decode_func: Función que convierte el contenido del archivo
+                        en la llave.
+    :type decode_func: Callable[[bytes], K]
+    :param param_name: Nombre del parámetro con el archivo de la llave.
+    :type param_name: str
+    :param cache: Caché de llaves decodificadas.
+    :type cache: KeyCache | None
+    :param ring_kind: Tipo de llave del llavero (`aes`, `des` o `rsa`);
+                      `None` para no aceptar referencias.
+    :type ring_kind: str | None
+    :return: Un decorador que envuelve la función original agregando
+             la validación de la llave.
+    :rtype: Callable[[Callable[P, T]], Callable[P, T | None]]
+    """
+    def _decorator(func: Callable[P, T]) -> Callable[P, T | None]:
+        check_file = _file_param_check(func, param_name, open_file=cache is None)
+        get_filename = _argument_getter(func, param_name)
+
+        def _check(
+                args: tuple[Any, ...],
+                kwargs: dict[str, Any],
+                ctx: ValidationContext,
+            ) -> bool:
+            filename = get_filename(args, kwargs)
+            if ring_kind is not None:
+                # Solo se importa donde se aceptan llaves del llavero
+                from key_ring import (
+                    is_reference,
+                    load_key,
+                )
+
+                if isinstance(filename, str) and is_reference(filename):
+                    try:
+                        ctx.keys[param_name] = load_key(filename, ring_kind)
+                    except (OSError, ValueError) as e:
+                        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+                        return False
+                    return True
+
+            if not check_file(args, kwargs, ctx):
+                return False
+
+            try:
+                if cache is None:
+                    key = decode_func(ctx.read(filename))
+                else:
+                    path = BASE_DIR / filename
+                    stat = ctx.stat(filename)
+                    key = cache.get(path, stat)
+                    if key is None:
+                        key = cache.put(path, stat, decode_func(ctx.read(filename)))
+            except Exception:
+                print(f"\n{yellow('>>')} {error('ERROR')}: La llave no es valida")
+                return False
+
+            ctx.keys[param_name] = key
+            return True
+
+        return _validated(func, [_check])
     return _decorator
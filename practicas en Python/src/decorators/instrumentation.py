@@ -0,0 +1,345 @@
+"""
+Instrumentación de operaciones: tiempo de pared, tiempo de CPU, bytes
+procesados, memoria pico y número de llamadas.
+
+Desactivada por defecto; en ese caso `instrumented` solo agrega una
+comprobación de una variable por llamada. Se activa desde código con
+`enable_instrumentation(...)` o, sin tocar el código, con la variable
+de entorno `CRYPTO_METRICS`:
+
+    CRYPTO_METRICS=memory
+    CRYPTO_METRICS=jsonl:../data/metrics.jsonl
+    CRYPTO_METRICS=prometheus:../data/metrics.prom
+    CRYPTO_METRICS=jsonl:a.jsonl,prometheus:b.prom,tracemalloc
+
+El tiempo de CPU es el del proceso (`time.process_time`), así que
+incluye los hilos auxiliares de una operación (p. ej. `ctr_pipeline`),
+pero también los de otras llamadas que corran a la vez.
+
+Con `tracemalloc` se mide también la memoria pico de Python de cada
+llamada (hace más lentas todas las asignaciones, así que es opcional).
+El pico de `tracemalloc` es global al proceso: si otra llamada medida
+empieza o sigue en curso mientras tanto, la memoria pico de la llamada
+queda como `None` en lugar de mezclar las dos.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    ParamSpec,
+    TypeVar,
+)
+
+from config import BASE_DIR
+
+from .decorators import (
+    _MISSING,
+    _argument_getter,
+)
+
+__all__ = [
+    "MemorySink",
+    "JsonLinesSink",
+    "PrometheusSink",
+    "enable_instrumentation",
+    "disable_instrumentation",
+    "instrumented",
+    "instrument",
+]
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+ENV_VAR = "CRYPTO_METRICS"
+
+# Evento: name, wall, cpu, bytes, peak_memory (o None), error, timestamp
+Event = dict[str, Any]
+
+
+class MemorySink:
+    """
+    Registro en memoria con los totales por operación: llamadas,
+    errores, tiempo de pared, tiempo de CPU, bytes y memoria pico
+    máxima.
+    """
+
+    def __init__(self) -> None:
+        self._stats: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, event: Event) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(event["name"], {
+                "calls": 0,
+                "errors": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "bytes": 0,
+                "peak_memory_bytes": 0,
+            })
+            stats["calls"] += 1
+            stats["errors"] += event["error"] is not None
+            stats["wall_seconds"] += event["wall"]
+            stats["cpu_seconds"] += event["cpu"]
+            stats["bytes"] += event["bytes"]
+            if event["peak_memory"] is not None:
+                stats["peak_memory_bytes"] = max(
+                    stats["peak_memory_bytes"], event["peak_memory"]
+                )
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Copia de los totales por operación."""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def flush(self) -> None:
+        pass
+
+
+class JsonLinesSink:
+    """Agrega cada evento como una línea JSON al archivo `path`."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, event: Event) -> None:
+        line = json.dumps(event)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def flush(self) -> None:
+        pass
+
+
+class PrometheusSink(MemorySink):
+    """
+    Totales en memoria que se escriben en formato de texto de
+    Prometheus en `path` al llamar a `flush` (y al salir del proceso
+    si se configuró con la variable de entorno).
+    """
+
+    _METRICS = (
+        ("calls", "crypto_calls_total", "counter", "Llamadas por operación"),
+        ("errors", "crypto_errors_total", "counter", "Llamadas que lanzaron una excepción"),
+        ("wall_seconds", "crypto_wall_seconds_total", "counter", "Tiempo de pared acumulado"),
+        ("cpu_seconds", "crypto_cpu_seconds_total", "counter", "Tiempo de CPU acumulado"),
+        ("bytes", "crypto_bytes_total", "counter", "Bytes de entrada procesados"),
+        ("peak_memory_bytes", "crypto_peak_memory_bytes", "gauge", "Memoria pico de Python por llamada"),
+    )
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        super().__init__()
+        self.path = Path(path) if path is not None else None
+
+    def render(self) -> str:
+        """Devuelve los totales en formato de texto de Prometheus."""
+        stats = self.snapshot()
+        lines = []
+
+        for field, metric, kind, help_text in self._METRICS:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, values in sorted(stats.items()):
+                lines.append(f'{metric}{{operation="{name}"}} {values[field]}')
+
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        if self.path is not None:
+            self.path.write_text(self.render(), encoding="utf-8")
+
+
+class _State:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.trace_memory = False
+        self.sinks: list[Any] = []
+        # Llamadas medidas en curso y llamadas iniciadas, para saber si
+        # alguna se solapó con otra al medir la memoria pico
+        self.active = 0
+        self.started = 0
+        self.lock = threading.Lock()
+
+
+_STATE = _State()
+
+
+def enable_instrumentation(*sinks: Any, trace_memory: bool = False) -> None:
+    """
+    Activa la instrumentación enviando los eventos a `sinks`. Un sink
+    es cualquier objeto con `record(event)` y `flush()`.
+
+    :param sinks: Destinos de los eventos.
+    :type sinks: Any
+    :param trace_memory: Mide la memoria pico con `tracemalloc`.
+    :type trace_memory: bool
+    """
+    _STATE.sinks = list(sinks)
+    _STATE.trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _STATE.enabled = bool(_STATE.sinks)
+
+
+def disable_instrumentation() -> None:
+    """Desactiva la instrumentación y vacía los sinks."""
+    _STATE.enabled = False
+    for sink in _STATE.sinks:
+        sink.flush()
+    if _STATE.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _STATE.sinks = []
+    _STATE.trace_memory = False
+
+
+def _emit(event: Event) -> None:
+    for sink in _STATE.sinks:
+        sink.record(event)
+
+
+@contextmanager
+def instrument(name: str, nbytes: int = 0) -> Iterator[None]:
+    """
+    Administrador de contexto que registra el bloque como una llamada
+    a la operación `name`.
+
+    :param name: Nombre de la operación.
+    :type name: str
+    :param nbytes: Bytes que procesa el bloque.
+    :type nbytes: int
+    """
+    if not _STATE.enabled:
+        yield
+        return
+
+    trace_memory = _STATE.trace_memory
+    if trace_memory:
+        with _STATE.lock:
+            alone = _STATE.active == 0
+            _STATE.active += 1
+            _STATE.started += 1
+            ticket = _STATE.started
+            if alone:
+                tracemalloc.reset_peak()
+                base_memory = tracemalloc.get_traced_memory()[0]
+
+    failure = None
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    except BaseException as e:
+        failure = type(e).__name__
+        raise
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        peak_memory = None
+        if trace_memory:
+            with _STATE.lock:
+                _STATE.active -= 1
+                if alone and _STATE.started == ticket:
+                    peak_memory = tracemalloc.get_traced_memory()[1] - base_memory
+
+        event = {
+            "name": name,
+            "wall": wall,
+            "cpu": cpu,
+            "bytes": nbytes,
+            "peak_memory": peak_memory,
+            "error": failure,
+            "timestamp": time.time(),
+        }
+        _emit(event)
+
+
+def _file_size(value: Any) -> int:
+    try:
+        return os.stat(BASE_DIR / value).st_size
+    except (OSError, TypeError):
+        return 0
+
+
+def instrumented(
+        name: str,
+        size_param: str | None = None,
+    ) -> Callable[[Callable[P, T]], Callable[P, T]]:
+    """
+    Decorador que registra cada llamada a la función como la operación
+    `name`. Debe ir encima de los decoradores de validación para que
+    el tiempo incluya la validación de llaves y archivos.
+
+    :param name: Nombre de la operación (p. ej. `aes.encrypt_file`).
+    :type name: str
+    :param size_param: Parámetro con el archivo de entrada (relativo a
+                       `BASE_DIR`) cuyo tamaño cuenta como bytes
+                       procesados.
+    :type size_param: str | None
+    :return: Un decorador que envuelve la función original.
+    :rtype: Callable[[Callable[P, T]], Callable[P, T]]
+    """
+    def _decorator(func: Callable[P, T]) -> Callable[P, T]:
+        get_file = _argument_getter(func, size_param) if size_param else None
+
+        # `updated=()` evita copiar `__validated__`: un validador puesto
+        # encima no debe fusionarse saltándose la instrumentación
+        @wraps(func, updated=())
+        def _wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            if not _STATE.enabled:
+                return func(*args, **kwargs)
+
+            nbytes = 0
+            if get_file is not None:
+                value = get_file(args, kwargs)
+                nbytes = 0 if value is _MISSING else _file_size(value)
+
+            with instrument(name, nbytes):
+                return func(*args, **kwargs)
+
+        return _wrapper
+
+    return _decorator
+
+
+def _configure_from_env() -> None:
+    """Activa la instrumentación según `CRYPTO_METRICS`, si existe."""
+    spec = os.environ.get(ENV_VAR, "").strip()
+    if not spec:
+        return
+
+    sinks: list[Any] = []
+    trace_memory = False
+
+    for item in spec.split(","):
+        kind, _, target = item.strip().partition(":")
+        match kind:
+            case "memory":
+                sinks.append(MemorySink())
+            case "jsonl" if target:
+                sinks.append(JsonLinesSink(target))
+            case "prometheus" if target:
+                sinks.append(PrometheusSink(target))
+            case "tracemalloc":
+                trace_memory = True
+
+    if sinks:
+        enable_instrumentation(*sinks, trace_memory=trace_memory)
+        atexit.register(lambda: [sink.flush() for sink in _STATE.sinks])
+
+
+_configure_from_env()
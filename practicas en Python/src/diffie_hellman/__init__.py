@@ -0,0 +1,13 @@
+from .diffie_hellman import (
+    diffie_hellman_menu,
+    generate_keypairs,
+    compute_shared_secrets,
+    benchmark_fixed_base,
+)
+
+__all__ = [
+    "diffie_hellman_menu",
+    "generate_keypairs",
+    "compute_shared_secrets",
+    "benchmark_fixed_base",
+]
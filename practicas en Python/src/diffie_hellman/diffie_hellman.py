@@ -0,0 +1,348 @@
+"""Intercambio de llaves Diffie–Hellman con exponenciación de base fija."""
+
+import hashlib
+import os
+from secrets import randbelow
+from time import perf_counter
+
+from config import BASE_DIR
+from utils import (
+    clean_console,
+    wait_key,
+    error,
+    success,
+    yellow,
+)
+
+__all__ = [
+    "diffie_hellman_menu",
+    "generate_keypairs",
+    "compute_shared_secrets",
+    "benchmark_fixed_base",
+]
+
+# Grupos (p, g) usados en la práctica
+GROUPS: dict[str, tuple[int, int]] = {
+    "p1": (36457, 5),
+    "p2": (348261019, 2),
+    "p3": (
+        66469876885664026651027094563307379287663807348031128100844070269546283933311,
+        2,
+    ),
+}
+
+WINDOW_BITS = 8  # Bits del exponente que cubre cada fila de la tabla
+TABLES_DIR = BASE_DIR / "dh_tables"
+
+FixedBaseTable = list[list[int]]
+
+# Tablas ya construidas o cargadas en este proceso
+_TABLES: dict[tuple[int, int, int], FixedBaseTable] = {}
+
+
+def _table_filename(p: int, g: int, window: int) -> str:
+    digest = hashlib.sha256(f"{p}:{g}".encode()).hexdigest()[:16]
+    return f"dh_{p.bit_length()}_{digest}_w{window}.bin"
+
+
+def _build_table(p: int, g: int, window: int) -> FixedBaseTable:
+    """
+    Construye la tabla de base fija: la fila `i` guarda
+    `g^(d * 2^(window * i)) mod p` para cada dígito `d` de `window`
+    bits, de modo que `g^x` se obtiene multiplicando una entrada por
+    fila, sin elevar al cuadrado.
+
+    :param p: Módulo del grupo.
+    :type p: int
+    :param g: Generador.
+    :type g: int
+    :param window: Bits por fila.
+    :type window: int
+    :return: Tabla de base fija.
+    :rtype: FixedBaseTable
+    """
+    rows = -(-(p - 1).bit_length() // window)
+    table: FixedBaseTable = []
+    base = g % p
+
+    for _ in range(rows):
+        row = [1] * (1 << window)
+        for d in range(1, 1 << window):
+            row[d] = row[d - 1] * base % p
+
+        table.append(row)
+        base = row[-1] * base % p
+
+    return table
+
+
+def _store_table(table: FixedBaseTable, p: int, g: int, window: int) -> None:
+    """
+    Guarda la tabla como entradas de ancho fijo en big-endian, seguidas
+    del SHA-256 de las entradas. Se escribe en un temporal y se
+    reemplaza de una vez, así que otro proceso nunca carga una tabla a
+    medias.
+    """
+    width = (p.bit_length() + 7) // 8
+    TABLES_DIR.mkdir(parents=True, exist_ok=True)
+    path = TABLES_DIR / _table_filename(p, g, window)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+    try:
+        digest = hashlib.sha256()
+        with open(tmp_path, "wb") as f:
+            for row in table:
+                data = b"".join(entry.to_bytes(width, "big") for entry in row)
+                digest.update(data)
+                f.write(data)
+            f.write(digest.digest())
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _is_valid_table(table: FixedBaseTable, p: int, g: int) -> bool:
+    """
+    Comprueba que la tabla empiece en `g` y que la base de cada fila
+    sea la de la fila anterior elevada a `2^window`.
+    """
+    base = g % p
+    for row in table:
+        if row[0] != 1 or row[1] != base:
+            return False
+        base = row[-1] * base % p
+    return True
+
+
+def _load_table(p: int, g: int, window: int) -> FixedBaseTable | None:
+    """
+    Carga una tabla guardada; devuelve None si no existe, si el hash no
+    coincide o si no es la tabla de `(p, g)`.
+    """
+    path = TABLES_DIR / _table_filename(p, g, window)
+    if not path.exists():
+        return None
+
+    width = (p.bit_length() + 7) // 8
+    row_size = width << window
+    rows = -(-(p - 1).bit_length() // window)
+    data = path.read_bytes()
+    data, digest = data[:-32], data[-32:]
+
+    if len(data) != rows * row_size or hashlib.sha256(data).digest() != digest:
+        return None
+
+    table = [
+        [
+            int.from_bytes(data[offset:offset + width], "big")
+            for offset in range(start, start + row_size, width)
+        ]
+        for start in range(0, len(data), row_size)
+    ]
+    return table if _is_valid_table(table, p, g) else None
+
+
+def _get_table(p: int, g: int, window: int = WINDOW_BITS) -> FixedBaseTable:
+    """
+    Devuelve la tabla de base fija para `(p, g)`. Se busca primero en
+    memoria, después en disco y, si no existe, se construye y se
+    guarda para las siguientes ejecuciones.
+    """
+    key = (p, g, window)
+    if key in _TABLES:
+        return _TABLES[key]
+
+    table = _load_table(p, g, window)
+    if table is None:
+        table = _build_table(p, g, window)
+        _store_table(table, p, g, window)
+
+    _TABLES[key] = table
+    return table
+
+
+def _fixed_base_pow(table: FixedBaseTable, x: int, p: int) -> int:
+    """
+    Calcula `g^x mod p` con una tabla de base fija: una multiplicación
+    modular por cada dígito no nulo de `x`, con dígitos del número de
+    bits por fila de la tabla.
+    """
+    window = len(table[0]).bit_length() - 1
+    mask = (1 << window) - 1
+    result = 1
+
+    for row in table:
+        digit = x & mask
+        if digit:
+            result = result * row[digit] % p
+        x >>= window
+
+    return result
+
+
+def generate_keypairs(group: str, count: int) -> list[tuple[int, int]]:
+    """
+    Genera `count` pares de llaves efímeras `(x, y = g^x mod p)` para
+    el grupo indicado.
+
+    :param group: Nombre del grupo en `GROUPS`.
+    :type group: str
+    :param count: Número de pares a generar.
+    :type count: int
+    :return: Lista de pares (llave privada, llave pública).
+    :rtype: list[tuple[int, int]]
+    """
+    p, g = GROUPS[group]
+    table = _get_table(p, g)
+    keypairs: list[tuple[int, int]] = []
+
+    for _ in range(count):
+        x = randbelow(p - 3) + 2
+        keypairs.append((x, _fixed_base_pow(table, x, p)))
+
+    return keypairs
+
+
+def _is_valid_public_key(y: int, p: int) -> bool:
+    return 1 < y < p - 1
+
+
+def _is_valid_private_key(x: int, p: int) -> bool:
+    return 0 < x < p - 1
+
+
+def compute_shared_secrets(
+        group: str,
+        private_keys: list[int],
+        peer_public_keys: list[int],
+    ) -> list[int]:
+    """
+    Calcula los secretos compartidos `y_peer^x mod p` de varios
+    intercambios. Si todos usan la misma llave pública del otro
+    extremo (llave estática), se construye una tabla de base fija para
+    ella y se reutiliza en todo el lote. Lanza `ValueError` si alguna
+    llave está fuera de rango, use o no la tabla.
+
+    :param group: Nombre del grupo en `GROUPS`.
+    :type group: str
+    :param private_keys: Llaves privadas propias.
+    :type private_keys: list[int]
+    :param peer_public_keys: Llaves públicas del otro extremo.
+    :type peer_public_keys: list[int]
+    :return: Secretos compartidos en el mismo orden.
+    :rtype: list[int]
+    """
+    p, _ = GROUPS[group]
+
+    if len(private_keys) != len(peer_public_keys):
+        raise ValueError("Se necesita una llave pública por cada llave privada")
+
+    for y in peer_public_keys:
+        if not _is_valid_public_key(y, p):
+            raise ValueError(f"Llave pública fuera de rango: {y}")
+
+    # La tabla solo cubre exponentes de hasta `p - 1` bits y `pow` acepta
+    # cualquiera, así que se validan antes de elegir el camino
+    for x in private_keys:
+        if not _is_valid_private_key(x, p):
+            raise ValueError(f"Llave privada fuera de rango: {x}")
+
+    # Con pocos intercambios la tabla no se amortiza
+    if len(set(peer_public_keys)) == 1 and len(private_keys) >= 1 << WINDOW_BITS:
+        table = _build_table(p, peer_public_keys[0], WINDOW_BITS)
+        return [_fixed_base_pow(table, x, p) for x in private_keys]
+
+    return [pow(y, x, p) for x, y in zip(private_keys, peer_public_keys)]
+
+
+def benchmark_fixed_base(group: str = "p3", handshakes: int = 5000) -> None:
+    """
+    Compara `pow(g, x, p)` contra la exponenciación de base fija para
+    `handshakes` llaves privadas aleatorias.
+
+    :param group: Nombre del grupo en `GROUPS`.
+    :type group: str
+    :param handshakes: Número de exponenciaciones.
+    :type handshakes: int
+    """
+    p, g = GROUPS[group]
+
+    start = perf_counter()
+    table = _get_table(p, g)
+    table_time = perf_counter() - start
+
+    exponents = [randbelow(p - 3) + 2 for _ in range(handshakes)]
+
+    start = perf_counter()
+    expected = [pow(g, x, p) for x in exponents]
+    pow_time = perf_counter() - start
+
+    start = perf_counter()
+    results = [_fixed_base_pow(table, x, p) for x in exponents]
+    table_pow_time = perf_counter() - start
+
+    if results != expected:
+        print(f"\n{yellow('>>')} {error('ERROR')}: Los resultados no coinciden")
+        return
+
+    print(f"\n{yellow('>>')} Grupo {group} ({p.bit_length()} bits), {handshakes} exponenciaciones")
+    print(f"Tabla (construir o cargar): {table_time:.4f} segundos")
+    print(f"pow(g, x, p): {pow_time:.4f} segundos")
+    print(f"Base fija:    {table_pow_time:.4f} segundos")
+    print(f"Aceleración:  {pow_time / table_pow_time:.2f}x")
+
+
+def diffie_hellman_menu() -> None:
+    while True:
+        clean_console()
+        print(f"""
+/*---------------.
+| DIFFIE–HELLMAN |
+`---------------*/
+
+{yellow('>>')} Elija una de las opciones
+
+1.- Generar un par de llaves
+2.- Calcular el secreto compartido
+3.- Comparar pow contra base fija
+4.- Salir
+""")
+        option = input("Opción: ")
+        match option:
+            case "1" | "2" | "3":
+                group = input(f"\nEscribe el grupo ({', '.join(GROUPS)}): ").strip()
+                if group not in GROUPS:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: Grupo no válido")
+                    wait_key()
+                    continue
+
+                if option == "1":
+                    ((x, y),) = generate_keypairs(group, 1)
+                    print(f"\nxA = {x}")
+                    print(f"yA = {y}")
+                elif option == "2":
+                    try:
+                        x = int(input("Escribe tu llave privada xA: "))
+                        y = int(input("Escribe la llave pública yB: "))
+                        (secret,) = compute_shared_secrets(group, [x], [y])
+                    except ValueError as e:
+                        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+                        wait_key()
+                        continue
+
+                    print(f"\n{yellow('>>')} {success('Secreto compartido')}: {secret}")
+                else:
+                    benchmark_fixed_base(group)
+                wait_key()
+            case "4":
+                break
+            case _:
+                print(f"\n{yellow('>>')} {error('ERROR')}: Opción no válida")
+                wait_key()
+
+
+def main() -> None:
+    diffie_hellman_menu()
+
+if __name__ == "__main__":
+    main()
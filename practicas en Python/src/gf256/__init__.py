@@ -0,0 +1,33 @@
+from .gf256 import (
+    AES_REDUCTION,
+    GF16_REDUCTION,
+    EXP_TABLE,
+    LOG_TABLE,
+    MUL_TABLE,
+    INV_TABLE,
+    xtime,
+    mult,
+    add,
+    multiply,
+    inverse,
+    divide,
+    power,
+    matvec,
+)
+
+__all__ = [
+    "AES_REDUCTION",
+    "GF16_REDUCTION",
+    "EXP_TABLE",
+    "LOG_TABLE",
+    "MUL_TABLE",
+    "INV_TABLE",
+    "xtime",
+    "mult",
+    "add",
+    "multiply",
+    "inverse",
+    "divide",
+    "power",
+    "matvec",
+]
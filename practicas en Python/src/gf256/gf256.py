@@ -0,0 +1,207 @@
+"""
+Aritmética en GF(2^8) con tablas y operaciones vectorizadas de NumPy.
+
+Las funciones escalares `xtime` y `mult` son las mismas de
+`practicas en C/mult_on_GF/src/mult.c` y del `main.c` de la raíz: sirven
+de referencia y para construir las tablas. El resto trabaja con
+arreglos de bytes y cada producto es una búsqueda en `MUL_TABLE`
+(256 × 256), así que no hay ciclos bit a bit.
+
+El campo es el de AES: polinomio x^8 + x^4 + x^3 + x + 1 y generador
+0x03 para las tablas de logaritmos.
+"""
+
+from typing import TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+
+__all__ = [
+    "AES_REDUCTION",
+    "GF16_REDUCTION",
+    "EXP_TABLE",
+    "LOG_TABLE",
+    "MUL_TABLE",
+    "INV_TABLE",
+    "xtime",
+    "mult",
+    "add",
+    "multiply",
+    "inverse",
+    "divide",
+    "power",
+    "matvec",
+]
+
+ByteArray: TypeAlias = npt.NDArray[np.uint8]
+
+AES_REDUCTION = 0x1B  # x^8 + x^4 + x^3 + x + 1, sin el término x^8
+GF16_REDUCTION = 0x002B  # x^16 + x^5 + x^3 + x + 1, el `REDUCTION` de mult.c
+GENERATOR = 0x03
+
+
+def xtime(f: int, r: int = AES_REDUCTION, n: int = 8) -> int:
+    """
+    Multiplica `f` por `x` en GF(2^n) módulo x^n + `r`.
+
+    :param f: Elemento del campo.
+    :type f: int
+    :param r: Polinomio de reducción sin el término x^n.
+    :type r: int
+    :param n: Grado del campo.
+    :type n: int
+    :return: `x * f`.
+    :rtype: int
+    """
+    carry = f & (1 << (n - 1))
+    f = (f << 1) & ((1 << n) - 1)
+    return f ^ r if carry else f
+
+
+def mult(a: int, b: int, r: int = AES_REDUCTION, n: int = 8) -> int:
+    """
+    Producto en GF(2^n) con el método de `mult.c`: por cada bit de `b`
+    se suma `a` y se multiplica `a` por `x`. Con `r=GF16_REDUCTION` y
+    `n=16` es el `fg_mult` de la práctica.
+
+    :param a: Primer factor.
+    :type a: int
+    :param b: Segundo factor.
+    :type b: int
+    :param r: Polinomio de reducción sin el término x^n.
+    :type r: int
+    :param n: Grado del campo.
+    :type n: int
+    :return: `a * b`.
+    :rtype: int
+    """
+    c = 0
+    for _ in range(n):
+        if b & 1:
+            c ^= a
+        a = xtime(a, r, n)
+        b >>= 1
+    return c
+
+
+def _build_tables() -> tuple[ByteArray, npt.NDArray[np.int_], ByteArray, ByteArray]:
+    """
+    Potencias del generador (`EXP`, duplicada para sumar logaritmos sin
+    reducir módulo 255), logaritmos, tabla de multiplicar e inversos.
+    """
+    exp = np.zeros(510, dtype=np.uint8)
+    x = 1
+    for i in range(255):
+        exp[i] = exp[i + 255] = x
+        x = mult(x, GENERATOR)
+
+    log = np.zeros(256, dtype=np.int_)
+    log[exp[:255]] = np.arange(255)
+
+    # a * b = exp[log a + log b], y 0 cuando algún factor es 0
+    mul = exp[log[:, None] + log[None, :]]
+    mul[0, :] = 0
+    mul[:, 0] = 0
+
+    # a^-1 = exp[255 - log a]; el inverso de 0 se deja en 0, como en AES
+    inv = exp[255 - log]
+    inv[0] = 0
+
+    for table in (exp, log, mul, inv):
+        table.flags.writeable = False
+    return exp, log, mul, inv
+
+
+EXP_TABLE, LOG_TABLE, MUL_TABLE, INV_TABLE = _build_tables()
+
+
+def _as_bytes(a: npt.ArrayLike) -> ByteArray:
+    return np.asarray(a, dtype=np.uint8)
+
+
+def add(a: npt.ArrayLike, b: npt.ArrayLike) -> ByteArray:
+    """Suma (y resta) en GF(2^8): XOR elemento a elemento."""
+    return np.bitwise_xor(_as_bytes(a), _as_bytes(b))
+
+
+def multiply(a: npt.ArrayLike, b: npt.ArrayLike) -> ByteArray:
+    """
+    Producto elemento a elemento, con las reglas de broadcasting de
+    NumPy.
+
+    :param a: Bytes o arreglo de bytes.
+    :type a: npt.ArrayLike
+    :param b: Bytes o arreglo de bytes.
+    :type b: npt.ArrayLike
+    :return: Arreglo con los productos.
+    :rtype: ByteArray
+    """
+    return MUL_TABLE[_as_bytes(a), _as_bytes(b)]
+
+
+def inverse(a: npt.ArrayLike) -> ByteArray:
+    """
+    Inverso multiplicativo elemento a elemento. Lanza
+    `ZeroDivisionError` si algún elemento es 0 (para la convención de
+    AES, donde el inverso de 0 es 0, usar `INV_TABLE` directamente).
+
+    :param a: Bytes o arreglo de bytes.
+    :type a: npt.ArrayLike
+    :return: Arreglo con los inversos.
+    :rtype: ByteArray
+    """
+    a = _as_bytes(a)
+    if not np.all(a):
+        raise ZeroDivisionError("0 no tiene inverso en GF(2^8)")
+    return INV_TABLE[a]
+
+
+def divide(a: npt.ArrayLike, b: npt.ArrayLike) -> ByteArray:
+    """Cociente `a / b` elemento a elemento; `b` no puede tener ceros."""
+    return multiply(a, inverse(b))
+
+
+def power(a: npt.ArrayLike, k: int) -> ByteArray:
+    """
+    `a` elevado a `k` elemento a elemento, con logaritmos. `k` puede
+    ser negativo si `a` no tiene ceros.
+
+    :param a: Bytes o arreglo de bytes.
+    :type a: npt.ArrayLike
+    :param k: Exponente.
+    :type k: int
+    :return: Arreglo con las potencias.
+    :rtype: ByteArray
+    """
+    a = _as_bytes(a)
+    if k < 0:
+        return power(inverse(a), -k)
+    if k == 0:
+        return np.ones_like(a)
+
+    result = EXP_TABLE[(LOG_TABLE[a] * k) % 255]
+    return np.where(a == 0, np.uint8(0), result)
+
+
+def matvec(matrix: npt.ArrayLike, vectors: npt.ArrayLike) -> ByteArray:
+    """
+    Producto de una matriz `(m, k)` por muchos vectores `(..., k)` en
+    GF(2^8): cada salida es el XOR de los productos de la fila por el
+    vector. Por ejemplo, MixColumns es `matvec(MIX, columnas)` con las
+    columnas del estado como arreglo `(N, 4)`.
+
+    :param matrix: Matriz de coeficientes.
+    :type matrix: npt.ArrayLike
+    :param vectors: Vectores en la última dimensión.
+    :type vectors: npt.ArrayLike
+    :return: Arreglo `(..., m)` con los resultados.
+    :rtype: ByteArray
+    """
+    matrix = _as_bytes(matrix)
+    vectors = _as_bytes(vectors)
+    if matrix.ndim != 2 or vectors.shape[-1] != matrix.shape[1]:
+        raise ValueError("Las dimensiones de la matriz y los vectores no coinciden")
+
+    # (..., 1, k) contra (m, k): todos los productos (..., m, k) de una vez
+    products = MUL_TABLE[matrix, vectors[..., None, :]]
+    return np.bitwise_xor.reduce(products, axis=-1)
@@ -1,3 +1,9 @@
-from .hill_cipher import hill_cipher_menu
+from .hill_cipher import (
+    hill_cipher_menu,
+    HillCipher,
+)
 
-__all__ = ["hill_cipher_menu"]
+__all__ = [
+    "hill_cipher_menu",
+    "HillCipher",
+]
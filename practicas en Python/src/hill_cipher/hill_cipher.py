@@ -4,8 +4,14 @@ import numpy as np
 import numpy.typing as npt
 from typing import TypeAlias
 
+from ciphers import (
+    BufferedTextStream,
+    Cipher,
+    CipherStream,
+)
 from config import BASE_DIR
 from decorators import (
+    instrumented,
     validate_file,
     validate_key,
 )
@@ -17,7 +23,10 @@ from utils import (
     yellow,
 )
 
-__all__ = ["hill_cipher_menu"]
+__all__ = [
+    "hill_cipher_menu",
+    "HillCipher",
+]
 
 Matrix2x2: TypeAlias = npt.NDArray[np.int_]
 
@@ -131,16 +140,12 @@ def _convert_key_format(key: str) -> Matrix2x2:
     return np.array(key_matrix, dtype=np.int_)
 
 
-@validate_key(_is_valid_key)
-@validate_file("plaintext_file")
-def _encrypt_hill(
-        key: Matrix2x2,
-        plaintext_file: str,
-        ciphertext_file: str,
-    ) -> None:
-    with open(BASE_DIR / plaintext_file, "r", encoding="utf-8") as f:
-        plaintext = f.read()
-    
+def _hill_encrypt_text(plaintext: str, key: Matrix2x2) -> str:
+    """
+    Cifra en bloques de 2 los caracteres ASCII imprimibles de
+    `plaintext` y los reinserta en su posición; los demás caracteres
+    se dejan igual.
+    """
     # Filtrar caracteres que sí se cifran
     filtered_text = [c for c in plaintext if 32 <= ord(c) <= 126]
 
@@ -172,30 +177,14 @@ def _encrypt_hill(
     if k < len(encrypted_clean):
         final_ciphertext += encrypted_clean[k:]
 
-    with open(BASE_DIR / ciphertext_file, "w", encoding="utf-8") as f:
-        f.write(final_ciphertext)
-
-    print(
-        f"\n{yellow('>>')} "
-        f"{success(f'Texto cifrado correctamente y guardado en {ciphertext_file}')}"
-    )
-    
+    return final_ciphertext
 
-@validate_key(_is_valid_key)
-@validate_file("ciphertext_file")
-def _decrypt_hill(
-        key: Matrix2x2,
-        ciphertext_file: str,
-    ) -> None:
-    try:
-        with open(BASE_DIR / ciphertext_file, "r", encoding="utf-8") as f:
-            ciphertext = f.read()
-    except FileNotFoundError:
-        print(">> El archivo con el 'ciphertext' no existe")
-        return
-    
-    inverse_key = _calculate_inverse_key(key)
 
+def _hill_decrypt_text(ciphertext: str, inverse_key: Matrix2x2) -> str:
+    """
+    Descifra en bloques de 2 los caracteres ASCII imprimibles de
+    `ciphertext` con `K^-1 mod n` y quita el relleno final.
+    """
     # Filtrar caracteres cifrados válidos
     filtered_text = [c for c in ciphertext if 32 <= ord(c) <= 126]
 
@@ -224,8 +213,77 @@ def _decrypt_hill(
     if final_plaintext.endswith("X"):
         final_plaintext = final_plaintext[:-1]
 
+    return final_plaintext
+
+
+class HillCipher(Cipher):
+    """
+    Hill Cipher 2x2 sobre texto UTF-8, sin archivos ni impresiones.
+    Necesita el texto completo por el relleno y la reinserción, así
+    que los objetos incrementales acumulan la entrada hasta `finalize`.
+    """
+
+    name = "hill"
+
+    def __init__(self, key: Matrix2x2) -> None:
+        key = np.asarray(key, dtype=np.int_).reshape(2, 2)
+        if not _is_valid_key(key):
+            raise ValueError("Llave no válida para Hill Cipher: gcd(det(K), 95) != 1")
+
+        self.key = key
+        self.inverse_key = _calculate_inverse_key(key)
+
+    def encryptor(self) -> CipherStream:
+        return BufferedTextStream(lambda text: _hill_encrypt_text(text, self.key))
+
+    def decryptor(self) -> CipherStream:
+        return BufferedTextStream(lambda text: _hill_decrypt_text(text, self.inverse_key))
+
+
+@instrumented("hill.encrypt", size_param="plaintext_file")
+@validate_key(_is_valid_key)
+@validate_file("plaintext_file")
+def _encrypt_hill(
+        key: Matrix2x2,
+        plaintext_file: str,
+        ciphertext_file: str,
+    ) -> str:
+    with open(BASE_DIR / plaintext_file, "r", encoding="utf-8") as f:
+        plaintext = f.read()
+    
+    final_ciphertext = _hill_encrypt_text(plaintext, key)
+
+    with open(BASE_DIR / ciphertext_file, "w", encoding="utf-8") as f:
+        f.write(final_ciphertext)
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'Texto cifrado correctamente y guardado en {ciphertext_file}')}"
+    )
+    return ciphertext_file
+    
+
+@instrumented("hill.decrypt", size_param="ciphertext_file")
+@validate_key(_is_valid_key)
+@validate_file("ciphertext_file")
+def _decrypt_hill(
+        key: Matrix2x2,
+        ciphertext_file: str,
+    ) -> str | None:
+    try:
+        with open(BASE_DIR / ciphertext_file, "r", encoding="utf-8") as f:
+            ciphertext = f.read()
+    except FileNotFoundError:
+        print(">> El archivo con el 'ciphertext' no existe")
+        return
+    
+    inverse_key = _calculate_inverse_key(key)
+
+    final_plaintext = _hill_decrypt_text(ciphertext, inverse_key)
+
     print(f"\n{yellow('>>')} El K^-1 mod n usado fue: \n\n{_calculate_inverse_key(key)}")
     print(f"\n{yellow('>>')} Texto original recuperado:\n\n{final_plaintext}")
+    return final_plaintext
 
 
 def hill_cipher_menu() -> None:
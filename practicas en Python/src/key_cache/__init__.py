@@ -0,0 +1,13 @@
+from .key_cache import (
+    KeyCache,
+    KEY_CACHE,
+    DerivedKeyCache,
+    DERIVED_KEY_CACHE,
+)
+
+__all__ = [
+    "KeyCache",
+    "KEY_CACHE",
+    "DerivedKeyCache",
+    "DERIVED_KEY_CACHE",
+]
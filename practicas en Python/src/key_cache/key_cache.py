@@ -0,0 +1,228 @@
+"""Caché de llaves decodificadas con expulsión LRU y por tiempo."""
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+__all__ = [
+    "KeyCache",
+    "KEY_CACHE",
+    "DerivedKeyCache",
+    "DERIVED_KEY_CACHE",
+]
+
+MAX_ENTRIES = 128
+TTL_SECONDS = 300.0
+MAX_DERIVED = 32
+
+
+def _zero(key: bytearray) -> None:
+    """Sobrescribe la llave con ceros en el mismo buffer."""
+    key[:] = bytes(len(key))
+
+
+class KeyCache:
+    """
+    Caché de llaves decodificadas, indexada por la ruta del archivo.
+
+    Cada entrada guarda el `mtime` y el tamaño del archivo cuando se
+    leyó; si el archivo cambió, la entrada se descarta. Además se
+    expulsan las entradas más antiguas que `ttl` segundos y las menos
+    usadas cuando se supera `max_entries`. Al expulsar una entrada su
+    buffer se llena de ceros; `get` y `put` devuelven siempre una copia
+    inmutable, así que una expulsión desde otro hilo nunca cambia la
+    llave que otro ya está usando.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = MAX_ENTRIES,
+            ttl: float = TTL_SECONDS,
+        ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[int, int, float, bytearray]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, path: str) -> None:
+        _, _, _, key = self._entries.pop(path)
+        _zero(key)
+
+    def _sweep(self) -> None:
+        """
+        Expulsa todas las entradas expiradas, no solo la que se pide,
+        para que una llave que ya no se usa no quede en memoria.
+        """
+        now = time.monotonic()
+        expired = [
+            path for path, (_, _, loaded_at, _) in self._entries.items()
+            if now - loaded_at > self.ttl
+        ]
+        for path in expired:
+            self._evict(path)
+
+    def get(self, path: Path | str, stat: os.stat_result) -> bytes | None:
+        """
+        Devuelve la llave de `path` si está en caché, no ha expirado y
+        el archivo no cambió desde que se leyó.
+
+        :param path: Ruta del archivo de la llave.
+        :type path: Path | str
+        :param stat: Resultado de `stat` actual del archivo.
+        :type stat: os.stat_result
+        :return: Copia de la llave decodificada o `None`.
+        :rtype: bytes | None
+        """
+        path = str(path)
+
+        with self._lock:
+            self._sweep()
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+
+            mtime_ns, size, _, key = entry
+            if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+                self._evict(path)
+                return None
+
+            self._entries.move_to_end(path)
+            return bytes(key)
+
+    def put(self, path: Path | str, stat: os.stat_result, key: bytes) -> bytes:
+        """
+        Guarda una copia de `key` para `path` y devuelve otra.
+
+        :param path: Ruta del archivo de la llave.
+        :type path: Path | str
+        :param stat: Resultado de `stat` del archivo al leerlo.
+        :type stat: os.stat_result
+        :param key: Llave decodificada.
+        :type key: bytes
+        :return: Copia de la llave.
+        :rtype: bytes
+        """
+        path = str(path)
+        cached = bytearray(key)
+
+        with self._lock:
+            self._sweep()
+            if path in self._entries:
+                self._evict(path)
+
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, time.monotonic(), cached)
+
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+        return bytes(cached)
+
+    def evict(self, path: Path | str) -> None:
+        """Descarta la llave de `path` si está en caché."""
+        with self._lock:
+            if str(path) in self._entries:
+                self._evict(str(path))
+
+    def clear(self) -> None:
+        """Descarta y pone en ceros todas las llaves."""
+        with self._lock:
+            for path in list(self._entries):
+                self._evict(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Caché compartida por todo el proceso
+KEY_CACHE = KeyCache()
+
+
+class DerivedKeyCache:
+    """
+    Caché de llaves derivadas de una contraseña, indexada por la
+    contraseña y los parámetros de derivación.
+
+    Derivar una llave cuesta a propósito décimas de segundo, así que en
+    un lote cada contraseña se deriva una sola vez. Las entradas se
+    identifican con un HMAC cuyo secreto es aleatorio por proceso: la
+    caché no guarda las contraseñas ni un hash que sirva para probarlas
+    fuera del proceso. Las menos usadas se expulsan al superar
+    `max_entries` y su buffer se llena de ceros; igual que en `KeyCache`,
+    quien pide una llave recibe siempre una copia inmutable.
+    """
+
+    def __init__(self, max_entries: int = MAX_DERIVED) -> None:
+        self.max_entries = max_entries
+        self._secret = os.urandom(32)
+        self._entries: OrderedDict[bytes, bytearray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._derive_lock = threading.Lock()
+
+    def _id(self, password: bytes, params: bytes) -> bytes:
+        message = len(password).to_bytes(4, "big") + password + params
+        return hmac.new(self._secret, message, hashlib.sha256).digest()
+
+    def _get(self, entry_id: bytes) -> bytes | None:
+        with self._lock:
+            key = self._entries.get(entry_id)
+            if key is None:
+                return None
+            self._entries.move_to_end(entry_id)
+            return bytes(key)
+
+    def get_or_derive(
+            self,
+            password: bytes,
+            params: bytes,
+            derive: Callable[[], bytes],
+        ) -> bytes:
+        """
+        Devuelve una copia de la llave de `password` con `params`; si no
+        está en caché la obtiene con `derive` y la guarda. Las
+        derivaciones se hacen de una en una, así que varios hilos que
+        piden la misma llave la derivan una sola vez.
+
+        :param password: Contraseña.
+        :type password: bytes
+        :param params: Parámetros de derivación serializados.
+        :type params: bytes
+        :param derive: Función que deriva la llave.
+        :type derive: Callable[[], bytes]
+        :return: Copia de la llave.
+        :rtype: bytes
+        """
+        entry_id = self._id(password, params)
+        key = self._get(entry_id)
+        if key is not None:
+            return key
+
+        with self._derive_lock:
+            key = self._get(entry_id)
+            if key is not None:
+                return key
+
+            key = bytes(derive())
+            with self._lock:
+                self._entries[entry_id] = bytearray(key)
+                while len(self._entries) > self.max_entries:
+                    _zero(self._entries.popitem(last=False)[1])
+            return key
+
+    def clear(self) -> None:
+        """Descarta y pone en ceros todas las llaves."""
+        with self._lock:
+            for key in self._entries.values():
+                _zero(key)
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Caché de llaves derivadas compartida por todo el proceso
+DERIVED_KEY_CACHE = DerivedKeyCache()
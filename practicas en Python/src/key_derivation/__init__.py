@@ -0,0 +1,23 @@
+from .key_derivation import (
+    KDFS,
+    KDFParams,
+    calibrate,
+    derive_key,
+    is_params,
+    key_from_params,
+    password_key,
+    read_password,
+    set_password,
+)
+
+__all__ = [
+    "KDFS",
+    "KDFParams",
+    "calibrate",
+    "derive_key",
+    "is_params",
+    "key_from_params",
+    "password_key",
+    "read_password",
+    "set_password",
+]
@@ -0,0 +1,296 @@
+"""
+Llaves derivadas de una contraseña con scrypt o PBKDF2.
+
+En lugar de la llave, el archivo `.kdf` guarda los parámetros de
+derivación en una línea:
+
+    $scrypt$n=32768,r=8,p=1$<sal en base 64>$32$<verificación>
+
+La verificación son los primeros bytes de un SHA-256 de la llave y
+sirve para rechazar una contraseña equivocada antes de cifrar o
+descifrar con ella; no revela nada útil de la llave.
+
+El costo se elige con `calibrate`, que mide la máquina y toma los
+parámetros más altos que no pasen del tiempo objetivo (sin bajar de los
+mínimos). Las llaves derivadas se guardan en `DERIVED_KEY_CACHE`, así
+que en un lote cada contraseña se deriva una sola vez.
+"""
+
+import base64
+import getpass
+import hashlib
+import os
+import threading
+import time
+from dataclasses import (
+    dataclass,
+    replace,
+)
+
+from Crypto.Hash import SHA256
+from Crypto.Protocol.KDF import (
+    PBKDF2,
+    scrypt,
+)
+
+from key_cache import (
+    DERIVED_KEY_CACHE,
+    DerivedKeyCache,
+)
+
+__all__ = [
+    "KDFS",
+    "KDFParams",
+    "calibrate",
+    "derive_key",
+    "is_params",
+    "key_from_params",
+    "password_key",
+    "read_password",
+    "set_password",
+]
+
+KDFS = ("scrypt", "pbkdf2")
+
+TARGET_SECONDS = 0.25  # Tiempo objetivo de una derivación
+MAX_MEMORY = 256 * 1024 * 1024  # Memoria máxima de scrypt (128·r·n bytes)
+MIN_SCRYPT_N = 2**14
+MIN_PBKDF2_ITERATIONS = 100_000
+SALT_SIZE = 16
+CHECK_SIZE = 4
+
+PASSWORD_ENV = "CRYPTO_PASSWORD"  # Variable con la contraseña para lotes
+
+_MAGIC = "$"
+
+_password: str | None = None
+_password_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class KDFParams:
+    """
+    Parámetros de derivación. `cost` es `n` en scrypt y el número de
+    iteraciones en PBKDF2 (con HMAC-SHA256); `r` y `p` solo se usan en
+    scrypt.
+    """
+    kdf: str
+    salt: bytes
+    key_size: int
+    cost: int
+    r: int = 8
+    p: int = 1
+    check: bytes = b""
+
+    def dumps(self) -> str:
+        """Línea del archivo `.kdf`."""
+        if self.kdf == "scrypt":
+            cost = f"n={self.cost},r={self.r},p={self.p}"
+        else:
+            cost = f"i={self.cost}"
+
+        salt = base64.b64encode(self.salt).decode()
+        return f"{_MAGIC}{self.kdf}{_MAGIC}{cost}{_MAGIC}{salt}{_MAGIC}{self.key_size}{_MAGIC}{self.check.hex()}"
+
+    @classmethod
+    def loads(cls, text: str) -> "KDFParams":
+        """
+        Lee una línea de `dumps`. Lanza `ValueError` si no es válida.
+
+        :param text: Contenido del archivo `.kdf`.
+        :type text: str
+        :return: Parámetros.
+        :rtype: KDFParams
+        """
+        try:
+            empty, kdf, cost, salt, key_size, check = text.strip().split(_MAGIC)
+            if empty or kdf not in KDFS:
+                raise ValueError
+
+            values = dict(item.split("=") for item in cost.split(","))
+            params = cls(
+                kdf=kdf,
+                salt=base64.b64decode(salt, validate=True),
+                key_size=int(key_size),
+                cost=int(values["n" if kdf == "scrypt" else "i"]),
+                r=int(values.get("r", 8)),
+                p=int(values.get("p", 1)),
+                check=bytes.fromhex(check),
+            )
+        except (ValueError, KeyError):
+            raise ValueError("Los parámetros de derivación no son válidos") from None
+
+        if params.cost < 1 or params.key_size < 1 or not params.salt:
+            raise ValueError("Los parámetros de derivación no son válidos")
+        return params
+
+    def with_check(self, key: bytes) -> "KDFParams":
+        """Los mismos parámetros con la verificación de `key`."""
+        return replace(self, check=_key_check(key))
+
+
+def is_params(data: bytes) -> bool:
+    """Indica si el contenido de un archivo de llave son parámetros."""
+    return data.lstrip().startswith(_MAGIC.encode())
+
+
+def _key_check(key: bytes) -> bytes:
+    return hashlib.sha256(b"key_derivation" + bytes(key)).digest()[:CHECK_SIZE]
+
+
+def _as_bytes(password: str | bytes) -> bytes:
+    return password.encode("utf-8") if isinstance(password, str) else password
+
+
+def derive_key(password: str | bytes, params: KDFParams) -> bytes:
+    """
+    Deriva la llave sin usar la caché ni comprobar la verificación.
+
+    :param password: Contraseña.
+    :type password: str | bytes
+    :param params: Parámetros de derivación.
+    :type params: KDFParams
+    :return: Llave de `params.key_size` bytes.
+    :rtype: bytes
+    """
+    password = _as_bytes(password)
+    if params.kdf == "scrypt":
+        return scrypt(password, params.salt, params.key_size, params.cost, params.r, params.p)
+    if params.kdf == "pbkdf2":
+        return PBKDF2(password, params.salt, params.key_size, params.cost, hmac_hash_module=SHA256)
+    raise ValueError(f"Función de derivación desconocida: {params.kdf}")
+
+
+def password_key(
+        password: str | bytes,
+        params: KDFParams,
+        cache: DerivedKeyCache | None = DERIVED_KEY_CACHE,
+    ) -> bytes:
+    """
+    Llave de `password` con `params`, tomada de la caché si ya se
+    derivó. Lanza `ValueError` si la contraseña no coincide con la
+    verificación de `params`.
+
+    :param password: Contraseña.
+    :type password: str | bytes
+    :param params: Parámetros de derivación.
+    :type params: KDFParams
+    :param cache: Caché de llaves derivadas; `None` para no usarla.
+    :type cache: DerivedKeyCache | None
+    :return: Llave derivada.
+    :rtype: bytes
+    """
+    password = _as_bytes(password)
+    if cache is None:
+        key = derive_key(password, params)
+    else:
+        # La verificación no es parte de la identidad de la llave
+        identity = replace(params, check=b"").dumps().encode()
+        key = cache.get_or_derive(password, identity, lambda: derive_key(password, params))
+
+    if params.check and _key_check(key) != params.check:
+        raise ValueError("La contraseña no es correcta")
+    return key
+
+
+def key_from_params(data: bytes) -> bytes:
+    """
+    Llave de un archivo `.kdf`: lee los parámetros, obtiene la
+    contraseña con `read_password` y la deriva (o la toma de la caché).
+    Lanza `ValueError` si los parámetros o la contraseña no son válidos.
+
+    :param data: Contenido del archivo.
+    :type data: bytes
+    :return: Llave derivada.
+    :rtype: bytes
+    """
+    params = KDFParams.loads(data.decode("ascii", errors="replace"))
+    return password_key(read_password(), params)
+
+
+def _time(params: KDFParams) -> float:
+    start = time.perf_counter()
+    derive_key(b"calibrate", params)
+    return time.perf_counter() - start
+
+
+def calibrate(
+        kdf: str = "scrypt",
+        target: float = TARGET_SECONDS,
+        key_size: int = 32,
+        max_memory: int = MAX_MEMORY,
+    ) -> KDFParams:
+    """
+    Mide la máquina y devuelve parámetros con una sal nueva cuyo costo
+    se acerca a `target` segundos sin pasarse. En scrypt se duplica `n`
+    mientras la siguiente medición quepa en el objetivo y en
+    `max_memory`; en PBKDF2 el tiempo es lineal en las iteraciones y
+    se extrapola de una medición. En una máquina lenta se usan los mínimos aunque
+    tarden más que `target`.
+
+    :param kdf: `scrypt` o `pbkdf2`.
+    :type kdf: str
+    :param target: Tiempo objetivo en segundos.
+    :type target: float
+    :param key_size: Tamaño de la llave en bytes.
+    :type key_size: int
+    :param max_memory: Memoria máxima de scrypt en bytes.
+    :type max_memory: int
+    :return: Parámetros sin verificación.
+    :rtype: KDFParams
+    """
+    salt = os.urandom(SALT_SIZE)
+
+    if kdf == "scrypt":
+        params = KDFParams("scrypt", salt, key_size, 2**10)
+        elapsed = _time(params)
+        while (
+            elapsed * 2 <= target
+            and 128 * params.r * params.cost * 2 <= max_memory
+        ):
+            params = replace(params, cost=params.cost * 2)
+            elapsed = _time(params)
+
+        cost = params.cost if elapsed <= target else params.cost // 2
+        return replace(params, cost=max(cost, MIN_SCRYPT_N))
+
+    if kdf == "pbkdf2":
+        # Una medición muy corta es puro ruido: se duplica hasta que
+        # tarde al menos una décima del objetivo
+        probe = 10_000
+        elapsed = _time(KDFParams("pbkdf2", salt, key_size, probe))
+        while elapsed < target / 10:
+            probe *= 2
+            elapsed = _time(KDFParams("pbkdf2", salt, key_size, probe))
+        iterations = int(probe * target / elapsed) // 1000 * 1000
+        return KDFParams("pbkdf2", salt, key_size, max(iterations, MIN_PBKDF2_ITERATIONS))
+
+    raise ValueError(f"Función de derivación desconocida: {kdf}")
+
+
+def set_password(password: str | None) -> None:
+    """
+    Fija la contraseña que devolverá `read_password`, para que un lote
+    con varios hilos la pida una sola vez. `None` la olvida.
+    """
+    global _password
+    with _password_lock:
+        _password = password
+
+
+def read_password(prompt: str = "Contraseña: ") -> str:
+    """
+    Contraseña fijada con `set_password`, la de la variable de entorno
+    `CRYPTO_PASSWORD` o, si no hay ninguna, la que escriba el usuario.
+
+    :param prompt: Texto para pedir la contraseña.
+    :type prompt: str
+    :return: Contraseña.
+    :rtype: str
+    """
+    with _password_lock:
+        if _password is not None:
+            return _password
+        if PASSWORD_ENV in os.environ:
+            return os.environ[PASSWORD_ENV]
+        return getpass.getpass(prompt)
@@ -0,0 +1,35 @@
+from .key_ring import (
+    KEYRING_FILE,
+    KINDS,
+    KeyEntry,
+    Keyring,
+    RING_PREFIX,
+    add_key,
+    add_keys,
+    compact,
+    fingerprint,
+    is_reference,
+    key_ring_menu,
+    load_key,
+    pack_rsa,
+    store_key,
+    unpack_rsa,
+)
+
+__all__ = [
+    "KEYRING_FILE",
+    "KINDS",
+    "KeyEntry",
+    "Keyring",
+    "RING_PREFIX",
+    "add_key",
+    "add_keys",
+    "compact",
+    "fingerprint",
+    "is_reference",
+    "key_ring_menu",
+    "load_key",
+    "pack_rsa",
+    "store_key",
+    "unpack_rsa",
+]
@@ -0,0 +1,665 @@
+"""
+Llavero binario con índice para llaves de AES, DES y RSA.
+
+Todas las llaves quedan en un solo archivo (`keys.ring`) en lugar de un
+archivo de texto por llave. El archivo se abre con `mmap` y cada
+búsqueda por id es una consulta a una tabla hash guardada en el mismo
+archivo: no se lee ni se decodifica nada más que la llave pedida.
+
+Formato (enteros big-endian):
+
+    cabecera (40 bytes): b"KRNG", versión (H), reservado (H), número de
+        llaves (I), número de ranuras (I), posición del índice (Q),
+        bytes sin usar (Q) y fin de los datos (Q)
+    registros: tipo (B), longitud del id (H), longitud de la llave (I),
+        id en UTF-8 y llave
+    índice: `ranuras` entradas (hash del id, posición, longitud) con
+        sondeo lineal; la posición 0 marca una ranura vacía
+    pendientes: registros agregados después del índice, hasta el fin de
+        los datos; tienen prioridad sobre el índice
+
+Al agregar llaves los registros se escriben al final y la cabecera se
+actualiza al último, así que un lector (o una escritura interrumpida)
+siempre ve el llavero anterior completo. El índice no se reescribe en
+cada llamada: las llaves quedan pendientes y se pasan a un índice nuevo
+cuando son más de `MAX_PENDING`, así que agregar llaves de una en una
+cuesta en promedio una fracción de la tabla y no la tabla completa. Los
+índices viejos y las llaves reemplazadas quedan como bytes sin usar;
+cuando pasan del doble de los usados, el llavero se compacta.
+
+Las escrituras toman un bloqueo del sistema operativo sobre un archivo
+aparte (`.keys.ring.lock`), así que varios procesos pueden agregar
+llaves al mismo llavero sin perder ninguna.
+
+Donde se pide una llave (`--key` de la CLI o los menús de AES y DES) se
+puede escribir `ring:<id>` para tomarla del llavero con `load_key`.
+"""
+
+import base64
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+)
+
+import numpy as np
+import numpy.typing as npt
+
+from config import BASE_DIR
+from utils import (
+    clean_console,
+    error,
+    success,
+    wait_key,
+    yellow,
+)
+
+__all__ = [
+    "KEYRING_FILE",
+    "KINDS",
+    "KeyEntry",
+    "Keyring",
+    "RING_PREFIX",
+    "add_key",
+    "add_keys",
+    "compact",
+    "fingerprint",
+    "is_reference",
+    "key_ring_menu",
+    "load_key",
+    "pack_rsa",
+    "store_key",
+    "unpack_rsa",
+]
+
+KEYRING_FILE = "keys.ring"
+RING_PREFIX = "ring:"  # Prefijo de las referencias a llaves del llavero
+
+# Tipo de llave -> código guardado en el registro
+KINDS: dict[str, int] = {
+    "aes": 1,
+    "des": 2,
+    "rsa": 3,
+}
+_KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+_HEADER = struct.Struct(">4sHHIIQQQ")
+_RECORD = struct.Struct(">BHI")
+_SLOT = struct.Struct(">QQQ")
+_SLOT_TYPE = np.dtype(">u8")
+
+_MAGIC = b"KRNG"
+_VERSION = 2
+MIN_SLOTS = 64
+MAX_LOAD = 0.5  # Fracción máxima de ranuras ocupadas
+MAX_PENDING = 256  # Llaves fuera del índice antes de reescribirlo
+
+# Las escrituras de este proceso se hacen de una en una
+_write_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class KeyEntry:
+    """Llave del llavero: id, tipo (`aes`, `des` o `rsa`) y bytes."""
+    key_id: str
+    kind: str
+    data: bytes
+
+
+def _hash(key_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def pack_rsa(e: int, d: int, n: int) -> bytes:
+    """Bytes de una llave RSA: `e`, `d` y `n` con su longitud."""
+    out = bytearray()
+    for value in (e, d, n):
+        raw = value.to_bytes((value.bit_length() + 7) // 8 or 1, "big")
+        out += len(raw).to_bytes(4, "big") + raw
+    return bytes(out)
+
+
+def unpack_rsa(data: bytes) -> tuple[int, int, int]:
+    """Inverso de `pack_rsa`: devuelve `(e, d, n)`."""
+    values, pos = [], 0
+    for _ in range(3):
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        values.append(int.from_bytes(data[pos + 4:pos + 4 + length], "big"))
+        pos += 4 + length
+    e, d, n = values
+    return e, d, n
+
+
+def _scan_pending(data: bytes, start: int) -> dict[str, tuple[int, int]]:
+    """
+    Registros pendientes (los que están después del índice) por id:
+    posición y longitud. `data` son los bytes desde `start` hasta el fin
+    de los datos; si un id se repite, vale el último.
+    """
+    records: dict[str, tuple[int, int]] = {}
+    pos = 0
+    while pos < len(data):
+        _, id_length, data_length = _RECORD.unpack_from(data, pos)
+        length = _RECORD.size + id_length + data_length
+        if pos + length > len(data):
+            raise ValueError
+        key_id = data[pos + _RECORD.size:pos + _RECORD.size + id_length].decode("utf-8")
+        records[key_id] = (start + pos, length)
+        pos += length
+    return records
+
+
+@contextmanager
+def _locked(full_path: Path) -> Iterator[None]:
+    """
+    Bloqueo de escritura del llavero entre hilos y entre procesos. Se
+    bloquea un archivo aparte porque `_compact` reemplaza el llavero y
+    un bloqueo sobre el archivo viejo ya no excluiría a nadie.
+    """
+    lock_path = full_path.with_name(f".{full_path.name}.lock")
+
+    with _write_lock, open(lock_path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt  # Solo existe en Windows
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class Keyring:
+    """
+    Llavero abierto para lectura con `mmap`.
+
+    `get` y `in` cuestan O(1) en promedio sin importar cuántas llaves
+    haya: al abrirlo solo se leen los registros pendientes (a lo más
+    `MAX_PENDING`). El llavero refleja el archivo al momento de
+    abrirlo; las llaves agregadas después se ven al abrirlo otra vez.
+    """
+
+    def __init__(self, path: str | Path = KEYRING_FILE) -> None:
+        self.path = BASE_DIR / path
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, _, self._count, self._slots, self._index, _, end = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError
+
+            pending_start = self._index + self._slots * _SLOT.size
+            if not _HEADER.size <= pending_start <= end <= len(self._map):
+                raise ValueError
+            self._pending = _scan_pending(self._map[pending_start:end], pending_start)
+        except (ValueError, struct.error):
+            self.close()
+            raise ValueError(f"{self.path.name} no es un llavero válido") from None
+
+    def _record(self, offset: int) -> KeyEntry:
+        kind, id_length, data_length = _RECORD.unpack_from(self._map, offset)
+        start = offset + _RECORD.size
+        key_id = self._map[start:start + id_length].decode("utf-8")
+        data = self._map[start + id_length:start + id_length + data_length]
+        return KeyEntry(key_id, _KIND_NAMES.get(kind, str(kind)), data)
+
+    def _record_id(self, offset: int) -> str:
+        _, id_length, _ = _RECORD.unpack_from(self._map, offset)
+        start = offset + _RECORD.size
+        return self._map[start:start + id_length].decode("utf-8")
+
+    def _find(self, key_id: str) -> int | None:
+        """Posición del registro de `key_id` o `None`."""
+        pending = self._pending.get(key_id)
+        if pending is not None:
+            return pending[0]
+        if not self._slots:
+            return None
+
+        h = _hash(key_id)
+        mask = self._slots - 1
+        i = h & mask
+        for _ in range(self._slots):
+            slot_hash, offset, _ = _SLOT.unpack_from(self._map, self._index + i * _SLOT.size)
+            if offset == 0:
+                return None
+            if slot_hash == h and self._record_id(offset) == key_id:
+                return offset
+            i = (i + 1) & mask
+        return None
+
+    def get(self, key_id: str) -> KeyEntry | None:
+        """
+        Busca una llave por su id.
+
+        :param key_id: Id de la llave.
+        :type key_id: str
+        :return: La llave o `None` si no está.
+        :rtype: KeyEntry | None
+        """
+        offset = self._find(key_id)
+        return None if offset is None else self._record(offset)
+
+    def __getitem__(self, key_id: str) -> KeyEntry:
+        entry = self.get(key_id)
+        if entry is None:
+            raise KeyError(key_id)
+        return entry
+
+    def __contains__(self, key_id: object) -> bool:
+        return isinstance(key_id, str) and self._find(key_id) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        """Ids de las llaves: las del índice y luego las pendientes."""
+        for i in range(self._slots):
+            _, offset, _ = _SLOT.unpack_from(self._map, self._index + i * _SLOT.size)
+            if offset:
+                key_id = self._record_id(offset)
+                if key_id not in self._pending:
+                    yield key_id
+        yield from self._pending
+
+    def close(self) -> None:
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "Keyring":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _new_table(slots: int) -> npt.NDArray[np.uint64]:
+    return np.zeros((slots, 3), dtype=np.uint64)
+
+
+def _rehash(table: npt.NDArray[np.uint64], slots: int) -> npt.NDArray[np.uint64]:
+    """Copia las ranuras ocupadas de `table` en una tabla de `slots`."""
+    new = _new_table(slots)
+    mask = slots - 1
+    for slot_hash, offset, length in table[table[:, 1] != 0].tolist():
+        i = slot_hash & mask
+        while new[i, 1]:
+            i = (i + 1) & mask
+        new[i] = (slot_hash, offset, length)
+    return new
+
+
+def _probe(
+        slot: Callable[[int], tuple[int, int, int]],
+        slots: int,
+        key_id: str,
+        read_id: Callable[[int], str],
+    ) -> tuple[int, int, int]:
+    """
+    Ranura de `key_id` en una tabla de `slots` ranuras que se leen con
+    `slot`, o la primera vacía: devuelve la ranura y la posición y
+    longitud del registro (posición 0 si no está).
+    """
+    h = _hash(key_id)
+    mask = slots - 1
+    i = h & mask
+    while True:
+        slot_hash, offset, length = slot(i)
+        if offset == 0 or (slot_hash == h and read_id(offset) == key_id):
+            return i, offset, length
+        i = (i + 1) & mask
+
+
+def _merge(
+        f: BinaryIO,
+        index: int,
+        slots: int,
+        count: int,
+        pending: dict[str, tuple[int, int]],
+        read_id: Callable[[int], str],
+    ) -> npt.NDArray[np.uint64]:
+    """Índice con las llaves de `index` y las pendientes."""
+    f.seek(index)
+    table = np.frombuffer(f.read(slots * _SLOT.size), dtype=_SLOT_TYPE)
+    table = table.astype(np.uint64).reshape(slots, 3)
+
+    new_slots = max(MIN_SLOTS, slots)
+    while count > new_slots * MAX_LOAD:
+        new_slots *= 2
+    if new_slots != slots:
+        table = _rehash(table, new_slots)
+
+    def _slot(i: int) -> tuple[int, int, int]:
+        slot_hash, offset, length = table[i].tolist()
+        return slot_hash, offset, length
+
+    for key_id, (offset, length) in pending.items():
+        i, _, _ = _probe(_slot, len(table), key_id, read_id)
+        table[i] = (_hash(key_id), offset, length)
+    return table
+
+
+def add_keys(entries: Iterable[KeyEntry], path: str | Path = KEYRING_FILE) -> int:
+    """
+    Agrega llaves al llavero (lo crea si no existe). Una llave con un id
+    que ya está reemplaza a la anterior. Las llaves quedan pendientes al
+    final del archivo y el índice se reescribe solo cuando hay más de
+    `MAX_PENDING`, así que agregarlas de una en una no cuesta una tabla
+    completa por llamada.
+
+    :param entries: Llaves a agregar.
+    :type entries: Iterable[KeyEntry]
+    :param path: Archivo del llavero.
+    :type path: str | Path
+    :return: Número de llaves agregadas.
+    :rtype: int
+    """
+    full_path = BASE_DIR / path
+
+    with _locked(full_path):
+        with open(full_path, "r+b" if full_path.exists() else "w+b") as f:
+            header = f.read(_HEADER.size)
+            if not header:
+                # Un llavero vacío válido, por si la escritura se interrumpe
+                header = _HEADER.pack(_MAGIC, _VERSION, 0, 0, 0, _HEADER.size, 0, _HEADER.size)
+                f.write(header)
+
+            try:
+                magic, version, _, count, slots, index, free, end = _HEADER.unpack(header)
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError
+                pending_start = index + slots * _SLOT.size
+                if not _HEADER.size <= pending_start <= end:
+                    raise ValueError
+                f.seek(pending_start)
+                data = f.read(end - pending_start)
+                if len(data) != end - pending_start:
+                    raise ValueError
+                pending = _scan_pending(data, pending_start)
+            except (ValueError, struct.error):
+                raise ValueError(f"{full_path.name} no es un llavero válido") from None
+
+            def _read_id(offset: int) -> str:
+                f.seek(offset)
+                _, id_length, _ = _RECORD.unpack(f.read(_RECORD.size))
+                return f.read(id_length).decode("utf-8")
+
+            def _slot(i: int) -> tuple[int, int, int]:
+                f.seek(index + i * _SLOT.size)
+                return _SLOT.unpack(f.read(_SLOT.size))
+
+            added = 0
+            for entry in entries:
+                if entry.kind not in KINDS:
+                    raise ValueError(f"Tipo de llave desconocido: {entry.kind}")
+
+                key_id = entry.key_id.encode("utf-8")
+                record = _RECORD.pack(KINDS[entry.kind], len(key_id), len(entry.data)) + key_id + bytes(entry.data)
+
+                # La llave anterior con el mismo id queda como bytes sin usar
+                previous = pending.get(entry.key_id)
+                if previous is None and slots:
+                    _, offset, length = _probe(_slot, slots, entry.key_id, _read_id)
+                    previous = (offset, length) if offset else None
+                if previous is not None:
+                    free += previous[1]
+                    count -= 1
+
+                f.seek(end)
+                f.write(record)
+                pending[entry.key_id] = (end, len(record))
+                end += len(record)
+                count += 1
+                added += 1
+
+            if len(pending) > MAX_PENDING:
+                table = _merge(f, index, slots, count, pending, _read_id)
+                free += slots * _SLOT.size
+                index, slots = end, len(table)
+                f.seek(end)
+                f.write(table.astype(_SLOT_TYPE).tobytes())
+                end += slots * _SLOT.size
+
+            f.flush()
+            os.fsync(f.fileno())
+
+            # La cabecera se escribe al final: hasta aquí el llavero
+            # anterior sigue completo
+            f.seek(0)
+            f.write(_HEADER.pack(_MAGIC, _VERSION, 0, count, slots, index, free, end))
+            f.flush()
+            os.fsync(f.fileno())
+            live = end - _HEADER.size - free
+
+        # Con un llavero grande el índice ocupa tanto como las llaves, así
+        # que con un umbral más bajo casi cada llamada lo reescribiría todo
+        if free > 2 * live:
+            _compact(full_path)
+
+    return added
+
+
+def add_key(key_id: str, kind: str, data: bytes, path: str | Path = KEYRING_FILE) -> None:
+    """
+    Agrega una llave al llavero.
+
+    :param key_id: Id de la llave.
+    :type key_id: str
+    :param kind: `aes`, `des` o `rsa`.
+    :type kind: str
+    :param data: Llave (para RSA, el resultado de `pack_rsa`).
+    :type data: bytes
+    :param path: Archivo del llavero.
+    :type path: str | Path
+    """
+    add_keys([KeyEntry(key_id, kind, bytes(data))], path)
+
+
+def store_key(key_id: str, kind: str, data: bytes) -> bool:
+    """
+    Agrega una llave recién generada al llavero por defecto. Si no se
+    puede, imprime el error y devuelve `False`; la llave sigue siendo
+    válida, así que quien la generó no falla por eso.
+
+    :param key_id: Id de la llave.
+    :type key_id: str
+    :param kind: `aes`, `des` o `rsa`.
+    :type kind: str
+    :param data: Llave.
+    :type data: bytes
+    :return: `True` si se guardó.
+    :rtype: bool
+    """
+    try:
+        add_key(key_id, kind, data)
+    except (OSError, ValueError) as e:
+        print(f"\n{yellow('>>')} {error('ERROR')}: No se pudo guardar la llave en el llavero: {e}")
+        return False
+    return True
+
+
+def fingerprint(kind: str, data: bytes) -> str:
+    """Id para llaves sin nombre: el tipo y el inicio de su SHA-256."""
+    return f"{kind}_{hashlib.sha256(data).hexdigest()[:12]}"
+
+
+def is_reference(value: str) -> bool:
+    """Indica si `value` es una referencia `ring:<id>` al llavero."""
+    return value.startswith(RING_PREFIX)
+
+
+def load_key(reference: str, kind: str, path: str | Path = KEYRING_FILE) -> bytes:
+    """
+    Llave del llavero a partir de su id o de una referencia
+    `ring:<id>`. Lanza `ValueError` si no está o si es de otro tipo.
+
+    :param reference: Id de la llave, con o sin el prefijo `ring:`.
+    :type reference: str
+    :param kind: Tipo esperado (`aes`, `des` o `rsa`).
+    :type kind: str
+    :param path: Archivo del llavero.
+    :type path: str | Path
+    :return: Llave (para RSA, el resultado de `pack_rsa`).
+    :rtype: bytes
+    """
+    key_id = reference.removeprefix(RING_PREFIX)
+    try:
+        with Keyring(path) as keyring:
+            entry = keyring.get(key_id)
+    except FileNotFoundError:
+        entry = None
+
+    if entry is None:
+        raise ValueError(f"La llave {key_id} no está en el llavero")
+    if entry.kind != kind:
+        raise ValueError(f"La llave {key_id} es de {entry.kind}, no de {kind}")
+    return bytes(entry.data)
+
+
+def _compact(full_path: Path) -> None:
+    """Reescribe solo las llaves vigentes en un archivo nuevo."""
+    tmp_path = full_path.with_name(f".{full_path.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    with Keyring(full_path) as keyring:
+        entries = [keyring[key_id] for key_id in keyring]
+
+    # Escribe directamente: el bloqueo de escritura ya está tomado
+    with open(tmp_path, "w+b") as f:
+        table = _new_table(MIN_SLOTS)
+        while len(entries) > len(table) * MAX_LOAD:
+            table = _new_table(len(table) * 2)
+
+        mask = len(table) - 1
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, 0, 0, _HEADER.size, 0, _HEADER.size))
+        end = _HEADER.size
+        for entry in entries:
+            key_id = entry.key_id.encode("utf-8")
+            record = _RECORD.pack(KINDS[entry.kind], len(key_id), len(entry.data)) + key_id + entry.data
+            h = _hash(entry.key_id)
+            i = h & mask
+            while table[i, 1]:
+                i = (i + 1) & mask
+            f.write(record)
+            table[i] = (h, end, len(record))
+            end += len(record)
+
+        f.write(table.astype(_SLOT_TYPE).tobytes())
+        f.seek(0)
+        f.write(_HEADER.pack(
+            _MAGIC, _VERSION, 0, len(entries), len(table), end, 0,
+            end + len(table) * _SLOT.size,
+        ))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, full_path)
+
+
+def compact(path: str | Path = KEYRING_FILE) -> None:
+    """
+    Quita del llavero los índices viejos y las llaves reemplazadas.
+    `add_keys` lo hace solo cuando el espacio sin usar pasa del doble
+    del usado.
+
+    :param path: Archivo del llavero.
+    :type path: str | Path
+    """
+    full_path = BASE_DIR / path
+    with _locked(full_path):
+        _compact(full_path)
+
+
+def _show_key(entry: KeyEntry) -> None:
+    """Imprime una llave en el formato en que la piden los menús."""
+    print(f"\n{yellow('>>')} {entry.key_id} ({entry.kind})")
+    if entry.kind == "rsa":
+        e, d, n = unpack_rsa(entry.data)
+        print(f"e = {e}")
+        print(f"d = {d}")
+        print(f"n = {n}")
+    else:
+        print(f"Llave (base 64): {base64.b64encode(entry.data).decode()}")
+        print(f"Referencia: {RING_PREFIX}{entry.key_id}")
+
+
+def key_ring_menu() -> None:
+    while True:
+        clean_console()
+        print(f"""
+/*--------.
+| LLAVERO |
+`--------*/
+
+{yellow('>>')} Elija una de las opciones
+
+1.- Listar las llaves
+2.- Buscar una llave
+3.- Compactar el llavero
+4.- Salir
+""")
+        option = input("Opción: ")
+        match option:
+            case "1":
+                try:
+                    with Keyring() as keyring:
+                        entries = sorted(
+                            (keyring[key_id] for key_id in keyring),
+                            key=lambda entry: (entry.kind, entry.key_id),
+                        )
+                except (OSError, ValueError) as e:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+                    wait_key()
+                    continue
+
+                print(f"\n{yellow('>>')} {len(entries)} llaves en el llavero\n")
+                for entry in entries:
+                    print(f"{entry.kind:>4}  {entry.key_id}")
+                wait_key()
+            case "2":
+                key_id = input("\nEscribe el id de la llave: ").strip().removeprefix(RING_PREFIX)
+                try:
+                    with Keyring() as keyring:
+                        entry = keyring.get(key_id)
+                except (OSError, ValueError) as e:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+                    wait_key()
+                    continue
+
+                if entry is None:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: La llave {key_id} no está en el llavero")
+                else:
+                    _show_key(entry)
+                wait_key()
+            case "3":
+                try:
+                    compact()
+                except (OSError, ValueError) as e:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+                else:
+                    print(f"\n{yellow('>>')} {success('Llavero compactado')}")
+                wait_key()
+            case "4":
+                break
+            case _:
+                print(f"\n{yellow('>>')} {error('ERROR')}: Opción no válida")
+                wait_key()
@@ -1,11 +1,12 @@
-from permutation_cipher import permutation_cipher_menu
-from block_cipher import block_cipher_menu, file_generator_DES
-from affin_cipher import affin_cipher_menu
-from hill_cipher import hill_cipher_menu
-from shift_cipher import shift_cipher_menu
-from aes_cipher import aes_cipher_menu
-from aes_cipher_2 import aes_cipher_2_menu
-from rsa_cipher import rsa_cipher_menu, get_primes
+"""
+Menú principal.
+
+Cada cifrado se importa solo cuando se elige su opción, así que numpy,
+pycryptodome y tqdm no se cargan antes de mostrar el menú.
+"""
+
+from importlib import import_module
+
 from utils import (
     clean_console,
     wait_key,
@@ -13,6 +14,19 @@ from utils import (
     yellow,
 )
 
+def _run(module_name: str, function_name: str) -> None:
+    """
+    Importa `module_name` (si no se había importado) y llama a su
+    función `function_name`.
+
+    :param module_name: Paquete del cifrado.
+    :type module_name: str
+    :param function_name: Función a ejecutar.
+    :type function_name: str
+    """
+    getattr(import_module(module_name), function_name)()
+
+
 def main() -> None:
     while True:
         clean_console()
@@ -33,33 +47,45 @@ def main() -> None:
 8.- Cifrar usando 'AES-V2'
 9.- Generar números primos aleatorios
 10.- Cifrar usando 'RSA'
-11.- Salir
+11.- Intercambio de llaves 'Diffie–Hellman'
+12.- Cifrar usando 'Tiny Block Cipher' (modo CTR)
+13.- Analizar S-Boxes
+14.- Consultar el llavero
+15.- Salir
 """)
         option = input("Opción: ")
         match option:
             case "1":
-                shift_cipher_menu()
+                _run("shift_cipher", "shift_cipher_menu")
             case "2":
-                affin_cipher_menu()
+                _run("affin_cipher", "affin_cipher_menu")
             case "3":
-                hill_cipher_menu()
+                _run("hill_cipher", "hill_cipher_menu")
             case "4":
-                permutation_cipher_menu()
+                _run("permutation_cipher", "permutation_cipher_menu")
             case "5":
-                file_generator_DES()
+                _run("block_cipher", "file_generator_DES")
                 wait_key()
             case "6":
-                block_cipher_menu()
+                _run("block_cipher", "block_cipher_menu")
             case "7":
-                aes_cipher_menu()
+                _run("aes_cipher", "aes_cipher_menu")
             case "8":
-                aes_cipher_2_menu()
+                _run("aes_cipher_2", "aes_cipher_2_menu")
             case "9":
-                get_primes()
+                _run("rsa_cipher", "get_primes")
                 wait_key()
             case "10":
-                rsa_cipher_menu()
+                _run("rsa_cipher", "rsa_cipher_menu")
             case "11":
+                _run("diffie_hellman", "diffie_hellman_menu")
+            case "12":
+                _run("tiny_block_cipher", "tiny_block_cipher_menu")
+            case "13":
+                _run("sbox_analysis", "sbox_analysis_menu")
+            case "14":
+                _run("key_ring", "key_ring_menu")
+            case "15":
                 print(f"\n{yellow('>>')} Gracias por probar el programa")
                 break
             case _:
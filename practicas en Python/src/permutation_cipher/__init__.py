@@ -1,3 +1,11 @@
-from .permutation_cipher import permutation_cipher_menu
+from .permutation_cipher import (
+    permutation_cipher_menu,
+    PermutationCipher,
+    BitPermutationCipher,
+)
 
-__all__ = ["permutation_cipher_menu"]
+__all__ = [
+    "permutation_cipher_menu",
+    "PermutationCipher",
+    "BitPermutationCipher",
+]
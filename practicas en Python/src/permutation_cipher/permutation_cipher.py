@@ -2,10 +2,21 @@
 
 import numpy as np
 import numpy.typing as npt
+from pathlib import Path
 from typing import TypeAlias
 
+from bit_permutation import BitPermutation
+from ciphers import (
+    BufferedStream,
+    BufferedTextStream,
+    Cipher,
+    CipherStream,
+)
 from config import BASE_DIR
-from decorators import validate_files
+from decorators import (
+    ValidationContext,
+    validate_files,
+)
 from utils import (
     clean_console,
     wait_key,
@@ -14,7 +25,11 @@ from utils import (
     yellow,
 )
 
-__all__ = ["permutation_cipher_menu"]
+__all__ = [
+    "permutation_cipher_menu",
+    "PermutationCipher",
+    "BitPermutationCipher",
+]
 
 Permutation: TypeAlias = npt.NDArray[np.int_]
 
@@ -130,8 +145,130 @@ def _permutation_random_generator(
     return permutation, inverse_permutation
 
 
+def _apply_permutation(text: str, permutation: Permutation) -> str:
+    """
+    Divide `text` en bloques de `len(permutation)` caracteres y
+    reordena cada bloque según la permutación.
+
+    :param text: Texto de longitud múltiplo del tamaño de bloque.
+    :type text: str
+    :param permutation: Permutación como array (base 1).
+    :type permutation: Permutation
+    :return: Texto permutado.
+    :rtype: str
+    """
+    block_size = len(permutation)
+    if len(text) % block_size != 0:
+        raise ValueError(
+            f"La longitud del texto ({len(text)}) no es múltiplo de {block_size}"
+        )
+
+    # Dividir en bloques de 'block_size'
+    blocks: list[str] = []
+    i = 0
+    while i < len(text):
+        blocks.append(text[i:i+block_size])
+        i += block_size
+
+    # Permutar bloque por bloque
+    aux_blocks: list[str] = []
+    aux_block = ""
+    for block in blocks:
+        for c in range(block_size):
+            index = permutation[c]
+            aux_block += block[index - 1]
+
+        aux_blocks.append(aux_block)
+        aux_block = ""
+
+    return "".join(aux_blocks)
+
+
+def _permutation_encrypt_text(plaintext: str, permutation: Permutation) -> str:
+    """Rellena `plaintext` con X hasta completar bloques y lo permuta."""
+    # Padding con X, para asegurar la dividión en bloques de 'block_size'
+    while len(plaintext) % len(permutation) != 0:
+        plaintext += "X"
+
+    return _apply_permutation(plaintext, permutation)
+
+
+class PermutationCipher(Cipher):
+    """
+    Permutation Cipher sobre texto UTF-8, sin archivos ni impresiones.
+
+    El texto cifrado no guarda la longitud original (en los archivos va
+    en el nombre), así que se indica con `length` para quitar el
+    relleno al descifrar; sin ella el resultado conserva las X del
+    relleno. Los objetos incrementales acumulan la entrada hasta
+    `finalize`.
+    """
+
+    name = "permutation"
+
+    def __init__(self, key: Permutation | str, length: int | None = None) -> None:
+        if isinstance(key, str):
+            key = _convert_permutation_to_array(key)
+        permutation = np.asarray(key, dtype=np.int_)
+
+        if sorted(permutation.tolist()) != list(range(1, len(permutation) + 1)):
+            raise ValueError("La llave no es una permutación de 1..n")
+
+        self.permutation = permutation
+        self.inverse_permutation = _inverse_permutation_generator(permutation)
+        self.length = length
+
+    def _decrypt_text(self, ciphertext: str) -> str:
+        plaintext = _apply_permutation(ciphertext, self.inverse_permutation)
+        return plaintext if self.length is None else plaintext[:self.length]
+
+    def encryptor(self) -> CipherStream:
+        return BufferedTextStream(
+            lambda text: _permutation_encrypt_text(text, self.permutation)
+        )
+
+    def decryptor(self) -> CipherStream:
+        return BufferedTextStream(self._decrypt_text)
+
+
+class BitPermutationCipher(Cipher):
+    """
+    Permutation Cipher a nivel de bits sobre bytes: la llave es una
+    permutación de `8·k` posiciones y cada bloque de `k` bytes se
+    permuta bit a bit con `BitPermutation`.
+
+    Igual que `PermutationCipher`, el relleno (bytes 0x00) no se guarda
+    en el texto cifrado; `length` indica la longitud original para
+    quitarlo al descifrar.
+    """
+
+    name = "permutation-bits"
+
+    def __init__(self, key: Permutation | str, length: int | None = None) -> None:
+        if isinstance(key, str):
+            key = _convert_permutation_to_array(key)
+
+        self.permutation = BitPermutation(key)
+        self.inverse_permutation = self.permutation.inverse()
+        self.length = length
+
+    def _encrypt_bytes(self, plaintext: bytes) -> bytes:
+        padding = -len(plaintext) % self.permutation.block_size
+        return self.permutation.permute_bytes(plaintext + b"\x00" * padding)
+
+    def _decrypt_bytes(self, ciphertext: bytes) -> bytes:
+        plaintext = self.inverse_permutation.permute_bytes(ciphertext)
+        return plaintext if self.length is None else plaintext[:self.length]
+
+    def encryptor(self) -> CipherStream:
+        return BufferedStream(self._encrypt_bytes)
+
+    def decryptor(self) -> CipherStream:
+        return BufferedStream(self._decrypt_bytes)
+
+
 @validate_files
-def _encrypt_permutation(plaintext_file: str, permutation_file: str) -> None:
+def _encrypt_permutation(plaintext_file: str, permutation_file: str) -> str:
     """
     Cifra un texto usando Permutation Cipher y lo guarda en el archivo
     de texto. El texto a cifrar y la permutación a usar se toman de un
@@ -141,39 +278,15 @@ def _encrypt_permutation(plaintext_file: str, permutation_file: str) -> None:
     :type file_plaintext: str
     :param permutation_file: Archivo con la permutación.
     :type permutation_file: str 
+    :return: Nombre del archivo cifrado.
+    :rtype: str
     """
     with open(BASE_DIR / plaintext_file, "r", encoding="utf-8") as f:
         plaintext = f.read()
 
     permutation = _recover_permutation_from_file(permutation_file)
-    block_size = len(permutation)
-    
     size_plaintext = len(plaintext)  # Tamaño original del plaintext
-    
-    # Padding con X, para asegurar la dividión en bloques de 'block_size'
-    while len(plaintext) % len(permutation) != 0:
-        plaintext += "X"
-        
-    # Dividir en bloques de 'block_size'
-    plaintext_blocks: list[str] = []
-    i = 0
-    while i < len(plaintext):
-        block = plaintext[i:i+block_size]
-        plaintext_blocks.append(block)
-        i += block_size
-   
-    # Cifrar bloque por bloque
-    aux_plaintext_blocks: list[str] = []
-    aux_block = ""
-    for block in plaintext_blocks:
-        for c in range(block_size):
-            index = permutation[c]
-            aux_block += block[index - 1]
-        
-        aux_plaintext_blocks.append(aux_block)
-        aux_block = ""
-
-    ciphertext = "".join(aux_plaintext_blocks)
+    ciphertext = _permutation_encrypt_text(plaintext, permutation)
     ciphertext_file = f"{size_plaintext}_ciphertext.txt"
 
     with open(BASE_DIR / ciphertext_file, "w", encoding="utf-8") as f:
@@ -183,10 +296,11 @@ def _encrypt_permutation(plaintext_file: str, permutation_file: str) -> None:
         f"\n{yellow('>>')} "
         f"{success(f'Texto cifrado correctamente y guardado en {ciphertext_file}')}"
     )
+    return ciphertext_file
 
 
 @validate_files
-def _decrypt_permutation(ciphertext_file: str, permutation_file: str) -> None:
+def _decrypt_permutation(ciphertext_file: str, permutation_file: str) -> str:
     """
     Descifra un texto usando Permutation Cipher e imprime el resultado.
     Toma el texto de un archivo de texto al igual que la permutación
@@ -196,41 +310,123 @@ def _decrypt_permutation(ciphertext_file: str, permutation_file: str) -> None:
     :type file_ciphertext: str
     :param permutation_file: Archivo con la permutación.
     :type permutation_file: str 
+    :return: Texto original recuperado.
+    :rtype: str
     """
-    original_size = int(ciphertext_file.split("_")[0])
+    original_size = int(Path(ciphertext_file).name.split("_")[0])
 
     with open(BASE_DIR / ciphertext_file, "r", encoding="utf-8") as f:
         ciphertext = f.read()
 
     permutation = _recover_permutation_from_file(permutation_file)
-    inverse_permutation = _inverse_permutation_generator(permutation)
-    block_size = len(permutation)
+    plaintext = _apply_permutation(
+        ciphertext,
+        _inverse_permutation_generator(permutation),
+    )
 
-    # Dividir en bloques de 'block_size'
-    ciphertext_blocks: list[str] = []
-    i = 0
-    while i < len(ciphertext):
-        block = ciphertext[i:i+block_size]
-        ciphertext_blocks.append(block)
-        i += block_size
+    print(
+        f"\n{yellow('>>')} El texto original recuperado es el siguiente:"
+        f"\n\n{plaintext[:original_size]}"
+    )
+    return plaintext[:original_size]
 
-    # Descifrar bloque por bloque
-    aux_ciphertex_blocks: list[str] = []
-    aux_block = ""
-    for block in ciphertext_blocks:
-        for c in range(block_size):
-            index = inverse_permutation[c]
-            aux_block += block[index - 1]
 
-        aux_ciphertex_blocks.append(aux_block)
-        aux_block = ""
+def _load_bit_permutation(permutation_file: str) -> BitPermutationCipher | None:
+    """Carga la permutación de bits e imprime el error si no es válida."""
+    try:
+        return BitPermutationCipher(_recover_permutation_from_file(permutation_file))
+    except ValueError as e:
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
 
-    plaintext = "".join(aux_ciphertex_blocks)
+
+@validate_files
+def _encrypt_bits(
+        plaintext_file: str,
+        permutation_file: str,
+        ctx: ValidationContext | None = None,
+    ) -> str | None:
+    """
+    Cifra un archivo cualquiera permutando los bits de cada bloque. El
+    tamaño de la permutación debe ser múltiplo de 8 y, como en el modo
+    de texto, la longitud original va en el nombre del archivo.
+
+    :param plaintext_file: Archivo a cifrar.
+    :type plaintext_file: str
+    :param permutation_file: Archivo con la permutación.
+    :type permutation_file: str
+    :param ctx: Contexto de validación con los archivos ya abiertos.
+    :type ctx: ValidationContext | None
+    :return: Nombre del archivo cifrado o `None` si hubo un error.
+    :rtype: str | None
+    """
+    cipher = _load_bit_permutation(permutation_file)
+    if cipher is None:
+        return None
+
+    plaintext = ctx.read(plaintext_file)
+
+    ciphertext_file = f"{len(plaintext)}_ciphertext.bin"
+    with open(BASE_DIR / ciphertext_file, "wb") as f:
+        f.write(cipher.encrypt(plaintext))
 
     print(
-        f"\n{yellow('>>')} El texto original recuperado es el siguiente:"
-        f"\n\n{plaintext[:original_size]}"
+        f"\n{yellow('>>')} "
+        f"{success(f'Archivo cifrado correctamente y guardado en {ciphertext_file}')}"
+    )
+    return ciphertext_file
+
+
+@validate_files
+def _decrypt_bits(
+        ciphertext_file: str,
+        permutation_file: str,
+        ctx: ValidationContext | None = None,
+    ) -> str | None:
+    """
+    Descifra un archivo de `_encrypt_bits` y lo guarda como
+    `recovered_<nombre>`.
+
+    :param ciphertext_file: Archivo cifrado.
+    :type ciphertext_file: str
+    :param permutation_file: Archivo con la permutación.
+    :type permutation_file: str
+    :param ctx: Contexto de validación con los archivos ya abiertos.
+    :type ctx: ValidationContext | None
+    :return: Nombre del archivo recuperado o `None` si hubo un error.
+    :rtype: str | None
+    """
+    path = Path(ciphertext_file)
+    try:
+        length = int(path.name.split("_")[0])
+    except ValueError:
+        print(
+            f"\n{yellow('>>')} {error('ERROR')}: "
+            f"El nombre de {path.name} no empieza con la longitud original"
+        )
+        return None
+
+    cipher = _load_bit_permutation(permutation_file)
+    if cipher is None:
+        return None
+
+    cipher.length = length
+    try:
+        plaintext = cipher.decrypt(ctx.read(ciphertext_file))
+    except ValueError as e:
+        # Se descifra antes de abrir la salida para no dejarla vacía
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
+
+    output_file = str(path.with_name(f"recovered_{path.name}"))
+    with open(BASE_DIR / output_file, "wb") as f:
+        f.write(plaintext)
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'Archivo descifrado correctamente y guardado en {output_file}')}"
     )
+    return output_file
 
 
 def permutation_cipher_menu() -> None:
@@ -246,7 +442,9 @@ def permutation_cipher_menu() -> None:
 1.- Crear una permutación π de tamaño n
 2.- Cifrar el texto plano
 3.- Descifrar el texto cifrado
-4.- Salir 
+4.- Cifrar un archivo permutando bits
+5.- Descifrar un archivo permutando bits
+6.- Salir 
 """)
         option = input("Opción: ")
         match option:
@@ -284,6 +482,20 @@ def permutation_cipher_menu() -> None:
                 _decrypt_permutation(file_ciphertext, file_permutation)
                 wait_key()
             case "4":
+                file_plaintext = input("\nIngresa el nombre del archivo a cifrar: ")
+                file_permutation = input(
+                    "Escribe el nombre del archivo con la permutación (múltiplo de 8): "
+                )
+                _encrypt_bits(file_plaintext, file_permutation)
+                wait_key()
+            case "5":
+                file_ciphertext = input("\nIngresa el nombre del archivo cifrado: ")
+                file_permutation = input(
+                    "Escribe el nombre del archivo con la permutación a usar: "
+                )
+                _decrypt_bits(file_ciphertext, file_permutation)
+                wait_key()
+            case "6":
                 break
             case _:
                 print(f"\n{yellow('>>')} {error('ERROR')}: Opción no válida")
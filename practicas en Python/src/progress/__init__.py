@@ -0,0 +1,17 @@
+from .progress import (
+    Progress,
+    NullProgress,
+    ThrottledProgress,
+    make_progress,
+    set_batch_mode,
+    adaptive_chunk_size,
+)
+
+__all__ = [
+    "Progress",
+    "NullProgress",
+    "ThrottledProgress",
+    "make_progress",
+    "set_batch_mode",
+    "adaptive_chunk_size",
+]
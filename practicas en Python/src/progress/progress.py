@@ -0,0 +1,201 @@
+"""Barras de progreso con actualización limitada y tamaño de bloque adaptativo."""
+
+import os
+import sys
+from abc import (
+    ABC,
+    abstractmethod,
+)
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+)
+
+__all__ = [
+    "Progress",
+    "NullProgress",
+    "ThrottledProgress",
+    "make_progress",
+    "set_batch_mode",
+    "adaptive_chunk_size",
+]
+
+MIN_INTERVAL = 0.1  # Segundos mínimos entre dos actualizaciones visibles
+
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNKS_PER_FILE = 16  # Bloques aproximados en que se lee un archivo grande
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+class Progress(ABC):
+    """
+    Interfaz de progreso: `update(n)` suma `n` unidades y `close()`
+    termina. Se puede usar con `with`.
+    """
+
+    @abstractmethod
+    def update(self, n: int) -> None:
+        """Suma `n` unidades al progreso."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Progress":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class NullProgress(Progress):
+    """Progreso que no hace nada, para el modo por lotes."""
+
+    def update(self, n: int) -> None:
+        pass
+
+
+class ThrottledProgress(Progress):
+    """
+    Acumula las unidades y llama a `callback(delta, done, total)` como
+    máximo una vez cada `min_interval` segundos, más una última vez al
+    cerrar. Se puede actualizar desde varios hilos.
+
+    :param total: Total de unidades esperadas.
+    :type total: int
+    :param callback: Función que recibe las unidades nuevas desde la
+                     última llamada, las acumuladas y el total.
+    :type callback: Callable[[int, int, int], None]
+    :param min_interval: Segundos mínimos entre llamadas.
+    :type min_interval: float
+    :param on_close: Función a llamar después de la última
+                     actualización.
+    :type on_close: Callable[[], None] | None
+    """
+
+    def __init__(
+            self,
+            total: int,
+            callback: Callable[[int, int, int], None],
+            min_interval: float = MIN_INTERVAL,
+            on_close: Callable[[], None] | None = None,
+        ) -> None:
+        self.total = total
+        self.done = 0
+        self._callback = callback
+        self._min_interval = min_interval
+        self._on_close = on_close
+        self._reported = 0
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, n: int) -> None:
+        with self._lock:
+            self.done += n
+            now = time.monotonic()
+            if now - self._last < self._min_interval:
+                return
+            self._last = now
+            self._flush()
+
+    def _flush(self) -> None:
+        delta = self.done - self._reported
+        if delta:
+            self._reported = self.done
+            self._callback(delta, self.done, self.total)
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+        if self._on_close is not None:
+            self._on_close()
+            self._on_close = None
+
+
+def _text_callback(desc: str) -> Callable[[int, int, int], None]:
+    """Progreso en una línea de texto, para cuando no está `tqdm`."""
+    def _callback(delta: int, done: int, total: int) -> None:
+        percent = done * 100 // total if total else 100
+        print(
+            f"\r{desc}: {percent:3d}% ({done / 1e6:.1f}/{total / 1e6:.1f} MB)",
+            end="",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    return _callback
+
+
+_BATCH_MODE = False
+
+
+def set_batch_mode(enabled: bool = True) -> None:
+    """
+    En modo por lotes `make_progress` devuelve siempre `NullProgress`,
+    así que no se importa `tqdm` ni se escribe en la terminal.
+    """
+    global _BATCH_MODE
+    _BATCH_MODE = enabled
+
+
+def make_progress(total: int, desc: str) -> Progress:
+    """
+    Crea el progreso para `total` bytes: una barra de `tqdm` si está
+    instalado, una línea de texto si no, o nada en modo por lotes. En
+    los dos primeros casos la barra se refresca como máximo cada
+    `MIN_INTERVAL` segundos.
+
+    :param total: Total de bytes.
+    :type total: int
+    :param desc: Descripción que acompaña a la barra.
+    :type desc: str
+    :return: Objeto de progreso.
+    :rtype: Progress
+    """
+    if _BATCH_MODE:
+        return NullProgress()
+
+    try:
+        from tqdm import tqdm
+    except ImportError:
+        return ThrottledProgress(
+            total,
+            _text_callback(desc),
+            on_close=lambda: print(file=sys.stderr),
+        )
+
+    pbar = tqdm(total=total, unit="B", unit_scale=True, desc=desc)
+    return ThrottledProgress(
+        total,
+        lambda delta, done, total: pbar.update(delta),
+        on_close=pbar.close,
+    )
+
+
+def adaptive_chunk_size(stat: os.stat_result | None) -> int:
+    """
+    Tamaño de bloque de lectura para un archivo. Los archivos chicos
+    se leen de una vez; los grandes en unos `CHUNKS_PER_FILE` bloques
+    entre `MIN_CHUNK_SIZE` y `MAX_CHUNK_SIZE`, redondeados a múltiplos
+    del tamaño de bloque preferido por el sistema de archivos
+    (`st_blksize`).
+
+    :param stat: Resultado de `stat` del archivo, o `None`.
+    :type stat: os.stat_result | None
+    :return: Tamaño de bloque en bytes.
+    :rtype: int
+    """
+    if stat is None:
+        return MAX_CHUNK_SIZE // 8
+
+    block = getattr(stat, "st_blksize", 0) or DEFAULT_BLOCK_SIZE
+    size = stat.st_size
+
+    # Un byte más para que la segunda lectura ya devuelva fin de archivo
+    if size < MAX_CHUNK_SIZE:
+        return max(size + 1, block)
+
+    chunk = min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, size // CHUNKS_PER_FILE))
+    return max(block, chunk - chunk % block)
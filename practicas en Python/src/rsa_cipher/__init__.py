@@ -2,8 +2,14 @@ from .rsa_cipher import (
     rsa_cipher_menu,
     get_primes,
 )
+from .prime_sieve import (
+    sieve_prime,
+    benchmark_primes,
+)
 
 __all__ = [
     "rsa_cipher_menu",
-    "get_primes"
+    "get_primes",
+    "sieve_prime",
+    "benchmark_primes",
 ]
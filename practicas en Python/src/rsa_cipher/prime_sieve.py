@@ -0,0 +1,326 @@
+"""Generación de primos con criba incremental y Miller–Rabin."""
+
+from functools import cache
+from math import log
+from secrets import (
+    randbelow,
+    randbits,
+)
+from time import perf_counter
+
+import Crypto.Util.number as crypto_number
+
+from utils import yellow
+
+__all__ = [
+    "sieve_prime",
+    "is_probable_prime",
+    "benchmark_primes",
+]
+
+SIEVE_LIMIT = 1 << 20  # Cota máxima de los primos pequeños usados en la criba
+
+# Cotas para las que un conjunto fijo de bases hace a Miller–Rabin
+# determinista: si n < cota, probar esas bases basta.
+_DETERMINISTIC_BASES = (
+    (2_047, (2,)),
+    (1_373_653, (2, 3)),
+    (25_326_001, (2, 3, 5)),
+    (3_215_031_751, (2, 3, 5, 7)),
+    (2_152_302_898_747, (2, 3, 5, 7, 11)),
+    (3_474_749_660_383, (2, 3, 5, 7, 11, 13)),
+    (341_550_071_728_321, (2, 3, 5, 7, 11, 13, 17)),
+    (3_825_123_056_546_413_051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318_665_857_834_031_151_167_461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3_317_044_064_679_887_385_961_981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+)
+
+
+@cache
+def _small_primes(limit: int = SIEVE_LIMIT) -> list[int]:
+    """
+    Devuelve los primos impares menores que `limit` usando la criba de
+    Eratóstenes sobre un `bytearray`.
+
+    Se calcula la primera vez que se necesita, no al importar.
+
+    :param limit: Cota superior (exclusiva).
+    :type limit: int
+    :return: Lista de primos impares.
+    :rtype: list[int]
+    """
+    sieve = bytearray([1]) * limit
+    sieve[0:2] = b"\x00\x00"
+
+    for p in range(2, int(limit ** 0.5) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, limit, p)))
+
+    return [p for p in range(3, limit) if sieve[p]]
+
+
+def _miller_rabin_rounds(bits: int) -> int:
+    """
+    Número de rondas con bases aleatorias para un candidato de `bits`
+    bits (tabla 4.4 del Handbook of Applied Cryptography, error menor
+    a 2^-80 para candidatos aleatorios).
+    """
+    if bits >= 1300:
+        return 2
+    if bits >= 850:
+        return 3
+    if bits >= 650:
+        return 4
+    if bits >= 550:
+        return 5
+    if bits >= 450:
+        return 6
+    if bits >= 400:
+        return 7
+    if bits >= 350:
+        return 8
+    if bits >= 300:
+        return 9
+    if bits >= 250:
+        return 12
+    if bits >= 200:
+        return 15
+    if bits >= 150:
+        return 18
+    return 27
+
+
+def _miller_rabin_witness(n: int, a: int, d: int, s: int) -> bool:
+    """Devuelve True si `a` demuestra que `n` es compuesto."""
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return False
+
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return False
+
+    return True
+
+
+def is_probable_prime(n: int, stats: dict[str, int] | None = None) -> bool:
+    """
+    Prueba de Miller–Rabin. Para `n` menor a ~2^81 usa bases fijas y
+    el resultado es determinista; para valores mayores usa bases
+    aleatorias con el número de rondas según el tamaño de `n`.
+
+    :param n: Número a probar.
+    :type n: int
+    :param stats: Diccionario opcional donde se acumulan las llamadas
+                  (`mr_calls`) y las rondas (`mr_rounds`) realizadas.
+    :type stats: dict[str, int] | None
+    :return: True si `n` es (probablemente) primo.
+    :rtype: bool
+    """
+    if n < 3 or n % 2 == 0:
+        return n == 2
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for bound, bases in _DETERMINISTIC_BASES:
+        if n < bound:
+            break
+    else:
+        rounds = _miller_rabin_rounds(n.bit_length())
+        bases = tuple(randbelow(n - 3) + 2 for _ in range(rounds))
+
+    if stats is not None:
+        stats["mr_calls"] = stats.get("mr_calls", 0) + 1
+
+    for a in bases:
+        if a % n == 0:
+            continue
+
+        if stats is not None:
+            stats["mr_rounds"] = stats.get("mr_rounds", 0) + 1
+
+        if _miller_rabin_witness(n, a, d, s):
+            return False
+
+    return True
+
+
+def _sieve_bound(bits: int) -> int:
+    """
+    Cota de los primos pequeños para candidatos de `bits` bits. Cada
+    ronda de Miller–Rabin cuesta más conforme crecen los candidatos,
+    así que vale la pena cribar con más primos.
+    """
+    return min(SIEVE_LIMIT, bits << 8)
+
+
+def _sieve_window(start: int, size: int, bound: int) -> bytearray:
+    """
+    Criba los `size` impares `start, start + 2, ...` contra los primos
+    pequeños menores que `bound`. Una posición en 1 indica que el
+    candidato sobrevivió.
+
+    :param start: Primer candidato (impar).
+    :type start: int
+    :param size: Número de candidatos en la ventana.
+    :type size: int
+    :param bound: Cota de los primos pequeños.
+    :type bound: int
+    :return: Máscara de sobrevivientes.
+    :rtype: bytearray
+    """
+    window = bytearray([1]) * size
+    end = start + 2 * size
+
+    for p in _small_primes():
+        if p >= bound or p * p >= end:
+            break
+
+        # Índice i del primer múltiplo de p en la ventana: start + 2i ≡ 0 (mod p)
+        i = (-start * ((p + 1) // 2)) % p
+
+        # No tachar al propio primo p si cae dentro de la ventana
+        if start + 2 * i == p:
+            i += p
+
+        if i < size:
+            window[i::p] = bytes(len(range(i, size, p)))
+
+    return window
+
+
+def sieve_prime(bits: int, stats: dict[str, int] | None = None) -> int:
+    """
+    Genera un primo aleatorio de `bits` bits.
+
+    Elige un impar aleatorio de `bits` bits como inicio, criba una
+    ventana de impares consecutivos contra los primos pequeños (hasta
+    una cota que crece con `bits`) y solo aplica Miller–Rabin a los sobrevivientes. Si
+    la ventana se agota se continúa con la siguiente.
+
+    Como se toma el primer primo después de un punto aleatorio, los
+    primos precedidos por huecos grandes son algo más probables; es el
+    mismo compromiso que hacen las bibliotecas que buscan de forma
+    incremental.
+
+    :param bits: Tamaño del primo en bits.
+    :type bits: int
+    :param stats: Diccionario opcional con contadores de Miller–Rabin.
+    :type stats: dict[str, int] | None
+    :return: Número primo de exactamente `bits` bits.
+    :rtype: int
+    """
+    if bits < 2:
+        raise ValueError("bits debe ser mayor que 1")
+
+    upper = 1 << bits
+    bound = _sieve_bound(bits)
+    # Unas cuantas veces la distancia media entre primos (~bits * ln 2)
+    window_size = max(64, int(bits * log(2)) * 4)
+
+    start = (randbits(bits - 1) | (1 << (bits - 1))) | 1
+
+    while True:
+        if start >= upper:
+            start = (randbits(bits - 1) | (1 << (bits - 1))) | 1
+
+        size = min(window_size, (upper - start + 1) // 2)
+        window = _sieve_window(start, size, bound)
+
+        i = window.find(1)
+        while i != -1:
+            candidate = start + 2 * i
+            if is_probable_prime(candidate, stats):
+                return candidate
+            i = window.find(1, i + 1)
+
+        start += 2 * size
+
+
+def benchmark_primes(
+        bit_sizes: tuple[int, ...] = (512, 1024, 2048),
+        samples: int = 10,
+    ) -> dict[int, dict[str, dict[str, float]]]:
+    """
+    Compara `sieve_prime` con `Crypto.Util.number.getPrime` midiendo
+    el tiempo, las llamadas a Miller–Rabin y las rondas (exponenciaciones
+    modulares) por primo generado.
+
+    En pycryptodome las llamadas se cuentan envolviendo temporalmente
+    `_rabinMillerTest` y las rondas envolviendo `getRandomRange`, que
+    se invoca una vez por base.
+
+    :param bit_sizes: Tamaños de primo a medir.
+    :type bit_sizes: tuple[int, ...]
+    :param samples: Primos generados por tamaño y motor.
+    :type samples: int
+    :return: Resultados promedio por tamaño y motor (`seconds`,
+             `mr_calls`, `mr_rounds`).
+    :rtype: dict[int, dict[str, dict[str, float]]]
+    """
+    original_test = crypto_number._rabinMillerTest
+    original_range = crypto_number.getRandomRange
+    pycryptodome_stats = {"mr_calls": 0, "mr_rounds": 0}
+
+    def _counting_test(*args, **kwargs):
+        pycryptodome_stats["mr_calls"] += 1
+        return original_test(*args, **kwargs)
+
+    def _counting_range(*args, **kwargs):
+        pycryptodome_stats["mr_rounds"] += 1
+        return original_range(*args, **kwargs)
+
+    results: dict[int, dict[str, dict[str, float]]] = {}
+
+    for bits in bit_sizes:
+        pycryptodome_stats.update(mr_calls=0, mr_rounds=0)
+        crypto_number._rabinMillerTest = _counting_test
+        crypto_number.getRandomRange = _counting_range
+        try:
+            start = perf_counter()
+            for _ in range(samples):
+                crypto_number.getPrime(bits)
+            pycryptodome_seconds = perf_counter() - start
+        finally:
+            crypto_number._rabinMillerTest = original_test
+            crypto_number.getRandomRange = original_range
+
+        sieve_stats: dict[str, int] = {}
+        start = perf_counter()
+        for _ in range(samples):
+            sieve_prime(bits, sieve_stats)
+        sieve_seconds = perf_counter() - start
+
+        results[bits] = {
+            "pycryptodome": {
+                "seconds": pycryptodome_seconds / samples,
+                "mr_calls": pycryptodome_stats["mr_calls"] / samples,
+                "mr_rounds": pycryptodome_stats["mr_rounds"] / samples,
+            },
+            "sieve": {
+                "seconds": sieve_seconds / samples,
+                "mr_calls": sieve_stats.get("mr_calls", 0) / samples,
+                "mr_rounds": sieve_stats.get("mr_rounds", 0) / samples,
+            },
+        }
+
+        print(f"\n{yellow('>>')} Primos de {bits} bits ({samples} muestras)")
+        for backend, data in results[bits].items():
+            print(
+                f"{backend:>12}: {data['seconds'] * 1000:9.2f} ms/primo"
+                f"  {data['mr_calls']:7.2f} llamadas"
+                f"  {data['mr_rounds']:7.2f} rondas de Miller–Rabin/primo"
+            )
+
+    return results
+
+
+def main() -> None:
+    benchmark_primes()
+
+if __name__ == "__main__":
+    main()
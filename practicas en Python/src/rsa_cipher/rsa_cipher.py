@@ -6,9 +6,18 @@ from secrets import (
     randbits,
 )
 
+from typing import Callable
+
 from Crypto.Util.number import getPrime
 
 from config import BASE_DIR
+from decorators import instrumented
+from key_ring import (
+    fingerprint,
+    pack_rsa,
+    store_key,
+)
+from .prime_sieve import sieve_prime
 from utils import (
     clean_console,
     wait_key,
@@ -24,28 +33,42 @@ __all__ = [
 
 BIT_SIZES = [16, 32, 512, 2048]
 
-def get_primes() -> None:
+# Motores disponibles para generar primos
+PRIME_BACKENDS: dict[str, Callable[[int], int]] = {
+    "pycryptodome": getPrime,
+    "sieve": sieve_prime,
+}
+
+def get_primes(backend: str = "pycryptodome") -> None:
+    generate_prime = PRIME_BACKENDS[backend]
+
     for bits in BIT_SIZES:
-        prime = getPrime(bits)
+        prime = generate_prime(bits)
 
         print(f"\nPrimo de {bits} bits:", prime)
         print(f"Tamaño en bits: {prime.bit_length()}")
 
 
-def _primes_generator(bits: int) -> tuple[int, int]:
+def _primes_generator(
+        bits: int,
+        backend: str = "pycryptodome",
+    ) -> tuple[int, int]:
     """
     Genera dos números primos aleatorios `p` y `q` distintos de
     `bits` tamaño.
 
     :param bits: Tamaño de los números primos.
     :type bits: int
+    :param backend: Motor de generación (`pycryptodome` o `sieve`).
+    :type backend: str
     :return: Números primos `p` y `q`.
     :rtype: tuple[int, int]
     """
-    p = getPrime(bits)
+    generate_prime = PRIME_BACKENDS[backend]
+    p = generate_prime(bits)
 
     while True:
-        q = getPrime(bits)
+        q = generate_prime(bits)
 
         if q != p:
             return p, q
@@ -62,8 +85,12 @@ def _get_ramdom_public_exponent(phi: int) -> int:
             return e
 
 
-def _random_keypair_generator(bits: int) -> tuple[tuple[int, int], int]:
-    p, q = _primes_generator(bits)
+@instrumented("rsa.keygen")
+def _random_keypair_generator(
+        bits: int,
+        backend: str = "pycryptodome",
+    ) -> tuple[tuple[int, int], int]:
+    p, q = _primes_generator(bits, backend)
 
     n = p * q
     phi = (p - 1) * (q - 1)
@@ -73,17 +100,21 @@ def _random_keypair_generator(bits: int) -> tuple[tuple[int, int], int]:
     return (e, n), d
 
 
-def _store_keypair(public_key: tuple[int, int], d: int) -> None:
+def _store_keypair(public_key: tuple[int, int], d: int) -> str | None:
     """
-    Almacena la llave pública y la llave privada en un archivo.
+    Agrega la llave pública y la llave privada al llavero con un id
+    derivado de `n`. En `keys.key` queda además una copia en texto de
+    la última llave generada.
 
     :param public_key: Llave pública (e, n).
     :type public_key: tuple[int, int]
     :param d: Llave privada.
     :type d: int
+    :return: Id de la llave en el llavero o `None` si no se guardó.
+    :rtype: str | None
     """
+    e, n = public_key
     with open(BASE_DIR / "keys.key", "w", encoding="utf-8") as f:
-        e, n = public_key
         f.write(f"e={e}\n")
         f.write(f"d={d}\n")
         f.write(f"n={n}\n")
@@ -93,6 +124,13 @@ def _store_keypair(public_key: tuple[int, int], d: int) -> None:
         f"{success('Llave pública y privada guardadas correctamente como keys.key')}"
     )
 
+    key_id = fingerprint("rsa", n.to_bytes((n.bit_length() + 7) // 8, "big"))
+    if not store_key(key_id, "rsa", pack_rsa(e, d, n)):
+        return None
+
+    print(f"{yellow('>>')} {success(f'Llave agregada al llavero como {key_id}')}")
+    return key_id
+
 
 def _encrypt(e: int, n: int) -> None:
     """
@@ -0,0 +1,27 @@
+from .sbox_analysis import (
+    sbox_analysis_menu,
+    SBoxScore,
+    load_sbox,
+    store_sbox,
+    ddt,
+    walsh_hadamard,
+    lat,
+    differential_uniformity,
+    nonlinearity,
+    random_sboxes,
+    search_sboxes,
+)
+
+__all__ = [
+    "sbox_analysis_menu",
+    "SBoxScore",
+    "load_sbox",
+    "store_sbox",
+    "ddt",
+    "walsh_hadamard",
+    "lat",
+    "differential_uniformity",
+    "nonlinearity",
+    "random_sboxes",
+    "search_sboxes",
+]
@@ -0,0 +1,432 @@
+"""
+Análisis de S-Boxes: tabla de distribución de diferencias (DDT), tabla
+de aproximaciones lineales (LAT), uniformidad diferencial y no
+linealidad.
+
+Lee las S-Boxes que generan `practicas en C/s_box/s-box.c` y
+`practicas en C/tbc_modo_ctr` (líneas `XX -> YY`, de 4 u 8 bits). Todas
+las tablas se calculan con operaciones de arreglos de NumPy: la DDT es
+un `bincount` de las 2^n × 2^n diferencias y la LAT sale de la
+transformada rápida de Walsh–Hadamard de las funciones componentes.
+
+Para buscar S-Boxes fuertes, `search_sboxes` genera y evalúa miles de
+S-Boxes aleatorias en un pool de procesos y devuelve las mejores.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from config import BASE_DIR
+from utils import (
+    clean_console,
+    wait_key,
+    error,
+    success,
+    yellow,
+)
+
+__all__ = [
+    "sbox_analysis_menu",
+    "SBoxScore",
+    "load_sbox",
+    "store_sbox",
+    "ddt",
+    "walsh_hadamard",
+    "lat",
+    "differential_uniformity",
+    "nonlinearity",
+    "random_sboxes",
+    "search_sboxes",
+]
+
+_ENTRY = re.compile(r"([0-9A-Fa-f]+)\s*->\s*([0-9A-Fa-f]+)")
+
+# Paridad de cada byte, para evaluar los productos punto b·S(x)
+_PARITY = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1) & 1
+_SIGNS = (1 - 2 * _PARITY).astype(np.int32)
+
+CHUNK_SIZE = 64  # S-Boxes que evalúa cada tarea del pool
+
+
+@dataclass
+class SBoxScore:
+    """S-Box con su uniformidad diferencial y su no linealidad."""
+
+    sbox: bytes
+    uniformity: int
+    nonlinearity: int
+
+    @property
+    def rank(self) -> tuple[int, int]:
+        """Menor uniformidad primero y, en empate, mayor no linealidad."""
+        return self.uniformity, -self.nonlinearity
+
+
+# ---------- Archivos ----------
+
+def load_sbox(filename: str) -> npt.NDArray[np.uint8]:
+    """
+    Carga una S-Box con líneas `XX -> YY`. El tamaño es el número de
+    líneas y debe ser 16 o 256.
+
+    :param filename: Archivo de la S-Box.
+    :type filename: str
+    :return: S-Box como arreglo.
+    :rtype: npt.NDArray[np.uint8]
+    """
+    with open(BASE_DIR / filename, "r", encoding="utf-8") as f:
+        entries = [(int(x, 16), int(y, 16)) for x, y in _ENTRY.findall(f.read())]
+
+    size = len(entries)
+    if size not in (16, 256):
+        raise ValueError(f"La S-Box debe tener 16 o 256 entradas y tiene {size}")
+
+    sbox = np.zeros(size, dtype=np.uint8)
+    seen = np.zeros(size, dtype=bool)
+    for x, y in entries:
+        if x >= size or y >= size:
+            raise ValueError(f"La entrada {x:02X} -> {y:02X} está fuera de rango")
+        sbox[x] = y
+        seen[x] = True
+
+    if not seen.all():
+        raise ValueError("La S-Box tiene entradas repetidas")
+    return sbox
+
+
+def store_sbox(sbox: npt.ArrayLike, filename: str) -> str:
+    """
+    Guarda una S-Box con el formato de los programas en C.
+
+    :param sbox: S-Box.
+    :type sbox: npt.ArrayLike
+    :param filename: Archivo de salida.
+    :type filename: str
+    :return: Nombre del archivo.
+    :rtype: str
+    """
+    lines = "".join(f"{x:02X} -> {y:02X}\n" for x, y in enumerate(_as_sbox(sbox)))
+
+    with open(BASE_DIR / filename, "w", encoding="utf-8") as f:
+        f.write(lines)
+    return filename
+
+
+# ---------- Tablas ----------
+
+def _as_sbox(sbox: npt.ArrayLike) -> npt.NDArray[np.intp]:
+    """
+    Convierte a un arreglo `(..., 2^n)` de índices y valida el tamaño
+    y el rango de las salidas.
+    """
+    if isinstance(sbox, (bytes, bytearray)):
+        sbox = np.frombuffer(sbox, dtype=np.uint8)
+    sbox = np.asarray(sbox)
+
+    size = sbox.shape[-1] if sbox.ndim else 0
+    if size < 2 or size > 256 or size & (size - 1):
+        raise ValueError("El tamaño de la S-Box debe ser una potencia de 2 hasta 256")
+    if sbox.min() < 0 or sbox.max() >= size:
+        raise ValueError("Las salidas de la S-Box deben ser menores que su tamaño")
+    return sbox.astype(np.intp)
+
+
+def ddt(sbox: npt.ArrayLike) -> npt.NDArray[np.int64]:
+    """
+    Tabla de distribución de diferencias: `ddt(S)[a, b]` es el número
+    de `x` con `S(x) ^ S(x ^ a) == b`. Acepta una S-Box `(2^n,)` o un
+    lote `(m, 2^n)`.
+
+    :param sbox: S-Box o lote de S-Boxes.
+    :type sbox: npt.ArrayLike
+    :return: Tabla `(2^n, 2^n)` o `(m, 2^n, 2^n)`.
+    :rtype: npt.NDArray[np.int64]
+    """
+    sbox = _as_sbox(sbox)
+    size = sbox.shape[-1]
+    batch = sbox.reshape(-1, size)
+    x = np.arange(size)
+
+    # out[k, a, x] = S_k(x) ^ S_k(x ^ a) para todas las diferencias a
+    out = batch[:, x[None, :] ^ x[:, None]] ^ batch[:, None, :]
+    cells = (np.arange(len(batch))[:, None, None] * size + x[None, :, None]) * size + out
+    table = np.bincount(cells.ravel(), minlength=len(batch) * size * size)
+    return table.reshape(sbox.shape[:-1] + (size, size))
+
+
+def _butterflies(result: npt.NDArray[np.integer]) -> npt.NDArray[np.integer]:
+    """Transformada de Walsh–Hadamard en su lugar sobre la última dimensión."""
+    size = result.shape[-1]
+    h = 1
+    while h < size:
+        pairs = result.reshape(result.shape[:-1] + (size // (2 * h), 2, h))
+        low, high = pairs[..., 0, :], pairs[..., 1, :]
+        # (low, high) -> (low + high, low - high) sin arreglos temporales
+        low += high
+        high *= -2
+        high += low
+        h *= 2
+    return result
+
+
+def walsh_hadamard(values: npt.ArrayLike) -> npt.NDArray[np.int64]:
+    """
+    Transformada rápida de Walsh–Hadamard (sin normalizar) sobre la
+    última dimensión, que debe tener tamaño potencia de 2. Son log2(n)
+    pasos de mariposa, cada uno sobre todo el arreglo.
+
+    :param values: Arreglo `(..., n)`.
+    :type values: npt.ArrayLike
+    :return: Transformada `(..., n)`.
+    :rtype: npt.NDArray[np.int64]
+    """
+    result = np.array(values, dtype=np.int64)
+    size = result.shape[-1]
+    if size & (size - 1):
+        raise ValueError("El tamaño debe ser una potencia de 2")
+    return _butterflies(result)
+
+
+def _walsh_spectrum(sbox: npt.NDArray[np.intp]) -> npt.NDArray[np.int32]:
+    """`W[..., b, a] = sum_x (-1)^(b·S(x) ^ a·x)` para todas las máscaras."""
+    size = sbox.shape[-1]
+    masks = np.arange(size)
+    # Función componente b·S(x) como ±1 para cada máscara de salida b
+    signs = _SIGNS[masks[:, None] & sbox[..., None, :]]
+    # |W| <= 2^n, así que basta con int32 y se transforma en su lugar
+    return _butterflies(signs)
+
+
+def lat(sbox: npt.ArrayLike) -> npt.NDArray[np.int32]:
+    """
+    Tabla de aproximaciones lineales: `lat(S)[a, b]` es el número de
+    `x` con `a·x == b·S(x)` menos 2^(n-1). Acepta una S-Box o un lote.
+
+    :param sbox: S-Box o lote de S-Boxes.
+    :type sbox: npt.ArrayLike
+    :return: Tabla `(2^n, 2^n)` o `(m, 2^n, 2^n)`.
+    :rtype: npt.NDArray[np.int32]
+    """
+    return np.swapaxes(_walsh_spectrum(_as_sbox(sbox)), -1, -2) // 2
+
+
+def differential_uniformity(sbox: npt.ArrayLike) -> npt.NDArray[np.int64] | int:
+    """
+    Mayor entrada de la DDT sin la diferencia de entrada 0 (menor es
+    mejor; 4 para la S-Box de AES).
+
+    :param sbox: S-Box o lote de S-Boxes.
+    :type sbox: npt.ArrayLike
+    :return: Uniformidad de cada S-Box.
+    :rtype: npt.NDArray[np.int64] | int
+    """
+    table = ddt(sbox)
+    result = table[..., 1:, :].max(axis=(-1, -2))
+    return int(result) if result.ndim == 0 else result
+
+
+def nonlinearity(sbox: npt.ArrayLike) -> npt.NDArray[np.int32] | int:
+    """
+    Distancia mínima de las funciones componentes no nulas a las
+    funciones afines: 2^(n-1) - max|W| / 2 (mayor es mejor; 112 para la
+    S-Box de AES).
+
+    :param sbox: S-Box o lote de S-Boxes.
+    :type sbox: npt.ArrayLike
+    :return: No linealidad de cada S-Box.
+    :rtype: npt.NDArray[np.int32] | int
+    """
+    sbox = _as_sbox(sbox)
+    spectrum = np.abs(_walsh_spectrum(sbox)[..., 1:, :])
+    result = sbox.shape[-1] // 2 - spectrum.max(axis=(-1, -2)) // 2
+    return int(result) if result.ndim == 0 else result
+
+
+# ---------- Búsqueda ----------
+
+def random_sboxes(
+        count: int,
+        bits: int = 8,
+        rng: np.random.Generator | None = None,
+    ) -> npt.NDArray[np.uint8]:
+    """
+    Genera `count` S-Boxes biyectivas aleatorias, como `sbox_generator`.
+
+    :param count: Número de S-Boxes.
+    :type count: int
+    :param bits: Bits de entrada y salida (4 u 8).
+    :type bits: int
+    :param rng: Generador de NumPy; si es `None` se usa uno nuevo.
+    :type rng: np.random.Generator | None
+    :return: Arreglo `(count, 2^bits)`.
+    :rtype: npt.NDArray[np.uint8]
+    """
+    if bits not in (4, 8):
+        raise ValueError("Solo hay S-Boxes de 4 u 8 bits")
+
+    rng = rng or np.random.default_rng()
+    identity = np.broadcast_to(np.arange(1 << bits, dtype=np.uint8), (count, 1 << bits))
+    return rng.permuted(identity, axis=1)
+
+
+def _score_chunk(
+        count: int,
+        bits: int,
+        seed: np.random.SeedSequence,
+        top: int,
+    ) -> list[SBoxScore]:
+    """Tarea del pool: genera y evalúa un lote y devuelve sus mejores."""
+    sboxes = random_sboxes(count, bits, np.random.default_rng(seed))
+    uniformity = differential_uniformity(sboxes)
+    linearity = nonlinearity(sboxes)
+
+    order = np.lexsort((-linearity, uniformity))[:top]
+    return [
+        SBoxScore(sboxes[i].tobytes(), int(uniformity[i]), int(linearity[i]))
+        for i in order
+    ]
+
+
+def search_sboxes(
+        count: int,
+        bits: int = 8,
+        top: int = 1,
+        workers: int | None = None,
+        seed: int | None = None,
+    ) -> list[SBoxScore]:
+    """
+    Genera `count` S-Boxes aleatorias, las evalúa en un pool de
+    `workers` procesos (en lotes de `CHUNK_SIZE`) y devuelve las `top`
+    mejores: menor uniformidad diferencial y, en empate, mayor no
+    linealidad. Con la misma `seed` el resultado es el mismo.
+
+    :param count: Número de S-Boxes a evaluar.
+    :type count: int
+    :param bits: Bits de la S-Box (4 u 8).
+    :type bits: int
+    :param top: Número de S-Boxes a devolver.
+    :type top: int
+    :param workers: Procesos; por omisión, uno por CPU.
+    :type workers: int | None
+    :param seed: Semilla de la búsqueda.
+    :type seed: int | None
+    :return: Las mejores S-Boxes, de la más fuerte a la más débil.
+    :rtype: list[SBoxScore]
+    """
+    if count < 1 or top < 1:
+        raise ValueError("count y top deben ser positivos")
+
+    sizes = [CHUNK_SIZE] * (count // CHUNK_SIZE)
+    if count % CHUNK_SIZE:
+        sizes.append(count % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = map(_score_chunk, sizes, [bits] * len(sizes), seeds, [top] * len(sizes))
+        best = [score for chunk in results for score in chunk]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _score_chunk, sizes, [bits] * len(sizes), seeds, [top] * len(sizes)
+            )
+            best = [score for chunk in results for score in chunk]
+
+    return sorted(best, key=lambda score: score.rank)[:top]
+
+
+# ---------- Menú ----------
+
+def _print_analysis(sbox: npt.NDArray[np.uint8]) -> None:
+    start = time.perf_counter()
+    table = ddt(sbox)
+    uniformity = int(table[1:, :].max())
+    linearity = nonlinearity(sbox)
+    elapsed = time.perf_counter() - start
+
+    bits = len(sbox).bit_length() - 1
+    print(f"\n{yellow('>>')} S-Box de {bits} bits")
+    print(f"{yellow('>>')} Uniformidad diferencial: {uniformity}")
+    print(f"{yellow('>>')} No linealidad: {linearity}")
+    print(f"{yellow('>>')} Máxima probabilidad diferencial: {uniformity}/{len(sbox)}")
+    print(f"{yellow('>>')} Tiempo de análisis: {elapsed:.3f} segundos")
+
+
+def _analyze_file(filename: str) -> None:
+    try:
+        sbox = load_sbox(filename)
+    except OSError:
+        print(f"\n{yellow('>>')} {error('ERROR')}: No se pudo abrir {filename}")
+        return
+    except ValueError as e:
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return
+
+    _print_analysis(sbox)
+
+
+def _search_and_store(count: int, bits: int, filename: str) -> None:
+    start = time.perf_counter()
+    best = search_sboxes(count, bits)[0]
+    elapsed = time.perf_counter() - start
+
+    sbox = np.frombuffer(best.sbox, dtype=np.uint8)
+    store_sbox(sbox, filename)
+
+    print(f"\n{yellow('>>')} Se evaluaron {count} S-Boxes en {elapsed:.3f} segundos")
+    _print_analysis(sbox)
+    print(f"\n{yellow('>>')} {success(f'La mejor S-Box se guardó en {filename}')}")
+
+
+def sbox_analysis_menu() -> None:
+    while True:
+        clean_console()
+        print(f"""
+/*-----------------.
+| ANÁLISIS S-BOXES |
+`-----------------*/
+
+{yellow('>>')} Elija una de las opciones
+
+1.- Analizar una S-Box
+2.- Buscar la mejor de muchas S-Boxes aleatorias
+3.- Salir
+""")
+        option = input("Opción: ")
+        match option:
+            case "1":
+                filename = input("\nEscribe el nombre del archivo de la S-Box: ")
+                _analyze_file(filename)
+                wait_key()
+            case "2":
+                try:
+                    bits = int(input("\nBits de la S-Box (4 u 8): "))
+                    count = int(input("Número de S-Boxes a evaluar: "))
+                    if bits not in (4, 8) or count < 1:
+                        raise ValueError
+                except ValueError:
+                    print(f"\n{yellow('>>')} {error('ERROR')}: Valores no válidos")
+                    wait_key()
+                    continue
+
+                filename = input("Escribe el nombre del archivo de salida: ")
+                _search_and_store(count, bits, filename)
+                wait_key()
+            case "3":
+                break
+            case _:
+                print(f"\n{yellow('>>')} {error('ERROR')}: Opción no válida")
+                wait_key()
+
+
+def main() -> None:
+    sbox_analysis_menu()
+
+if __name__ == "__main__":
+    main()
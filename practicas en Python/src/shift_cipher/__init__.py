@@ -1,3 +1,9 @@
-from .shift_cipher import shift_cipher_menu
+from .shift_cipher import (
+    shift_cipher_menu,
+    ShiftCipher,
+)
 
-__all__ = ["shift_cipher_menu"]
+__all__ = [
+    "shift_cipher_menu",
+    "ShiftCipher",
+]
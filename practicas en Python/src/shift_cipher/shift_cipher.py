@@ -1,5 +1,10 @@
 """Cifrado usando Shift Cipher."""
 
+from ciphers import (
+    Cipher,
+    CipherStream,
+    TextStream,
+)
 from config import BASE_DIR
 from decorators import validate_file
 from utils import (
@@ -10,29 +15,58 @@ from utils import (
     yellow,
 )
 
-__all__ = ["shift_cipher_menu"]
+__all__ = [
+    "shift_cipher_menu",
+    "ShiftCipher",
+]
 
 SPANISH_ALPHABET = "ABCDEFGHIJKLMNÑOPQRSTUVWXY "
 
+
+def _shift_text(text: str, key: int) -> str:
+    """
+    Desplaza `key` posiciones cada carácter de `text` que esté en
+    `SPANISH_ALPHABET`; los demás se dejan igual.
+    """
+    alphabet_lenght = len(SPANISH_ALPHABET)
+    result = ""
+
+    for m in text:
+        if m in SPANISH_ALPHABET:
+            residue = (SPANISH_ALPHABET.find(m) + key) % alphabet_lenght
+            result += SPANISH_ALPHABET[residue]
+        else:
+            result += m
+
+    return result
+
+
+class ShiftCipher(Cipher):
+    """Shift Cipher sobre texto UTF-8, sin archivos ni impresiones."""
+
+    name = "shift"
+
+    def __init__(self, key: int) -> None:
+        self.key = int(key)
+
+    def encryptor(self) -> CipherStream:
+        return TextStream(lambda text: _shift_text(text, self.key))
+
+    def decryptor(self) -> CipherStream:
+        return TextStream(lambda text: _shift_text(text, -self.key))
+
+
 @validate_file("plaintext_file")
 def _encrypt_shift(
         key: int,
         plaintext_file: str,
         ciphertext_file: str,
-    ) -> None:
+    ) -> str:
     with open(BASE_DIR / plaintext_file, "r", encoding="utf-8") as f:
         plaintext = f.read()
 
-    alphabet_lenght = len(SPANISH_ALPHABET)
-    ciphertext = ""
-    
-    for m in plaintext:
-        if m in SPANISH_ALPHABET:
-            residue = (SPANISH_ALPHABET.find(m) + key) % alphabet_lenght
-            ciphertext += SPANISH_ALPHABET[residue]
-        else:
-            ciphertext += m
-    
+    ciphertext = _shift_text(plaintext, key)
+
     with open(BASE_DIR / ciphertext_file, "w", encoding="utf-8") as f:
         f.write(ciphertext)
 
@@ -40,13 +74,14 @@ def _encrypt_shift(
         f"\n{yellow('>>')} "
         f"{success(f'Texto cifrado correctamente y guardado en {ciphertext_file}')}"
     )
+    return ciphertext_file
 
 
 @validate_file("ciphertext_file")
 def _decrypt_shift(
         key: int,
         ciphertext_file: str,
-    ) -> None:
+    ) -> str | None:
     try:
         with open(BASE_DIR / ciphertext_file, "r", encoding="utf-8") as f:
             ciphertext = f.read()
@@ -54,17 +89,10 @@ def _decrypt_shift(
         print(">> El archivo con el 'ciphertext' no existe")
         return
     
-    alphabet_lenght = len(SPANISH_ALPHABET)
-    plaintext = ""
+    plaintext = _shift_text(ciphertext, -key)
 
-    for c in ciphertext:
-        if c in SPANISH_ALPHABET:
-            residue = (SPANISH_ALPHABET.find(c) - key) % alphabet_lenght
-            plaintext += SPANISH_ALPHABET[residue]
-        else:
-            plaintext += c
-    
     print(f"\n{yellow('>>')} Texto original recuperado:\n\n{plaintext}")
+    return plaintext
 
 
 def shift_cipher_menu() -> None:
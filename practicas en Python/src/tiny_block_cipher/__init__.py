@@ -0,0 +1,13 @@
+from .tiny_block_cipher import (
+    tiny_block_cipher_menu,
+    TinyBlockCipher,
+    codebook,
+    ctr_keystream,
+)
+
+__all__ = [
+    "tiny_block_cipher_menu",
+    "TinyBlockCipher",
+    "codebook",
+    "ctr_keystream",
+]
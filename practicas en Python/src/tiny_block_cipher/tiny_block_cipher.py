@@ -0,0 +1,476 @@
+"""
+Tiny block cipher de 16 bits en modo CTR, la versión en Python de
+`practicas en C/tbc_modo_ctr`.
+
+Usa los mismos archivos que el programa en C: la S-box (`XX -> YY` por
+línea), la P-box (8 números del 1 al 8) y la llave (4 dígitos
+hexadecimales), y el mismo formato de texto cifrado (`C0`, `N` y un
+bloque hexadecimal por línea). Al final se agrega una línea `L:` con
+la longitud original para quitar el relleno; el programa en C la
+ignora porque solo lee `N` bloques.
+
+Como el bloque es de 16 bits, para una llave se calcula una sola vez
+el libro de códigos completo (las 65,536 salidas) con NumPy. Después,
+el flujo de llave de CTR para todo un archivo es una búsqueda en ese
+arreglo y cifrar es un XOR.
+
+Igual que en C, el contador es `C0 << 8 | C1` con `C1` de un byte, así
+que el flujo de llave se repite cada 256 bloques (512 bytes). Es un
+cifrado para estudiar, no para proteger datos.
+"""
+
+import re
+import time
+from functools import lru_cache
+from typing import TypeAlias
+
+import numpy as np
+import numpy.typing as npt
+from Crypto.Random import get_random_bytes
+
+from bit_permutation import BitPermutation
+from ciphers import (
+    BufferedStream,
+    Cipher,
+    CipherStream,
+)
+from config import BASE_DIR
+from decorators import (
+    ValidationContext,
+    instrumented,
+    validate_file,
+)
+from utils import (
+    clean_console,
+    wait_key,
+    error,
+    success,
+    yellow,
+)
+
+__all__ = [
+    "tiny_block_cipher_menu",
+    "TinyBlockCipher",
+    "codebook",
+    "ctr_keystream",
+]
+
+Codebook: TypeAlias = npt.NDArray[np.uint16]
+
+SBOX_FILENAME = "sbox.txt"
+PBOX_FILENAME = "pbox.txt"
+KEY_FILENAME = "key.txt"
+SBOX_SIZE = 256
+PBOX_SIZE = 8
+ROUNDS = 3
+BLOCK_SIZE = 2  # Bytes
+
+_HEADER = re.compile(rb"\s*C0:\s*([0-9A-Fa-f]{1,2})\s*N:\s*(\d+)\s*")
+_LENGTH = re.compile(rb"L:\s*(\d+)")
+
+
+# ---------- Archivos de la S-box, la P-box y la llave ----------
+
+def _sbox_generator(filename: str = SBOX_FILENAME) -> str:
+    """Genera una S-box aleatoria de 8 bits y la guarda como en C."""
+    sbox = np.random.permutation(SBOX_SIZE)
+    lines = "".join(f"{i:02X} -> {s:02X}\n" for i, s in enumerate(sbox))
+
+    with open(BASE_DIR / filename, "w", encoding="utf-8") as f:
+        f.write(lines)
+    return filename
+
+
+def _pbox_generator(filename: str = PBOX_FILENAME) -> str:
+    """Genera una P-box aleatoria de tamaño 8 y la guarda como en C."""
+    pbox = np.random.permutation(np.arange(1, PBOX_SIZE + 1))
+
+    with open(BASE_DIR / filename, "w", encoding="utf-8") as f:
+        f.write("".join(f"{p}\n" for p in pbox))
+    return filename
+
+
+def _secret_key_generator(filename: str = KEY_FILENAME) -> str:
+    """Genera una llave de 16 bits y la guarda en hexadecimal."""
+    key = int.from_bytes(get_random_bytes(2), "big")
+
+    with open(BASE_DIR / filename, "w", encoding="utf-8") as f:
+        f.write(f"{key:04X}\n")
+    return filename
+
+
+def _load_sbox(filename: str = SBOX_FILENAME) -> npt.NDArray[np.uint8]:
+    """
+    Carga la S-box. Como en C, las entradas que faltan quedan en 0 y
+    las líneas fuera de rango se ignoran.
+    """
+    sbox = np.zeros(SBOX_SIZE, dtype=np.uint8)
+    with open(BASE_DIR / filename, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    for x, y in re.findall(r"([0-9A-Fa-f]+)\s*->\s*([0-9A-Fa-f]+)", text):
+        x, y = int(x, 16), int(y, 16)
+        if x < SBOX_SIZE and y < SBOX_SIZE:
+            sbox[x] = y
+    return sbox
+
+
+def _load_pbox(filename: str = PBOX_FILENAME) -> tuple[int, ...]:
+    """
+    Carga la P-box. Lanza `ValueError` si no tiene exactamente 8
+    valores distintos entre 1 y 8.
+    """
+    with open(BASE_DIR / filename, "r", encoding="utf-8") as f:
+        values = [int(v) for v in f.read().split()[:PBOX_SIZE]]
+
+    if len(values) != PBOX_SIZE or any(not 1 <= v <= PBOX_SIZE for v in values):
+        raise ValueError("La P-Box debe tener 8 valores entre 1 y 8")
+    if len(set(values)) != PBOX_SIZE:
+        raise ValueError("La P-Box tiene valores repetidos")
+    return tuple(values)
+
+
+def _load_key(filename: str = KEY_FILENAME) -> int:
+    """Carga la llave de 16 bits en hexadecimal."""
+    with open(BASE_DIR / filename, "r", encoding="utf-8") as f:
+        text = f.read().split()
+
+    try:
+        key = int(text[0], 16)
+    except (IndexError, ValueError):
+        raise ValueError("No se pudo leer la llave") from None
+    return key & 0xFFFF
+
+
+# ---------- Libro de códigos ----------
+
+def _key_expansion(key: int, sbox: npt.NDArray[np.uint8]) -> tuple[int, int, int]:
+    """Las tres sub-llaves de 16 bits, como `key_expansion` de C."""
+    def _swap_nibbles(byte: int) -> int:
+        return ((byte & 0x0F) << 4) | (byte >> 4)
+
+    w0, w1 = key >> 8, key & 0xFF
+    w2 = w0 ^ 0x80 ^ int(sbox[_swap_nibbles(w1)])
+    w3 = w2 ^ w1
+    w4 = w2 ^ 0x30 ^ int(sbox[_swap_nibbles(w3)])
+    w5 = w4 ^ w3
+    return (w0 << 8) | w1, (w2 << 8) | w3, (w4 << 8) | w5
+
+
+@lru_cache(maxsize=16)
+def _cached_codebook(key: int, sbox: bytes, pbox: tuple[int, ...]) -> Codebook:
+    sbox_array = np.frombuffer(sbox, dtype=np.uint8)
+    # S-box seguida de la P-box, aplicada a cada byte del bloque
+    sp = BitPermutation(pbox).apply(sbox_array).astype(np.uint16)
+
+    blocks = np.arange(1 << 16, dtype=np.uint16)
+    for sub_key in _key_expansion(key, sbox_array):
+        blocks ^= sub_key
+        blocks = (sp[blocks >> 8] << 8) | sp[blocks & 0xFF]
+
+    blocks.flags.writeable = False
+    return blocks
+
+
+def codebook(
+        key: int,
+        sbox: npt.NDArray[np.uint8],
+        pbox: tuple[int, ...],
+    ) -> Codebook:
+    """
+    Cifra los 65,536 bloques posibles con la llave: `codebook(...)[M]`
+    es `encrypt_block(M, K)` del programa en C. El resultado se guarda
+    en caché y es de solo lectura.
+
+    :param key: Llave de 16 bits.
+    :type key: int
+    :param sbox: S-box de 256 entradas.
+    :type sbox: npt.NDArray[np.uint8]
+    :param pbox: P-box con los valores del 1 al 8.
+    :type pbox: tuple[int, ...]
+    :return: Libro de códigos completo.
+    :rtype: Codebook
+    """
+    return _cached_codebook(key & 0xFFFF, np.asarray(sbox, dtype=np.uint8).tobytes(), tuple(pbox))
+
+
+def ctr_keystream(book: Codebook, c0: int, count: int, start: int = 0) -> Codebook:
+    """
+    Flujo de llave de CTR para los bloques `start` a `start + count - 1`.
+    Como el contador solo avanza en el byte bajo, el flujo tiene periodo
+    de 256 bloques: se busca un periodo en el libro de códigos y se
+    repite hasta `count`.
+
+    :param book: Libro de códigos de la llave.
+    :type book: Codebook
+    :param c0: Byte alto del contador.
+    :type c0: int
+    :param count: Número de bloques.
+    :type count: int
+    :param start: Número del primer bloque.
+    :type start: int
+    :return: Un bloque de 16 bits de flujo de llave por bloque.
+    :rtype: Codebook
+    """
+    low = (np.arange(start, start + SBOX_SIZE) & 0xFF).astype(np.uint16)
+    return np.resize(book[(c0 << 8) | low], count)
+
+
+# ---------- Formato del texto cifrado ----------
+
+@lru_cache(maxsize=1)
+def _hex_lines() -> npt.NDArray[np.uint8]:
+    """Línea `%04X\\n` de cada valor de 16 bits, como arreglo (65536, 5)."""
+    digits = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+    values = np.arange(1 << 16, dtype=np.uint32)
+    lines = np.empty((1 << 16, 5), dtype=np.uint8)
+    for i, shift in enumerate((12, 8, 4, 0)):
+        lines[:, i] = digits[(values >> shift) & 0xF]
+    lines[:, 4] = ord("\n")
+    return lines
+
+
+def _encrypt_bytes(book: Codebook, data: bytes, c0: int | None = None) -> bytes:
+    """Cifra `data` y lo devuelve en el formato de texto de C."""
+    if c0 is None:
+        c0 = get_random_bytes(1)[0]
+
+    padded = np.frombuffer(data + b"\x00" * (len(data) % 2), dtype=">u2")
+    blocks = padded ^ ctr_keystream(book, c0, len(padded))
+
+    return b"".join((
+        f"C0: {c0:02X}\nN: {len(blocks)}\n".encode(),
+        _hex_lines()[blocks].tobytes(),
+        f"L: {len(data)}\n".encode(),
+    ))
+
+
+def _decrypt_bytes(book: Codebook, data: bytes) -> bytes:
+    """
+    Descifra un texto cifrado en el formato de C. Sin la línea `L:`
+    (archivos del programa en C) se conserva el relleno.
+    """
+    header = _HEADER.match(data)
+    if header is None:
+        raise ValueError("El texto cifrado no tiene las líneas C0 y N")
+
+    c0, count = int(header[1], 16), int(header[2])
+    body = data[header.end():]
+
+    length = None
+    trailer = _LENGTH.search(body)
+    if trailer is not None:
+        length = int(trailer[1])
+        body = body[:trailer.start()]
+
+    digits = body.translate(None, b" \t\r\n")
+    if len(digits) != 4 * count:
+        raise ValueError(f"Se esperaban {count} bloques de 4 dígitos hexadecimales")
+
+    try:
+        blocks = np.frombuffer(bytes.fromhex(digits.decode("ascii")), dtype=">u2")
+    except (UnicodeDecodeError, ValueError):
+        raise ValueError("Los bloques no son hexadecimales") from None
+
+    plaintext = (blocks ^ ctr_keystream(book, c0, count)).astype(">u2").tobytes()
+    return plaintext if length is None else plaintext[:length]
+
+
+class TinyBlockCipher(Cipher):
+    """
+    Tiny block cipher en modo CTR, sin archivos ni impresiones. El
+    texto cifrado es el formato de texto del programa en C (con la
+    línea `L:`). Los objetos incrementales acumulan la entrada hasta
+    `finalize` porque la cabecera lleva el número de bloques.
+    """
+
+    name = "tbc"
+
+    def __init__(
+            self,
+            key: int,
+            sbox: npt.NDArray[np.uint8],
+            pbox: tuple[int, ...],
+        ) -> None:
+        if len(sbox) != SBOX_SIZE:
+            raise ValueError("La S-Box debe tener 256 entradas")
+        if sorted(pbox) != list(range(1, PBOX_SIZE + 1)):
+            raise ValueError("La P-Box debe ser una permutación de 1 a 8")
+        self.book = codebook(key, sbox, pbox)
+
+    def encryptor(self) -> CipherStream:
+        return BufferedStream(lambda data: _encrypt_bytes(self.book, data))
+
+    def decryptor(self) -> CipherStream:
+        return BufferedStream(lambda data: _decrypt_bytes(self.book, data))
+
+
+def _load_codebook(sbox_file: str, pbox_file: str, key_file: str) -> Codebook | None:
+    """Carga los tres archivos e imprime el error si alguno falla."""
+    try:
+        sbox = _load_sbox(sbox_file)
+        pbox = _load_pbox(pbox_file)
+        key = _load_key(key_file)
+    except OSError as e:
+        print(f"\n{yellow('>>')} {error('ERROR')}: No se pudo abrir {e.filename}")
+        return None
+    except ValueError as e:
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
+
+    return codebook(key, sbox, pbox)
+
+
+@instrumented("tbc.encrypt_file", size_param="plaintext_file")
+@validate_file("plaintext_file")
+def _encrypt_file(
+        plaintext_file: str,
+        ciphertext_file: str,
+        sbox_file: str = SBOX_FILENAME,
+        pbox_file: str = PBOX_FILENAME,
+        key_file: str = KEY_FILENAME,
+        ctx: ValidationContext | None = None,
+    ) -> str | None:
+    """
+    Cifra un archivo en modo CTR con la S-box, la P-box y la llave de
+    los archivos indicados.
+
+    :param plaintext_file: Archivo a cifrar.
+    :type plaintext_file: str
+    :param ciphertext_file: Archivo de texto con el ciphertext.
+    :type ciphertext_file: str
+    :param sbox_file: Archivo con la S-box.
+    :type sbox_file: str
+    :param pbox_file: Archivo con la P-box.
+    :type pbox_file: str
+    :param key_file: Archivo con la llave.
+    :type key_file: str
+    :param ctx: Contexto de validación con el archivo ya abierto.
+    :type ctx: ValidationContext | None
+    :return: Nombre del archivo cifrado o `None` si hubo un error.
+    :rtype: str | None
+    """
+    book = _load_codebook(sbox_file, pbox_file, key_file)
+    if book is None:
+        return None
+
+    start = time.perf_counter()
+    ciphertext = _encrypt_bytes(book, ctx.read(plaintext_file))
+
+    with open(BASE_DIR / ciphertext_file, "wb") as f:
+        f.write(ciphertext)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'Archivo cifrado correctamente y guardado como {ciphertext_file}')}"
+    )
+    print(f"{yellow('>>')} Tiempo de cifrado: {elapsed:.3f} segundos")
+    return ciphertext_file
+
+
+@instrumented("tbc.decrypt_file", size_param="ciphertext_file")
+@validate_file("ciphertext_file")
+def _decrypt_file(
+        ciphertext_file: str,
+        output_file: str,
+        sbox_file: str = SBOX_FILENAME,
+        pbox_file: str = PBOX_FILENAME,
+        key_file: str = KEY_FILENAME,
+        ctx: ValidationContext | None = None,
+    ) -> str | None:
+    """
+    Descifra un archivo cifrado por `_encrypt_file` o por el programa
+    en C.
+
+    :param ciphertext_file: Archivo de texto con el ciphertext.
+    :type ciphertext_file: str
+    :param output_file: Archivo original recuperado.
+    :type output_file: str
+    :param sbox_file: Archivo con la S-box.
+    :type sbox_file: str
+    :param pbox_file: Archivo con la P-box.
+    :type pbox_file: str
+    :param key_file: Archivo con la llave.
+    :type key_file: str
+    :param ctx: Contexto de validación con el archivo ya abierto.
+    :type ctx: ValidationContext | None
+    :return: Nombre del archivo recuperado o `None` si hubo un error.
+    :rtype: str | None
+    """
+    book = _load_codebook(sbox_file, pbox_file, key_file)
+    if book is None:
+        return None
+
+    start = time.perf_counter()
+    try:
+        plaintext = _decrypt_bytes(book, ctx.read(ciphertext_file))
+    except ValueError as e:
+        print(f"\n{yellow('>>')} {error('ERROR')}: {e}")
+        return None
+
+    with open(BASE_DIR / output_file, "wb") as f:
+        f.write(plaintext)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"\n{yellow('>>')} "
+        f"{success(f'Archivo descifrado correctamente y guardado como {output_file}')}"
+    )
+    print(f"{yellow('>>')} Tiempo de descifrado: {elapsed:.3f} segundos")
+    return output_file
+
+
+def tiny_block_cipher_menu() -> None:
+    while True:
+        clean_console()
+        print(f"""
+/*-----------------------------.
+| TINY BLOCK CIPHER (MODO CTR) |
+`-----------------------------*/
+
+{yellow('>>')} Elija una de las opciones
+
+1.- Generar una S-Box de 8 bits
+2.- Generar una llave secreta
+3.- Generar una P-Box
+4.- Cifrar un archivo
+5.- Descifrar un archivo
+6.- Salir
+""")
+        option = input("Opción: ")
+        match option:
+            case "1":
+                filename = _sbox_generator()
+                print(f"\n{yellow('>>')} {success(f'La S-Box se guardó en {filename}')}")
+                wait_key()
+            case "2":
+                filename = _secret_key_generator()
+                print(f"\n{yellow('>>')} {success(f'La llave se guardó en {filename}')}")
+                wait_key()
+            case "3":
+                filename = _pbox_generator()
+                print(f"\n{yellow('>>')} {success(f'La P-Box se guardó en {filename}')}")
+                wait_key()
+            case "4":
+                infile = input("\nEscribe el nombre del archivo a cifrar: ")
+                outfile = input("Escribe el nombre del archivo cifrado: ")
+                _encrypt_file(infile, outfile)
+                wait_key()
+            case "5":
+                infile = input("\nEscribe el nombre del archivo cifrado: ")
+                outfile = input("Escribe el nombre del archivo recuperado: ")
+                _decrypt_file(infile, outfile)
+                wait_key()
+            case "6":
+                break
+            case _:
+                print(f"\n{yellow('>>')} {error('ERROR')}: Opción no válida")
+                wait_key()
+
+
+def main() -> None:
+    tiny_block_cipher_menu()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 """Funciones útiles."""
 
-import msvcrt
 import os
 
 __all__ = [
@@ -14,4 +13,9 @@ def clean_console() -> None:
 
 def wait_key() -> None:
     print("\nPresiona enter para continuar...")
-    msvcrt.getch()
+
+    if os.name == "nt":
+        import msvcrt  # Solo existe en Windows
+        msvcrt.getch()
+    else:
+        input()